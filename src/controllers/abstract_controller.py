@@ -1,17 +1,37 @@
 import abc
+import numpy as np
 from orca_gym.environment import OrcaGymLocalEnv
 from orca_gym.log import OrcaLog
 
 orca_logger = OrcaLog.get_instance()
 
+def compact_ctrl_index(ctrl_index: list[int]) -> slice | np.ndarray:
+    '''
+    @description: 将驱动器索引压缩成slice(连续升序时)或索引数组, 用于对ctrl缓冲区原地读写
+    @param:
+        ctrl_index: 驱动器索引列表
+    @return:
+        slice或np.ndarray
+    '''
+    if len(ctrl_index) == 0:
+        return slice(0, 0)
+    start = ctrl_index[0]
+    if list(ctrl_index) == list(range(start, start + len(ctrl_index))):
+        return slice(start, start + len(ctrl_index))
+    return np.asarray(ctrl_index, dtype=np.int64)
+
 class AbstractController(metaclass=abc.ABCMeta):
     #! 参数说明
     #! env: 环境
     #! ctrl_name: 控制器的名称列表
     #! init_ctrl: 控制器名称和初始值的对应
     #! base_body: 基座体
+    #! 控制器输出协议:
+    #!   init_ctrl_index 解析出 ctrl_slot (slice 或索引数组), 指向共享的 ctrl 缓冲区
+    #!   write_ctrl / write_init_ctrl 直接原地写入 ctrl 缓冲区, 不再每步构造 dict
+    #!   run_controller / get_init_ctrl 仍返回 {actuator_index: value}, 作为兼容接口保留
     def __init__(self,
-                env: OrcaGymLocalEnv, 
+                env: OrcaGymLocalEnv,
                 ctrl_name: list[str],
                 init_ctrl: dict[str, float],
                 base_body: str):
@@ -19,17 +39,47 @@ class AbstractController(metaclass=abc.ABCMeta):
         self.ctrl_name = ctrl_name
         self.init_ctrl = init_ctrl
         self.base_link = env.body(base_body)
+        self.ctrl_slot: slice | np.ndarray = slice(0, 0)
+        self._init_ctrl_slot: np.ndarray = np.zeros(0, dtype=np.int64)
+        self._init_ctrl_values: np.ndarray = np.zeros(0, dtype=np.float32)
         self.ctrl_index = self.init_ctrl_index()
-    
+
     def init_ctrl_index(self) -> list[int]:
         self.ctrl_index = [self.env.model.actuator_name2id(name) for name in self.ctrl_name]
+        self._resolve_ctrl_slot()
         return self.ctrl_index
-    
+
+    def _resolve_ctrl_slot(self):
+        '''
+        @description: 根据ctrl_index预先计算ctrl缓冲区的写入位置和初始值, 每次模型加载后调用一次
+        '''
+        self.ctrl_slot = compact_ctrl_index(self.ctrl_index)
+        init_names = [name for name in self.ctrl_name if name in self.init_ctrl]
+        self._init_ctrl_slot = np.asarray([self.ctrl_index[self.ctrl_name.index(name)] for name in init_names], dtype=np.int64)
+        self._init_ctrl_values = np.asarray([self.init_ctrl[name] for name in init_names], dtype=np.float32)
+
     def get_init_ctrl(self) -> dict[int, float]:
-        return {self.env.model.actuator_name2id(name): self.init_ctrl[name] 
+        return {self.env.model.actuator_name2id(name): self.init_ctrl[name]
                 for name in self.ctrl_name if name in self.init_ctrl}
-    
+
+    def write_init_ctrl(self, ctrl: np.ndarray):
+        '''
+        @description: 将初始控制值原地写入共享的ctrl缓冲区
+        @param:
+            ctrl: 共享的ctrl缓冲区
+        '''
+        ctrl[self._init_ctrl_slot] = self._init_ctrl_values
+
+    def write_ctrl(self, ctrl: np.ndarray):
+        '''
+        @description: 运行控制器并将输出原地写入共享的ctrl缓冲区,
+                      默认实现走run_controller的dict兼容接口, 子类应重写为直接写入ctrl_slot
+        @param:
+            ctrl: 共享的ctrl缓冲区
+        '''
+        for index, value in self.run_controller().items():
+            ctrl[index] = value
+
     @abc.abstractmethod
     def run_controller(self)-> dict[int, float]:
         raise NotImplementedError("Subclasses must implement this method")
-
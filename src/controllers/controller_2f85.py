@@ -34,31 +34,49 @@ class Controller2F85(AbstractController):
         self.abs_ctrlrange = [range[1] - range[0] for range in self.actuator_range]
         self.offset_rate_clip_adjust_rate = 0
         self.controller_type = controller_type
-        self.ctrl = None
+        # 预分配的输出缓冲区, 避免每步构造dict
+        self._abs_ctrlrange = np.asarray(self.abs_ctrlrange, dtype=np.float32)
+        self._range_low = np.asarray([range[0] for range in self.actuator_range], dtype=np.float32)
+        self._range_high = np.asarray([range[1] for range in self.actuator_range], dtype=np.float32)
+        self._ctrl_values = np.zeros(len(self.ctrl_name), dtype=np.float32)
+        self._has_data_ctrl = False
+
+    def _compute_pico_ctrl(self) -> np.ndarray:
+        offset_rate_clip_adjust_rate = 0.5
+        if self.secondary_button:
+            self.offset_rate_clip_adjust_rate -= offset_rate_clip_adjust_rate * self.env.dt
+            self.offset_rate_clip_adjust_rate = np.clip(self.offset_rate_clip_adjust_rate, -1, 0)
+        elif self.primary_button:
+            self.offset_rate_clip_adjust_rate = 0
+
+        k = np.e
+        adjusted_value = (np.exp(k * self.trigger_value) - 1) / (np.exp(k) - 1)  # Maps input from [0, 1] to [0, 1]
+        offset_rate = -adjusted_value
+        offset_rate = np.clip(offset_rate, -1, self.offset_rate_clip_adjust_rate)
+
+        np.multiply(self._abs_ctrlrange, -offset_rate, out=self._ctrl_values)
+        np.clip(self._ctrl_values, self._range_low, self._range_high, out=self._ctrl_values)
+        return self._ctrl_values
+
     @override
     def run_controller(self)-> dict[int, float]:
         if self.controller_type == self.ControllerType.PICO:
-            offset_rate_clip_adjust_rate = 0.5
-            if self.secondary_button:
-                self.offset_rate_clip_adjust_rate -= offset_rate_clip_adjust_rate * self.env.dt
-                self.offset_rate_clip_adjust_rate = np.clip(self.offset_rate_clip_adjust_rate, -1, 0)
-            elif self.primary_button:
-                self.offset_rate_clip_adjust_rate = 0
-
-            k = np.e
-            adjusted_value = (np.exp(k * self.trigger_value) - 1) / (np.exp(k) - 1)  # Maps input from [0, 1] to [0, 1]
-            offset_rate = -adjusted_value
-            offset_rate = np.clip(offset_rate, -1, self.offset_rate_clip_adjust_rate)
-
-            ctrl = {self.ctrl_index[i]: -offset_rate * self.abs_ctrlrange[i] for i in range(len(self.ctrl_index))}
-            for i in range(len(self.ctrl_index)):
-                ctrl[self.ctrl_index[i]] = np.clip(ctrl[self.ctrl_index[i]], self.actuator_range[i][0], self.actuator_range[i][1])
+            values = self._compute_pico_ctrl()
+            ctrl = {self.ctrl_index[i]: values[i] for i in range(len(self.ctrl_index))}
         
         elif self.controller_type == self.ControllerType.DATA:
-            ctrl = self.ctrl
+            ctrl = ({self.ctrl_index[i]: self._ctrl_values[i] for i in range(len(self.ctrl_index))}
+                    if self._has_data_ctrl else None)
         
         return ctrl
 
+    @override
+    def write_ctrl(self, ctrl: np.ndarray):
+        if self.controller_type == self.ControllerType.PICO:
+            ctrl[self.ctrl_slot] = self._compute_pico_ctrl()
+        elif self.controller_type == self.ControllerType.DATA and self._has_data_ctrl:
+            ctrl[self.ctrl_slot] = self._ctrl_values
+
     def update_trigger_value(self, trigger_value: float):
         self.trigger_value = trigger_value
 
@@ -69,4 +87,5 @@ class Controller2F85(AbstractController):
         self.secondary_button = secondary_button
 
     def update_ctrl(self, ctrl: np.array):
-        self.ctrl = {self.ctrl_index[i]: ctrl[i] for i in range(len(self.ctrl_index))}
\ No newline at end of file
+        self._ctrl_values[:] = ctrl
+        self._has_data_ctrl = True
@@ -3,9 +3,10 @@ from orca_gym.environment import OrcaGymLocalEnv
 from orca_gym.adapters.robosuite.controllers.base_controller import Controller
 
 from controllers.abstract_controller import AbstractController
+from controllers.rotation_util import quat_conjugate, quat_mul, quat_to_rotvec, xyzw_to_wxyz
+from envs.dataCollection.kinematics_cache import get_kinematics_cache
 import numpy as np
 from orca_gym.log.orca_log import OrcaLog
-from scipy.spatial.transform import Rotation as R
 orca_logger = OrcaLog.get_instance()
 
 class ControllerArm(AbstractController):
@@ -25,34 +26,45 @@ class ControllerArm(AbstractController):
         self.controller = controller
 
         super().__init__(env, ctrl_name, init_ctrl, base_body)
+        self.kinematics = get_kinematics_cache(env)
         self.ee_name = controller.eef_name
-        ee_pos_quat_B = self.env.query_site_pos_and_quat_B([self.ee_name], [self.base_link])
-        self.initial_ee_pos_B, self.initial_ee_quat_B = ee_pos_quat_B[self.ee_name]["xpos"], ee_pos_quat_B[self.ee_name]["xquat"]
-        ee_pos_quat = self.env.query_site_pos_and_quat([self.ee_name])[self.ee_name]
-        self.initial_ee_pos, self.initial_ee_quat = ee_pos_quat["xpos"], ee_pos_quat["xquat"]
+        # 末端和基座位姿都从共享的位姿缓存读取, B系下的位姿由世界系位姿换算, 不再单独查询
+        ee_pos, ee_quat = self.kinematics.site_pose(self.ee_name)
+        base_body_xpos, base_body_xmat, base_body_xquat = self.kinematics.body_pose(self.base_link)
+        self.initial_ee_pos, self.initial_ee_quat = ee_pos.copy(), ee_quat.copy()
+        self.initial_ee_pos_B = base_body_xmat.T @ (ee_pos - base_body_xpos)
+        self.initial_ee_quat_B = quat_mul(quat_conjugate(base_body_xquat), ee_quat)
         
         self.action = np.zeros(6, dtype=np.float32)
         self.action[0:3] = self.initial_ee_pos
-        self.action[3:6] = R.from_quat(self.initial_ee_quat[[1, 2, 3, 0]]).as_rotvec()
+        quat_to_rotvec(self.initial_ee_quat, out=self.action[3:6])
+        # 四元数运算的临时缓冲
+        self._quat = np.zeros(4, dtype=np.float64)
+        self._goal_quat = np.zeros(4, dtype=np.float64)
         
     @override
     def run_controller(self)-> dict[int, float]:
         self.controller.set_goal(self.action)
         ctrl = self.controller.run_controller() 
         return {self.ctrl_index[i]: ctrl[i] for i in range(len(self.ctrl_index))}
+
+    @override
+    def write_ctrl(self, ctrl: np.ndarray):
+        self.controller.set_goal(self.action)
+        ctrl[self.ctrl_slot] = self.controller.run_controller()
     
     def update_goal(self, relative_position: np.array, relative_quat: np.array):
-        base_body_xpos, _, base_body_xquat = self.env.get_body_xpos_xmat_xquat([self.base_link])
-        base_body_rot = R.from_quat(base_body_xquat[[1, 2, 3, 0]])
+        '''
+        @description: 遥操作目标, 相对初始末端位姿的位置和四元数(w, x, y, z), 都在B系下
+        '''
+        base_body_xpos, base_body_xmat, base_body_xquat = self.kinematics.body_pose(self.base_link)
 
-        goal_rot_B = R.from_quat(self.initial_ee_quat_B[[1, 2, 3, 0]]) * R.from_quat(relative_quat[[1, 2, 3, 0]])
+        goal_quat_B = quat_mul(self.initial_ee_quat_B, relative_quat, out=self._quat)
+        goal_quat = quat_mul(base_body_xquat, goal_quat_B, out=self._goal_quat)
         goal_pos_B = self.initial_ee_pos_B + relative_position
 
-        goal_rot = base_body_rot * goal_rot_B
-        goal_axisangle = goal_rot.as_rotvec()
-        goal_pos = base_body_rot.apply(goal_pos_B) + base_body_xpos
-        
-        self.action = np.concatenate([goal_pos, goal_axisangle])
+        self.action[:3] = base_body_xmat @ goal_pos_B + base_body_xpos
+        quat_to_rotvec(goal_quat, out=self.action[3:6])
 
     def update_action_position(self, position: np.array):
         '''
@@ -60,10 +72,8 @@ class ControllerArm(AbstractController):
         @param:
             position: 位置
         '''
-        base_body_xpos, _, base_body_xquat = self.env.get_body_xpos_xmat_xquat([self.base_link])
-        base_body_rot = R.from_quat(base_body_xquat[[1, 2, 3, 0]])
-        position = base_body_rot.apply(position) + base_body_xpos
-        self.action[:3] = position
+        base_body_xpos, base_body_xmat, _ = self.kinematics.body_pose(self.base_link)
+        self.action[:3] = base_body_xmat @ position + base_body_xpos
 
     def update_action_axisangle(self, quat: np.array):
         '''
@@ -71,15 +81,12 @@ class ControllerArm(AbstractController):
         @param:
             quat: 四元数
         '''
-        _, _, base_body_xquat = self.env.get_body_xpos_xmat_xquat([self.base_link])
-        base_body_rot = R.from_quat(base_body_xquat[[1, 2, 3, 0]])
-        ee_rot = base_body_rot * R.from_quat(quat)
-        axisangle = ee_rot.as_rotvec()
-        self.action[3:6] = axisangle
+        _, _, base_body_xquat = self.kinematics.body_pose(self.base_link)
+        ee_quat = quat_mul(base_body_xquat, xyzw_to_wxyz(quat, out=self._quat), out=self._goal_quat)
+        quat_to_rotvec(ee_quat, out=self.action[3:6])
         
     @override
     def init_ctrl_index(self):
         joint_names = self.controller.joint_index
         self.controller.qpos_index, self.controller.qvel_index, _ = self.env.query_joint_offsets(joint_names)
-        self.ctrl_index = [self.env.model.actuator_name2id(name) for name in self.ctrl_name]
-        return self.ctrl_index
\ No newline at end of file
+        return super().init_ctrl_index()
\ No newline at end of file
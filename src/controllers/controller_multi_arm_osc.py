@@ -0,0 +1,173 @@
+from typing import override
+import mujoco
+import numpy as np
+from orca_gym.adapters.robosuite.controllers import controller_config
+from orca_gym.environment import OrcaGymLocalEnv
+from orca_gym.log.orca_log import OrcaLog
+
+from controllers.abstract_controller import AbstractController
+from controllers.controller_arm import ControllerArm
+from scene.physics_state import get_mj_model_data
+
+orca_logger = OrcaLog.get_instance()
+
+
+class OSCArm:
+    '''
+    @description: 批量OSC中的一条机械臂, 属性与robosuite控制器一致, 供ControllerArm读取末端名称和关节索引,
+                  目标由MultiArmOSCController统一求解, 自身不计算力矩
+    '''
+    def __init__(self, eef_name: str, joint_names: list[str], actuator_range: np.ndarray, initial_joint: list[float]):
+        self.eef_name = eef_name
+        self.joint_index = joint_names
+        self.qpos_index = None
+        self.qvel_index = None
+        self.actuator_range = np.asarray(actuator_range, dtype=np.float64)
+        self.initial_joint = np.asarray(initial_joint, dtype=np.float64)
+
+    def update_initial_joints(self, initial_joints: list[float]):
+        self.initial_joint = np.asarray(initial_joints, dtype=np.float64)
+
+
+class MultiArmOSCController(AbstractController):
+    '''
+    @description: 多臂操作空间控制器, 每步只计算一次质量矩阵和所有末端的雅可比,
+                  所有机械臂的操作空间惯量和零空间投影在一次批量线性代数调用中求解;
+                  增益和位置/姿态解耦方式读取osc_pose配置, 与单臂的robosuite OSC控制器一致
+    '''
+    def __init__(self, env: OrcaGymLocalEnv,
+                 arms: list[ControllerArm],
+                 base_body: str,
+                 osc_config: dict = None):
+        '''
+        @param:
+            env: 环境
+            arms: 每条机械臂的ControllerArm, 控制器为OSCArm, 负责接收目标, 不单独加入DataCollectionManager
+            base_body: 基座体
+            osc_config: robosuite OSC配置, 默认读取osc_pose, 使用kp、damping_ratio、kp_null和uncouple_pos_ori
+        '''
+        dofs = {len(arm.controller.joint_index) for arm in arms}
+        if len(dofs) != 1:
+            orca_logger.error(f"All arms must have the same number of joints, got {dofs}")
+            raise ValueError("All arms must have the same number of joints")
+        if osc_config is None:
+            osc_config = controller_config.load_config("osc_pose")
+        if osc_config.get("impedance_mode", "fixed") != "fixed":
+            orca_logger.error(f"Batched OSC only supports fixed impedance, got {osc_config['impedance_mode']}")
+            raise ValueError("Batched OSC only supports fixed impedance")
+        self.arms = arms
+        # kp可以是标量或者6维(位置3维, 姿态3维), 与robosuite的nums2array一致
+        self.kp = np.broadcast_to(np.asarray(osc_config["kp"], dtype=np.float64), (6,)).copy()
+        self.kd = 2 * np.sqrt(self.kp) * osc_config["damping_ratio"]
+        # robosuite的零空间刚度默认为10
+        self.kp_null = osc_config.get("kp_null", 10.0)
+        self.kd_null = 2 * np.sqrt(self.kp_null)
+        self.uncouple_pos_ori = osc_config.get("uncouple_pos_ori", True)
+        self._model: mujoco.MjModel = None
+
+        ctrl_name = [name for arm in arms for name in arm.ctrl_name]
+        init_ctrl = {name: value for arm in arms for name, value in arm.init_ctrl.items()}
+        super().__init__(env, ctrl_name, init_ctrl, base_body)
+
+        arm_nums, joint_nums = len(arms), dofs.pop()
+        self._goals = np.zeros((arm_nums, 6), dtype=np.float64)
+        self._initial_joints = np.array([arm.controller.initial_joint for arm in arms], dtype=np.float64).reshape(arm_nums, joint_nums)
+        self._ranges = np.array([arm.controller.actuator_range for arm in arms], dtype=np.float64).reshape(arm_nums, 2, joint_nums)
+
+    @override
+    def init_ctrl_index(self) -> list[int]:
+        for arm in self.arms:
+            arm.init_ctrl_index()
+        # 模型可能已经重新加载, 下次求解时重新解析索引
+        self._model = None
+        return super().init_ctrl_index()
+
+    def _resolve_model_index(self, model: mujoco.MjModel):
+        arm_nums = len(self.arms)
+        self._site_ids = np.array([mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_SITE, arm.ee_name) for arm in self.arms])
+        self._qpos_index = np.array([arm.controller.qpos_index for arm in self.arms], dtype=np.int64).reshape(arm_nums, -1)
+        self._dof_index = np.array([arm.controller.qvel_index for arm in self.arms], dtype=np.int64).reshape(arm_nums, -1)
+        self._full_mass = np.zeros((model.nv, model.nv), dtype=np.float64)
+        self._jac = np.zeros((arm_nums, 6, model.nv), dtype=np.float64)
+        self._model = model
+
+    def solve(self) -> np.ndarray:
+        '''
+        @description: 按当前目标求解所有机械臂的关节力矩
+        @return:
+            (A, n) 每条机械臂的关节力矩, 已按执行器范围裁剪
+        '''
+        model, data = get_mj_model_data(self.env)
+        if self._model is not model:
+            self._resolve_model_index(model)
+        for i, arm in enumerate(self.arms):
+            self._goals[i] = arm.action
+
+        # 质量矩阵和雅可比每步只算一次
+        mujoco.mj_fullM(model, self._full_mass, data.qM)
+        for i, site_id in enumerate(self._site_ids):
+            mujoco.mj_jacSite(model, data, self._jac[i, :3], self._jac[i, 3:], site_id)
+
+        dof = self._dof_index
+        mass = self._full_mass[dof[:, :, None], dof[:, None, :]]
+        jac = np.take_along_axis(self._jac, np.broadcast_to(dof[:, None, :], (len(dof), 6, dof.shape[1])), axis=2)
+        jac_t = jac.transpose(0, 2, 1)
+        qpos, qvel = data.qpos[self._qpos_index], data.qvel[dof]
+
+        # 所有机械臂一起求解操作空间惯量和动力学一致的伪逆
+        mass_inv = np.linalg.inv(mass)
+        lambda_full = np.linalg.pinv(jac @ mass_inv @ jac_t)
+        jac_bar = mass_inv @ jac_t @ lambda_full
+
+        ee_pos = data.site_xpos[self._site_ids]
+        ee_mat = data.site_xmat[self._site_ids].reshape(-1, 3, 3)
+        ee_vel = (jac @ qvel[..., None])[..., 0]
+        goal_mat = rotvec_to_mat(self._goals[:, 3:])
+        position_error = self._goals[:, :3] - ee_pos
+        orientation_error = 0.5 * np.sum(np.cross(ee_mat, goal_mat, axis=1), axis=2)
+        desired = np.concatenate([position_error, orientation_error], axis=1) * self.kp - ee_vel * self.kd
+
+        if self.uncouple_pos_ori:
+            # 与robosuite一致, 位置和姿态分别使用各自的操作空间惯量
+            jac_pos, jac_ori = jac[:, :3], jac[:, 3:]
+            lambda_pos = np.linalg.pinv(jac_pos @ mass_inv @ jac_pos.transpose(0, 2, 1))
+            lambda_ori = np.linalg.pinv(jac_ori @ mass_inv @ jac_ori.transpose(0, 2, 1))
+            wrench = np.concatenate([(lambda_pos @ desired[:, :3, None])[..., 0],
+                                     (lambda_ori @ desired[:, 3:, None])[..., 0]], axis=1)
+        else:
+            wrench = (lambda_full @ desired[..., None])[..., 0]
+        torques = (jac_t @ wrench[..., None])[..., 0] + data.qfrc_bias[dof]
+        pose_torques = (mass @ (self.kp_null * (self._initial_joints - qpos) - self.kd_null * qvel)[..., None])[..., 0]
+        nullspace = np.eye(dof.shape[1]) - jac_bar @ jac
+        torques += (nullspace.transpose(0, 2, 1) @ pose_torques[..., None])[..., 0]
+        return np.clip(torques, self._ranges[:, 0], self._ranges[:, 1])
+
+    @override
+    def write_ctrl(self, ctrl: np.ndarray):
+        torques = self.solve()
+        for arm, arm_torques in zip(self.arms, torques):
+            ctrl[arm.ctrl_slot] = arm_torques
+
+    @override
+    def run_controller(self) -> dict[int, float]:
+        torques = self.solve()
+        return {arm.ctrl_index[i]: arm_torques[i] for arm, arm_torques in zip(self.arms, torques) for i in range(len(arm.ctrl_index))}
+
+
+def rotvec_to_mat(rotvec: np.ndarray) -> np.ndarray:
+    '''
+    @description: 批量旋转向量转旋转矩阵(Rodrigues公式)
+    @param:
+        rotvec: (N, 3)
+    @return:
+        (N, 3, 3)
+    '''
+    angle = np.linalg.norm(rotvec, axis=1)
+    safe_angle = np.where(angle > 1e-8, angle, 1.0)
+    axis = rotvec / safe_angle[:, None]
+    skew = np.zeros((len(rotvec), 3, 3), dtype=np.float64)
+    skew[:, 0, 1], skew[:, 0, 2] = -axis[:, 2], axis[:, 1]
+    skew[:, 1, 0], skew[:, 1, 2] = axis[:, 2], -axis[:, 0]
+    skew[:, 2, 0], skew[:, 2, 1] = -axis[:, 1], axis[:, 0]
+    sin, cos = np.sin(angle)[:, None, None], np.cos(angle)[:, None, None]
+    return np.eye(3) + sin * skew + (1 - cos) * (skew @ skew)
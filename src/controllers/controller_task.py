@@ -7,7 +7,7 @@
 # @CopyRight: 松应科技
 
 import time
-from typing import override
+from typing import Callable, override
 from controllers.abstract_controller import AbstractController
 from orca_gym.environment import OrcaGymLocalEnv
 from orca_gym.log import OrcaLog
@@ -23,11 +23,17 @@ class TaskStatus(enum.Enum):
 class TaskStatusController(AbstractController):
     def __init__(self, env: OrcaGymLocalEnv,
                  base_body: str,
-                 is_controller: bool = True
+                 is_controller: bool = True,
+                 clock: Callable[[], float] = time.time
                  ):
+        '''
+        @param:
+            clock: 按键防抖使用的时钟, 回放输入日志时使用日志中的时间
+        '''
         super().__init__(env, [], {}, base_body)
         self.current_status = TaskStatus.NOT_STARTED
-        self.current_time = time.time()
+        self.clock = clock
+        self.current_time = clock()
         self.is_controller = is_controller
 
     @override
@@ -37,7 +43,7 @@ class TaskStatusController(AbstractController):
     def update_task_status(self, next_status: bool):
         # pico控制器需要控制一下频率，否则任务状态会很快变化
         if self.is_controller:
-            current_time = time.time()
+            current_time = self.clock()
             if current_time - self.current_time < 0.2:
                 return
             self.current_time = current_time
@@ -1,5 +1,6 @@
 from functools import partial
 from controllers.controller_arm import ControllerArm
+from controllers.controller_multi_arm_osc import MultiArmOSCController, OSCArm
 from controllers.controller_task import TaskStatusController
 from dataCollectionManager.data_collection_manager import DataCollectionManager
 from orca_gym.devices.pico_joytsick import PicoJoystick, PicoJoystickKey
@@ -40,6 +41,20 @@ def create_arm_osc_controller(env: OrcaGymLocalEnv,
     controller.update_initial_joints(arm_config["neutral_joint_values"])
     return ControllerArm(env, ctrl_name, init_ctrl, base_body, controller)
 
+def create_osc_arm(env: OrcaGymLocalEnv,
+                   arm_config: dict,
+                   base_body: str,
+                   ctrl_name: list[str],
+                   init_ctrl: dict[str, float]):
+    '''
+    @description: 创建交给MultiArmOSCController统一求解的机械臂
+    '''
+    arm_joint_names = [env.joint(joint_name) for joint_name in arm_config["joint_names"]]
+    motors_ranges = [[range[0] for range in arm_config["motors_ranges"]], 
+                    [range[1] for range in arm_config["motors_ranges"]]]
+    osc_arm = OSCArm(env.site(arm_config["ee_site_name"]), arm_joint_names, motors_ranges, arm_config["neutral_joint_values"])
+    return ControllerArm(env, ctrl_name, init_ctrl, base_body, osc_arm)
+
 def add_arm_osc_pico_controller(data_collection_manager: DataCollectionManager, 
                 env: OrcaGymLocalEnv, 
                 arm_config: dict, 
@@ -70,6 +85,43 @@ def add_arm_osc_openloong_data_controller(data_collection_manager: DataCollectio
         device.bind_dataset_event("/action/end/orientation", (4, 8), arm_osc_controller.update_action_axisangle)
     data_collection_manager.add_controller(arm_osc_controller)
 
+def add_dual_arm_osc_pico_controller(data_collection_manager: DataCollectionManager,
+                                     env: OrcaGymLocalEnv,
+                                     arm_configs: list[dict],
+                                     base_body: str,
+                                     device: PicoJoystickDevice,
+                                     keys: list[PicoJoystickKey]):
+    '''
+    @description: 多条机械臂共用一个批量OSC控制器, keys与arm_configs一一对应
+    '''
+    arms = []
+    for arm_config, key in zip(arm_configs, keys):
+        ctrl_name = [env.actuator(motor_name) for motor_name in arm_config["motors_names"]]
+        init_ctrl = {name: init_val for name, init_val in zip(ctrl_name, arm_config["motors_init_ctrl"])}
+        arm = create_osc_arm(env, arm_config, base_body, ctrl_name, init_ctrl)
+        device.bind_transform_event(key, arm.update_goal)
+        arms.append(arm)
+    data_collection_manager.add_controller(MultiArmOSCController(env, arms, base_body))
+
+def add_dual_arm_osc_openloong_data_controller(data_collection_manager: DataCollectionManager,
+                                               env: OrcaGymLocalEnv,
+                                               arm_configs: list[dict],
+                                               base_body: str,
+                                               device: DataDevice):
+    '''
+    @description: 左右臂共用一个批量OSC控制器, arm_configs为[左臂, 右臂]
+    '''
+    dataset_ranges = [((0, 3), (0, 4)), ((3, 6), (4, 8))]
+    arms = []
+    for arm_config, (position_range, orientation_range) in zip(arm_configs, dataset_ranges):
+        ctrl_name = [env.actuator(motor_name) for motor_name in arm_config["motors_names"]]
+        init_ctrl = {name: init_val for name, init_val in zip(ctrl_name, arm_config["motors_init_ctrl"])}
+        arm = create_osc_arm(env, arm_config, base_body, ctrl_name, init_ctrl)
+        device.bind_dataset_event("/action/end/position", position_range, arm.update_action_position)
+        device.bind_dataset_event("/action/end/orientation", orientation_range, arm.update_action_axisangle)
+        arms.append(arm)
+    data_collection_manager.add_controller(MultiArmOSCController(env, arms, base_body))
+
 def create_gripper_2f85_controller(env: OrcaGymLocalEnv,
                                   gripper_config: dict,
                                   base_body: str,
@@ -119,10 +171,18 @@ def add_task_status_pico_controller(data_collection_manager: DataCollectionManag
                               env: OrcaGymLocalEnv,
                               device: PicoJoystickDevice,
                               base_body: str):
-    task_status_controller = TaskStatusController(env, base_body)
+    task_status_controller = TaskStatusController(env, base_body, clock=device.clock)
     device.bind_grip_button_event(PicoJoystickKey.L_GRIPBUTTON, task_status_controller.update_task_status)
     data_collection_manager.set_task_status_controller(task_status_controller)
 
+def add_rewind_pico_controller(data_collection_manager: DataCollectionManager,
+                               device: PicoJoystickDevice,
+                               key: PicoJoystickKey = PicoJoystickKey.R_GRIPBUTTON,
+                               interval: int = 50,
+                               capacity: int = 20):
+    data_collection_manager.enable_rewind(interval, capacity)
+    device.bind_grip_button_event(key, data_collection_manager.request_rewind)
+
 def add_task_status_openloong_data_controller(data_collection_manager: DataCollectionManager,
                                         env: OrcaGymLocalEnv,
                                         device: DataDevice,
@@ -0,0 +1,57 @@
+import math
+import numpy as np
+
+# 四元数均为(w, x, y, z), 与MuJoCo一致; 单个四元数用标量运算, 避免创建scipy Rotation对象
+
+
+def quat_mul(q1: np.ndarray, q2: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    '''
+    @description: 四元数乘法 q1 * q2, 先做q2旋转再做q1旋转
+    '''
+    w1, x1, y1, z1 = float(q1[0]), float(q1[1]), float(q1[2]), float(q1[3])
+    w2, x2, y2, z2 = float(q2[0]), float(q2[1]), float(q2[2]), float(q2[3])
+    if out is None:
+        out = np.empty(4, dtype=np.float64)
+    out[0] = w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2
+    out[1] = w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2
+    out[2] = w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2
+    out[3] = w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2
+    return out
+
+
+def quat_conjugate(quat: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    '''
+    @description: 共轭四元数, 单位四元数的共轭即逆旋转
+    '''
+    if out is None:
+        out = np.empty(4, dtype=np.float64)
+    out[0] = quat[0]
+    out[1:4] = -np.asarray(quat[1:4])
+    return out
+
+
+def quat_to_rotvec(quat: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    '''
+    @description: 四元数转旋转向量, 旋转角在[0, pi], 与Rotation.as_rotvec一致
+    '''
+    w, x, y, z = float(quat[0]), float(quat[1]), float(quat[2]), float(quat[3])
+    if w < 0:
+        w, x, y, z = -w, -x, -y, -z
+    sin_half = math.sqrt(x * x + y * y + z * z)
+    angle = 2.0 * math.atan2(sin_half, w)
+    # 小角度时 angle / sin(angle / 2) 趋近于 2 / w
+    scale = angle / sin_half if sin_half > 1e-8 else 2.0 / w
+    if out is None:
+        out = np.empty(3, dtype=np.float64)
+    out[0] = x * scale
+    out[1] = y * scale
+    out[2] = z * scale
+    return out
+
+
+def xyzw_to_wxyz(quat: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    if out is None:
+        out = np.empty(4, dtype=np.float64)
+    out[0] = quat[3]
+    out[1:4] = quat[0:3]
+    return out
@@ -1,5 +1,6 @@
 import enum
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 import numpy as np
 import gymnasium as gym
 from typing import Callable
@@ -11,6 +12,8 @@ from controllers.controller_task import TaskStatus, TaskStatusController
 from devices.abstract_device import AbstractDevice
 from scene.scene_manager import SceneManager
 from dataStorage.abstract_data_storage import AbstractDataStorage
+from dataCollectionManager.stage_timer import StageTimer
+from dataCollectionManager.rewind_buffer import RewindBuffer
 orca_logger = OrcaLog.get_instance()
 
 class DataCollectionManager:
@@ -34,7 +37,14 @@ class DataCollectionManager:
                 task_status_controller: TaskStatusController = None,
                 scene_manager: SceneManager = None,
                 data_storage: AbstractDataStorage = None,
+                local_model_xml: str = None,
                 **kwargs):
+        '''
+        @param:
+            local_model_xml: 可选, 使用LocalDataCollectionEnv时本地MJCF的路径(与LocalMJCFScene的model_xml_path一致),
+                             此时entry_point应为LocalDataCollectionEnv, 不连接orcagym_addr
+        '''
+        self.local_model_xml = local_model_xml
         self.device = device
         self.time_step = time_step
         self.frame_skip = frame_skip
@@ -51,6 +61,14 @@ class DataCollectionManager:
         self._save_video = False
         self._saving = False
         self._mode = self.DataCollectionMode.TELECONTROL
+        self._overlap_turnaround = True
+        self._render = True
+        self._realtime_pacing = True
+        self._episode_end_callbacks: list[Callable[[dict], None]] = []
+        self.stage_timer = StageTimer()
+        self.rewind_buffer: RewindBuffer = None
+        self._rewind_pressed = False
+        self._rewind_requested = False
 
     @property
     def save_video(self) -> bool:
@@ -68,6 +86,30 @@ class DataCollectionManager:
     def saving(self, value: bool):
         self._saving = value
 
+    @property
+    def overlap_turnaround(self) -> bool:
+        return self._overlap_turnaround
+    
+    @overlap_turnaround.setter
+    def overlap_turnaround(self, value: bool):
+        self._overlap_turnaround = value
+
+    @property
+    def render(self) -> bool:
+        return self._render
+    
+    @render.setter
+    def render(self, value: bool):
+        self._render = value
+
+    @property
+    def realtime_pacing(self) -> bool:
+        return self._realtime_pacing
+    
+    @realtime_pacing.setter
+    def realtime_pacing(self, value: bool):
+        self._realtime_pacing = value
+
     @property
     def mode(self) -> DataCollectionMode:
         return self._mode
@@ -97,6 +139,8 @@ class DataCollectionManager:
                     'time_step': time_step,
                     'default_joint_values': default_joint_values,
                     'obs_callback': obs_callback}     
+        if self.local_model_xml is not None:
+            kwargs['model_xml_path'] = self.local_model_xml
         orca_logger.info(f"Creating env {env_name} with kwargs {kwargs}")
 
         gym.register(
@@ -133,6 +177,33 @@ class DataCollectionManager:
     def set_data_storage(self, data_storage: AbstractDataStorage):
         self.data_storage = data_storage
 
+    def enable_rewind(self, interval: int = 50, capacity: int = 20):
+        '''
+        @description: 任务RUNNING期间按间隔保存物理状态检查点, 之后可以通过request_rewind回退
+        @param:
+            interval: 每隔多少个RUNNING步保存一个检查点
+            capacity: 最多保留的检查点数量
+        '''
+        self.rewind_buffer = RewindBuffer(interval, capacity)
+
+    def request_rewind(self, pressed: bool):
+        '''
+        @description: 按键回调, 按下时请求回退到上一个检查点, 在下一个控制步执行
+        @param:
+            pressed: 按键是否按下, 只在按下的瞬间触发一次
+        '''
+        if pressed and not self._rewind_pressed:
+            self._rewind_requested = True
+        self._rewind_pressed = pressed
+
+    def add_episode_end_callback(self, callback: Callable[[dict], None]):
+        '''
+        @description: 注册回合结束回调, 在该回合数据写盘完成后调用
+        @param:
+            callback: 参数为回合记录 {"success": bool, "source": 源数据路径(仅AUGMENTATION模式)}
+        '''
+        self._episode_end_callbacks.append(callback)
+
     def add_controller(self, controller: AbstractController):
         self.controllers.append(controller)
 
@@ -140,68 +211,160 @@ class DataCollectionManager:
         if self.device is not None:
             self.device.update()
         for controller in self.controllers:
-            ctrl = controller.run_controller()
-            for index, value in ctrl.items():
-                self.ctrl[index] = value
+            controller.write_ctrl(self.ctrl)
         return self.ctrl
     
     def set_init_ctrl(self):
         for controller in self.controllers:
             controller.init_ctrl_index()
-            init_ctrl = controller.get_init_ctrl()
-            for index, value in init_ctrl.items():
-                self.ctrl[index] = value
+            controller.write_init_ctrl(self.ctrl)
         return self.ctrl
 
     def run(self):
         self.env.disable_actuator(self.disable_actuator_group)
+        executor = ThreadPoolExecutor(max_workers=2) if self.overlap_turnaround else None
+        pending_commit: Future = None
 
         try:
             while True:
-                self.env.reset()  # self.env.mj_forward()
-                update_scene_ret = self.update_scene()
+                # 回合切换流水线: 上一回合的数据提交、下一份源数据加载与场景重置并行执行
+                turnaround_start = time.perf_counter()
+                source_load = self._submit_stage(executor, "load_source", self._load_source) \
+                    if self.mode == self.DataCollectionMode.AUGMENTATION else None
+
+                with self.stage_timer.stage("env_reset"):
+                    self.reset_env()
+                update_scene_ret = self.update_scene(source_load=source_load)
+
+                if pending_commit is not None:
+                    with self.stage_timer.stage("wait_commit"):
+                        pending_commit.result()
+                    pending_commit = None
+                self.stage_timer.record("turnaround", time.perf_counter() - turnaround_start)
+                orca_logger.info(f"Episode turnaround: {self.stage_timer.last('turnaround') * 1000:.1f}ms")
+
                 if not update_scene_ret:
                     orca_logger.info("Can't update scene, End")
                     break
+                if self.device is not None and self.device.is_finished():
+                    orca_logger.info("Device input finished, End")
+                    break
                 task_is_success = self.run_episode()
-                if self.data_storage is not None:
-                    if task_is_success:
-                        orca_logger.info("Task Success!")
-                        task_info = self.task.get_task_info()
-                        scene_info = self.scene_manager.get_scene_info()
-                        self.data_storage.save_data(task_info=task_info, scene_info=scene_info, task_description=self.task.get_task_description())
-                    else:
-                        self.data_storage.clear_data()
-                        orca_logger.info("Task Failed!")
+                pending_commit = self._commit_episode(executor, task_is_success)
         
         except KeyboardInterrupt:
             orca_logger.info("KeyboardInterrupt, End")
         finally:
+            if pending_commit is not None:
+                pending_commit.result()
+            if executor is not None:
+                executor.shutdown(wait=True)
+            orca_logger.info(f"Stage timing: {self.stage_timer.format_summary()}")
+            if hasattr(self.env, "get_reset_stats"):
+                orca_logger.info(f"Reset stats: {self.env.get_reset_stats()}")
             self.env.close()
 
-    def update_scene(self):
+    def reset_env(self):
+        '''
+        @description: 回合开始前重置环境, 环境支持时走快速路径, 不计算用不到的观测
+        '''
+        if hasattr(self.env, "fast_reset"):
+            self.env.fast_reset(with_obs=False)
+        else:
+            self.env.reset()
+
+    def _submit_stage(self, executor: ThreadPoolExecutor, name: str, fn: Callable, *args, **kwargs) -> Future:
+        '''
+        @description: 提交一个流水线阶段, 有线程池时后台执行, 否则同步执行, 统一返回Future
+        '''
+        def timed_stage():
+            with self.stage_timer.stage(name):
+                return fn(*args, **kwargs)
+
+        if executor is not None:
+            return executor.submit(timed_stage)
+        future = Future()
+        try:
+            future.set_result(timed_stage())
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _load_source(self) -> bool:
+        from devices.data_device import DataDevice
+        if type(self.device) != DataDevice:
+            raise ValueError("Device must be a DataDevice for augmentation mode")
+        return self.device.load_data()
+
+    def _commit_episode(self, executor: ThreadPoolExecutor, task_is_success: bool,
+                        task: AbstractTask = None, device: AbstractDevice = None, data_storage: AbstractDataStorage = None,
+                        scene_info: dict = None) -> Future:
+        '''
+        @description: 提交回合数据, task_info和scene_info在主线程中取出, 存储写盘在后台执行,
+                      写盘完成后再调用回合结束回调
+        @param:
+            task, device, data_storage: 可选, 多实例仿真时传入该实例自己的对象, 默认使用管理器的
+            scene_info: 可选, 多实例仿真时传入该实例放置场景后保存的场景信息
+        '''
+        task = task if task is not None else self.task
+        device = device if device is not None else self.device
+        data_storage = data_storage if data_storage is not None else self.data_storage
+        episode_record = {"success": bool(task_is_success)}
+        if self.mode == self.DataCollectionMode.AUGMENTATION and hasattr(device, "get_current_unit_path"):
+            episode_record["source"] = device.get_current_unit_path()
+
+        if data_storage is None:
+            commit, commit_kwargs, stage_name = None, {}, "commit"
+        elif task_is_success:
+            orca_logger.info("Task Success!")
+            commit = data_storage.save_data
+            commit_kwargs = {"task_info": task.get_task_info(),
+                             "scene_info": scene_info if scene_info is not None else self.scene_manager.get_scene_info(with_physics_state=True),
+                             "task_description": task.get_task_description()}
+            stage_name = "save_data"
+        else:
+            orca_logger.info("Task Failed!")
+            commit, commit_kwargs, stage_name = data_storage.clear_data, {}, "clear_data"
+
+        if commit is None and len(self._episode_end_callbacks) == 0:
+            return None
+
+        def commit_and_notify():
+            if commit is not None:
+                commit(**commit_kwargs)
+            for callback in self._episode_end_callbacks:
+                callback(episode_record)
+
+        return self._submit_stage(executor, stage_name, commit_and_notify)
+
+    def update_scene(self, source_load: Future = None):
         if self.scene_manager is not None:
-            self.scene_manager.spawn_scene()
+            with self.stage_timer.stage("spawn_scene"):
+                self.scene_manager.spawn_scene()
 
             if self.mode == self.DataCollectionMode.TELECONTROL:     
                 if self.task is not None:
-                    self.scene_manager.update_actor_qpos()
-                    self.task.get_task(self.scene_manager)
+                    with self.stage_timer.stage("update_actor_qpos"):
+                        self.scene_manager.update_actor_qpos(layout_filter=self.task.get_layout_filter(self.scene_manager))
+                    with self.stage_timer.stage("get_task"):
+                        self.task.get_task(self.scene_manager)
                     orca_logger.info(f"Task description: {self.task.get_task_description()}")
 
                 
             elif self.mode == self.DataCollectionMode.AUGMENTATION:
-                from devices.data_device import DataDevice
-                if type(self.device) != DataDevice:
-                    raise ValueError("Device must be a DataDevice for augmentation mode")
-                load_ret = self.device.load_data()
+                if source_load is None:
+                    source_load = self._submit_stage(None, "load_source", self._load_source)
+                with self.stage_timer.stage("wait_source"):
+                    load_ret = source_load.result()
                 if not load_ret:
                     orca_logger.info("Augmentation End")
                     return load_ret
                 task_info = self.device.get_task_info()
                 scene_info = self.device.get_scene_info()
-                self.scene_manager.update_actor_qpos(restore=True, scene_info=scene_info)
-                self.task.get_task(self.scene_manager, task_info=task_info)
+                with self.stage_timer.stage("update_actor_qpos"):
+                    self.scene_manager.update_actor_qpos(restore=True, scene_info=scene_info)
+                with self.stage_timer.stage("get_task"):
+                    self.task.get_task(self.scene_manager, task_info=task_info)
 
             self.env.disable_actuator(self.disable_actuator_group)
         return True
@@ -216,30 +379,71 @@ class DataCollectionManager:
 
         if self.task_status_controller is not None:
             self.task_status_controller.reset()
+        running_steps = 0
+        if self.rewind_buffer is not None:
+            self.rewind_buffer.clear()
+        self._rewind_requested = False
 
         while True:
             start_time = time.time()
+            if self.device is not None and self.device.is_finished():
+                if self.save_video and self.saving and self.data_storage is not None:
+                    self.data_storage.stop_save_video(self.env)
+                    self.saving = False
+                orca_logger.info("Device input finished, end episode")
+                return False
+            # 先回退再运行控制器, 控制量按回退后的状态计算
+            if self._rewind_requested:
+                self._rewind_requested = False
+                running_steps = self._rewind(running_steps)
             action = self.run_controllers()
             obs, reward, terminated, truncated, info = self.env.step(action)
-            self.env.render()
+            if self.render:
+                self.env.render()
 
             if self.task_status_controller is not None:
                 task_status = self.task_status_controller.run_controller()
+                task_is_failed = False
                 if task_status == TaskStatus.RUNNING:
                     if self.data_storage is not None:
                         self.data_storage.collection_data(obs, self.env)
                     if self.save_video and not self.saving and self.data_storage is not None:
                         self.data_storage.begin_save_video(self.env)
                         self.saving = True                   
-                if task_status == TaskStatus.END or terminated or truncated:
+                    running_steps += 1
+                    if self.rewind_buffer is not None:
+                        self.rewind_buffer.maybe_save(self.env, running_steps, self.data_storage)
+                    # 任务已处于不可恢复的失败状态时提前结束回合, 省去剩余轨迹的仿真时间
+                    if self.task is not None and self.task.should_check_failure(running_steps):
+                        task_is_failed = self.task.is_failed()
+                if task_status == TaskStatus.END or terminated or truncated or task_is_failed:
                     if self.save_video and self.saving and self.data_storage is not None:
                         self.data_storage.stop_save_video(self.env)
                         self.saving = False
+                    if task_is_failed:
+                        orca_logger.info(f"Task failed at step {running_steps}, end episode early")
+                        return False
                     orca_logger.info("Task end")
                     task_is_success = self.task.is_success()
                     return task_is_success
 
             elapsed_time = time.time() - start_time
-            if elapsed_time < self.real_time_step:
+            if self.realtime_pacing and elapsed_time < self.real_time_step:
                 time.sleep(self.real_time_step - elapsed_time)
 
+    def _rewind(self, running_steps: int) -> int:
+        '''
+        @description: 任务RUNNING时回退仿真状态和暂存数据到上一个检查点;
+            录制中的视频无法截断, 录制视频时不回退, 避免视频与本体数据不一致
+        @return:
+            回退后的RUNNING步数
+        '''
+        if self.rewind_buffer is None or self.task_status_controller is None:
+            return running_steps
+        if self.save_video and self.saving:
+            orca_logger.warning("Can't rewind while recording video, ignore the rewind request")
+            return running_steps
+        if self.task_status_controller.run_controller() != TaskStatus.RUNNING:
+            return running_steps
+        rewind_step = self.rewind_buffer.rewind(self.env, running_steps, self.data_storage)
+        return rewind_step if rewind_step is not None else running_steps
@@ -0,0 +1,91 @@
+from collections import deque
+import numpy as np
+from orca_gym.environment.orca_gym_local_env import OrcaGymLocalEnv
+from orca_gym.log.orca_log import OrcaLog
+from scene.physics_state import get_physics_state_vector, set_physics_state_vector
+from dataStorage.abstract_data_storage import AbstractDataStorage
+
+orca_logger = OrcaLog.get_instance()
+
+
+class RewindCheckpoint:
+    '''
+    @description: 一个回退检查点, 物理状态向量和当时已暂存的数据帧数
+    '''
+    __slots__ = ("step", "physics_state", "data_length")
+
+    def __init__(self, step: int, physics_state: np.ndarray, data_length: int):
+        self.step = step
+        self.physics_state = physics_state
+        self.data_length = data_length
+
+
+class RewindBuffer:
+    '''
+    @description: 任务RUNNING期间按固定步数保存物理状态检查点的环形缓冲区, 只保留最近的capacity个,
+                  回退时恢复仿真状态并截断暂存的数据, 不需要放弃整个回合
+    '''
+    def __init__(self, interval: int = 50, capacity: int = 20):
+        '''
+        @param:
+            interval: 每隔多少个RUNNING步保存一个检查点
+            capacity: 最多保留的检查点数量, 超出时丢弃最早的
+        '''
+        if interval <= 0 or capacity <= 0:
+            orca_logger.error(f"Rewind interval and capacity must be positive, got {interval}, {capacity}")
+            raise ValueError("Rewind interval and capacity must be positive")
+        self.interval = interval
+        self.capacity = capacity
+        self._checkpoints: deque[RewindCheckpoint] = deque(maxlen=capacity)
+        # 被挤出缓冲区的检查点的状态数组留作复用, 避免每次保存都分配
+        self._spare_states: list[np.ndarray] = []
+        self.rewind_nums = 0
+
+    def __len__(self) -> int:
+        return len(self._checkpoints)
+
+    def clear(self):
+        # 回合之间可能重新加载模型, 状态向量长度会变化, 复用的数组一并丢弃
+        self._checkpoints.clear()
+        self._spare_states.clear()
+
+    def maybe_save(self, env: OrcaGymLocalEnv, step: int, data_storage: AbstractDataStorage = None) -> bool:
+        '''
+        @description: 第step个RUNNING步结束后调用, 到达保存间隔时保存检查点
+        @param:
+            step: 已经执行的RUNNING步数, 与暂存的数据帧数一致
+        @return:
+            是否保存了检查点
+        '''
+        if step % self.interval != 0:
+            return False
+        if len(self._checkpoints) == self.capacity:
+            self._spare_states.append(self._checkpoints[0].physics_state)
+        out = self._spare_states.pop() if len(self._spare_states) > 0 else None
+        physics_state = get_physics_state_vector(env, out)
+        data_length = data_storage.get_data_length() if data_storage is not None else step
+        self._checkpoints.append(RewindCheckpoint(step, physics_state, data_length))
+        return True
+
+    def rewind(self, env: OrcaGymLocalEnv, step: int, data_storage: AbstractDataStorage = None) -> int | None:
+        '''
+        @description: 回退到早于当前步至少一个保存间隔的最近检查点, 更新的检查点被丢弃;
+                      刚回退后再次回退会继续回到更早的检查点
+        @param:
+            step: 当前的RUNNING步数
+        @return:
+            回退后的RUNNING步数, 没有可用的检查点时返回None
+        '''
+        while len(self._checkpoints) > 0 and self._checkpoints[-1].step > step - self.interval:
+            self._spare_states.append(self._checkpoints.pop().physics_state)
+        if len(self._checkpoints) == 0:
+            orca_logger.info("No rewind checkpoint available")
+            return None
+
+        checkpoint = self._checkpoints[-1]
+        set_physics_state_vector(env, checkpoint.physics_state)
+        if data_storage is not None:
+            data_storage.truncate_data(checkpoint.data_length)
+        self.rewind_nums += 1
+        orca_logger.info(f"Rewind from step {step} to step {checkpoint.step}")
+        return checkpoint.step
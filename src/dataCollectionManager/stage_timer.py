@@ -0,0 +1,48 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    '''
+    @description: 统计各阶段耗时(次数/总时间/最近一次), 线程安全, 后台线程中的阶段也可以记录
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[str, list[float]] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start_time)
+
+    def record(self, name: str, elapsed: float):
+        with self._lock:
+            stat = self._stats.setdefault(name, [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += elapsed
+            stat[2] = elapsed
+
+    def last(self, name: str) -> float:
+        with self._lock:
+            return self._stats[name][2] if name in self._stats else 0.0
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        '''
+        @return:
+            {stage_name: {"count": 次数, "total": 总耗时, "mean": 平均耗时, "last": 最近一次耗时}}
+        '''
+        with self._lock:
+            return {name: {"count": count, "total": total, "mean": total / count if count else 0.0, "last": last}
+                    for name, (count, total, last) in self._stats.items()}
+
+    def format_summary(self) -> str:
+        return ", ".join(f"{name}: mean {stat['mean'] * 1000:.1f}ms x{int(stat['count'])}"
+                         for name, stat in self.summary().items())
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
@@ -0,0 +1,188 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+from orca_gym.log.orca_log import OrcaLog
+from controllers.abstract_controller import AbstractController
+from controllers.controller_arm import ControllerArm
+from controllers.controller_multi_arm_osc import OSCArm
+from controllers.controller_task import TaskStatus, TaskStatusController
+from dataCollectionManager.data_collection_manager import DataCollectionManager
+from dataStorage.abstract_data_storage import AbstractDataStorage
+from devices.data_device import DataDevice
+from envs.dataCollection.vector_env import VectorDataCollectionEnv
+from task.abstract_task import AbstractTask
+
+orca_logger = OrcaLog.get_instance()
+
+
+class VectorInstance:
+    '''
+    @description: 多实例仿真中的一个实例, 持有自己的设备、控制器、任务和存储;
+                  提供与DataCollectionManager相同的add_controller/set_*接口, 可以直接传给controllers中的工厂函数
+    '''
+    def __init__(self, index: int, env, nu: int):
+        self.index = index
+        self.env = env
+        self.device: DataDevice = None
+        self.controllers: list[AbstractController] = []
+        self.task: AbstractTask = None
+        self.task_status_controller: TaskStatusController = None
+        self.data_storage: AbstractDataStorage = None
+        self.ctrl = np.zeros(nu, dtype=np.float32)
+        self.scene_info: dict = None
+        self.running_steps = 0
+
+    def set_device(self, device: DataDevice):
+        self.device = device
+
+    def add_controller(self, controller: AbstractController):
+        # robosuite控制器持有env.gym并缓存自己的仿真状态, 实例切换时不会跟着换入, 只能使用批量OSC
+        if isinstance(controller, ControllerArm) and not isinstance(controller.controller, OSCArm):
+            orca_logger.error(f"Instance {self.index}: per-arm robosuite controllers are not supported, use the batched OSC controller")
+            raise ValueError("Vector data collection requires the batched OSC controller (batched_osc: true)")
+        self.controllers.append(controller)
+
+    def set_task(self, task: AbstractTask):
+        self.task = task
+
+    def set_task_status_controller(self, task_status_controller: TaskStatusController):
+        self.task_status_controller = task_status_controller
+
+    def set_data_storage(self, data_storage: AbstractDataStorage):
+        self.data_storage = data_storage
+
+    def set_init_ctrl(self) -> np.ndarray:
+        for controller in self.controllers:
+            controller.init_ctrl_index()
+            controller.write_init_ctrl(self.ctrl)
+        return self.ctrl
+
+    def run_controllers(self) -> np.ndarray:
+        self.device.update()
+        for controller in self.controllers:
+            controller.write_ctrl(self.ctrl)
+        return self.ctrl
+
+
+class VectorDataCollection:
+    '''
+    @description: 无界面增广的多实例运行器, 每一轮为每个实例加载一条源数据, 共用一次场景发布,
+                  各实例分别放置场景后同步步进, 所有实例的回合都结束后再进入下一轮;
+                  场景发布、回合提交和回合结束回调沿用DataCollectionManager的设置
+    '''
+    def __init__(self, data_collection_manager: DataCollectionManager, num_instances: int, num_threads: int = 0):
+        '''
+        @param:
+            data_collection_manager: 提供环境、场景管理器和回合结束回调, 模式必须是AUGMENTATION
+            num_instances: 实例数量
+            num_threads: 物理步进的线程数, 0表示在主线程中逐个步进
+        '''
+        if data_collection_manager.mode != DataCollectionManager.DataCollectionMode.AUGMENTATION:
+            orca_logger.error("Vector data collection only supports augmentation mode")
+            raise ValueError("Vector data collection only supports augmentation mode")
+        self.manager = data_collection_manager
+        self.env = data_collection_manager.env
+        self.vector_env = VectorDataCollectionEnv(self.env, num_instances, num_threads)
+        self.instances = [VectorInstance(index, self.env, self.env.nu) for index in range(num_instances)]
+
+    def run(self):
+        manager = self.manager
+        if manager.save_video or manager.render:
+            orca_logger.warning("Vector data collection is headless, video and render are ignored")
+        executor = ThreadPoolExecutor(max_workers=2) if manager.overlap_turnaround else None
+        pending_commits: list[Future] = []
+
+        try:
+            while True:
+                with manager.stage_timer.stage("load_source"):
+                    instances = [instance for instance in self.instances if instance.device.load_data()]
+                if len(instances) == 0:
+                    orca_logger.info("Augmentation End")
+                    break
+                with manager.stage_timer.stage("spawn_scene"):
+                    manager.scene_manager.spawn_scene()
+                self.vector_env.sync_model()
+                for instance in instances:
+                    self._reset_instance(instance)
+                self.env.disable_actuator(manager.disable_actuator_group)
+
+                for future in pending_commits:
+                    future.result()
+                pending_commits = self._run_episodes(executor, instances)
+        except KeyboardInterrupt:
+            orca_logger.info("KeyboardInterrupt, End")
+        finally:
+            for future in pending_commits:
+                future.result()
+            if executor is not None:
+                executor.shutdown(wait=True)
+            self.vector_env.close()
+            orca_logger.info(f"Stage timing: {manager.stage_timer.format_summary()}")
+            self.env.close()
+
+    def _reset_instance(self, instance: VectorInstance):
+        self.vector_env.reset(instance.index)
+        with self.vector_env.activate(instance.index):
+            with self.manager.stage_timer.stage("update_actor_qpos"):
+                self.manager.scene_manager.update_actor_qpos(restore=True, scene_info=instance.device.get_scene_info())
+            instance.scene_info = self.manager.scene_manager.get_scene_info(with_physics_state=True)
+            instance.task.get_task(self.manager.scene_manager, task_info=instance.device.get_task_info())
+            instance.set_init_ctrl()
+            self.vector_env.ctrls[instance.index][:] = instance.ctrl
+            self.vector_env.datas[instance.index].ctrl[:] = instance.ctrl
+            self.env.mj_forward()
+        instance.task_status_controller.reset()
+        instance.running_steps = 0
+
+    def _run_episodes(self, executor: ThreadPoolExecutor, instances: list[VectorInstance]) -> list[Future]:
+        '''
+        @description: 同步步进本轮所有实例, 直到每个实例的回合结束
+        @return:
+            各实例回合提交的Future
+        '''
+        running = {instance.index: instance for instance in instances}
+        commits = []
+        start_time = time.perf_counter()
+        total_steps = 0
+        while len(running) > 0:
+            ctrls = {}
+            for index, instance in running.items():
+                with self.vector_env.activate(index):
+                    ctrls[index] = instance.run_controllers()
+            with self.manager.stage_timer.stage("physics_step"):
+                self.vector_env.step(ctrls)
+            total_steps += len(ctrls)
+
+            for index in list(running.keys()):
+                instance = running[index]
+                with self.vector_env.activate(index):
+                    episode_end, task_is_success = self._after_step(instance)
+                    if episode_end:
+                        commit = self.manager._commit_episode(executor, task_is_success, task=instance.task, device=instance.device,
+                                                              data_storage=instance.data_storage, scene_info=instance.scene_info)
+                        if commit is not None:
+                            commits.append(commit)
+                        del running[index]
+
+        elapsed_time = time.perf_counter() - start_time
+        orca_logger.info(f"{len(instances)} instances, {total_steps} steps in {elapsed_time:.2f}s "
+                         f"({total_steps / max(elapsed_time, 1e-9):.0f} steps/s)")
+        return commits
+
+    def _after_step(self, instance: VectorInstance) -> tuple[bool, bool]:
+        '''
+        @description: 与DataCollectionManager.run_episode中步进之后的处理一致, 需要在实例激活时调用
+        @return:
+            (回合是否结束, 任务是否成功)
+        '''
+        task_status = instance.task_status_controller.run_controller()
+        if task_status == TaskStatus.RUNNING:
+            if instance.data_storage is not None:
+                instance.data_storage.collection_data(self.env.obs_callback(self.env), self.env)
+            instance.running_steps += 1
+            if instance.task.should_check_failure(instance.running_steps) and instance.task.is_failed():
+                orca_logger.info(f"Instance {instance.index}: task failed at step {instance.running_steps}, end episode early")
+                return True, False
+        if task_status == TaskStatus.END:
+            return True, instance.task.is_success()
+        return False, False
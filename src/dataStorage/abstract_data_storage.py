@@ -114,12 +114,27 @@ class AbstractDataStorage(metaclass=abc.ABCMeta):
         '''
         @description: 收集数据
         @param:
-            data: 机器人相关数据
+            data: 机器人相关数据, 可以是环境返回的LazyObservation, 读取时才计算; 其中的数组由存储持有
             env: 环境
             **kwargs: 关键字参数
         '''
         raise NotImplementedError("Subclasses must implement this method")
 
+    def get_data_length(self) -> int:
+        '''
+        @description: 获取已暂存的数据帧数
+        '''
+        return max((len(value) for value in self.data.values()), default=0)
+
+    def truncate_data(self, length: int):
+        '''
+        @description: 丢弃第length帧之后暂存的数据, 回退到之前的检查点时使用
+        @param:
+            length: 保留的数据帧数
+        '''
+        for value in self.data.values():
+            del value[length:]
+
     def create_dataset(self, f: h5py.File, dataset_path: str, data: np.ndarray, **kwargs):
         '''
         @description: 创建数据集
@@ -0,0 +1,107 @@
+import mujoco
+import numpy as np
+from orca_gym.environment.orca_gym_local_env import OrcaGymLocalEnv
+from orca_gym.log.orca_log import OrcaLog
+from scene.physics_state import get_mj_model_data
+
+orca_logger = OrcaLog.get_instance()
+
+# 观测项的类型
+OBS_JOINT_QPOS = "joint_qpos"        # 关节位置, names为关节名称
+OBS_CTRL = "ctrl"                    # 环境最近一次写入的控制量, names为执行器名称
+OBS_SITE_POS_B = "site_pos_B"        # site在基座坐标系下的位置, names为site名称
+OBS_SITE_QUAT_B = "site_quat_B"      # site在基座坐标系下的姿态, 四元数(x, y, z, w)
+
+_JOINT_QPOS_SIZE = {int(mujoco.mjtJoint.mjJNT_FREE): 7, int(mujoco.mjtJoint.mjJNT_BALL): 4}
+
+
+class ObservationPlan:
+    '''
+    @description: 预编译的观测采集计划, 每次加载模型后解析一次qpos地址、执行器id和site id,
+                  之后每步只用几次花式索引从data.qpos/env.ctrl/site数组读出所有观测项
+    '''
+    def __init__(self, env: OrcaGymLocalEnv, items: list[tuple[str, str, list[str]]], base_body: str, chunk_size: int = 256):
+        '''
+        @param:
+            env: 环境, 名称按env.joint/env.actuator/env.site/env.body加上智能体前缀
+            items: [(观测键, 观测项类型, 名称列表)]
+            base_body: OBS_SITE_POS_B/OBS_SITE_QUAT_B使用的基座体
+            chunk_size: 输出缓冲区一次预分配的帧数
+        '''
+        self.model, _ = get_mj_model_data(env)
+        self.chunk_size = chunk_size
+        self._base_body_id = self._name2id(mujoco.mjtObj.mjOBJ_BODY, env.body(base_body))
+        self._items: list[tuple[str, str, np.ndarray, tuple[int, ...]]] = []
+        for key, kind, names in items:
+            if kind == OBS_JOINT_QPOS:
+                index = self._joint_qpos_index([env.joint(name) for name in names])
+                shape = (len(index),)
+            elif kind == OBS_CTRL:
+                index = np.array([self._name2id(mujoco.mjtObj.mjOBJ_ACTUATOR, env.actuator(name)) for name in names], dtype=np.int64)
+                shape = (len(index),)
+            elif kind in (OBS_SITE_POS_B, OBS_SITE_QUAT_B):
+                index = np.array([self._name2id(mujoco.mjtObj.mjOBJ_SITE, env.site(name)) for name in names], dtype=np.int64)
+                shape = (len(index), 3 if kind == OBS_SITE_POS_B else 4)
+            else:
+                orca_logger.error(f"Unknown observation kind {kind} for {key}")
+                raise ValueError(f"Unknown observation kind {kind}")
+            self._items.append((key, kind, index, shape))
+
+        self._site_mat = np.zeros(9, dtype=np.float64)
+        self._site_quat = np.zeros(4, dtype=np.float64)
+        self._chunks: dict[str, np.ndarray] = {}
+        self._row = chunk_size
+
+    def _name2id(self, obj_type: mujoco.mjtObj, name: str) -> int:
+        obj_id = mujoco.mj_name2id(self.model, obj_type, name)
+        if obj_id < 0:
+            orca_logger.error(f"Can't find {name} in model")
+            raise ValueError(f"Can't find {name} in model")
+        return obj_id
+
+    def _joint_qpos_index(self, joint_names: list[str]) -> np.ndarray:
+        index = []
+        for joint_name in joint_names:
+            joint_id = self._name2id(mujoco.mjtObj.mjOBJ_JOINT, joint_name)
+            address = int(self.model.jnt_qposadr[joint_id])
+            size = _JOINT_QPOS_SIZE.get(int(self.model.jnt_type[joint_id]), 1)
+            index.extend(range(address, address + size))
+        return np.array(index, dtype=np.int64)
+
+    def _next_row(self) -> int:
+        # 存储直接持有每帧的数组, 所以不能复用同一块缓冲区; 按块预分配, 每帧取其中一行的视图
+        if self._row == self.chunk_size:
+            self._chunks = {key: np.empty((self.chunk_size, *shape), dtype=np.float32) for key, _, _, shape in self._items}
+            self._row = 0
+        row = self._row
+        self._row += 1
+        return row
+
+    def gather(self, env: OrcaGymLocalEnv) -> dict[str, np.ndarray]:
+        '''
+        @description: 读取当前帧的所有观测项
+        @return:
+            {观测键: float32数组}, 数组是预分配缓冲区中的一行, 之后的帧不会再写入
+        '''
+        _, data = get_mj_model_data(env)
+        row = self._next_row()
+        base_pos = data.xpos[self._base_body_id]
+        base_mat = data.xmat[self._base_body_id].reshape(3, 3)
+        obs = {}
+        for key, kind, index, _ in self._items:
+            out = self._chunks[key][row]
+            if kind == OBS_JOINT_QPOS:
+                out[:] = data.qpos[index]
+            elif kind == OBS_CTRL:
+                out[:] = env.ctrl[index]
+            elif kind == OBS_SITE_POS_B:
+                out[:] = (data.site_xpos[index] - base_pos) @ base_mat
+            else:
+                site_mat_B = base_mat.T @ data.site_xmat[index].reshape(-1, 3, 3)
+                for i in range(len(index)):
+                    self._site_mat[:] = site_mat_B[i].ravel()
+                    mujoco.mju_mat2Quat(self._site_quat, self._site_mat)
+                    out[i, :3] = self._site_quat[1:]
+                    out[i, 3] = self._site_quat[0]
+            obs[key] = out
+        return obs
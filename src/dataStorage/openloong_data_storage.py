@@ -1,6 +1,8 @@
 import os
 from dataStorage.abstract_data_storage import AbstractDataStorage
 from orca_gym.environment.orca_gym_local_env import OrcaGymLocalEnv
+from dataStorage.observation_plan import ObservationPlan, OBS_JOINT_QPOS, OBS_CTRL, OBS_SITE_POS_B, OBS_SITE_QUAT_B
+from scene.physics_state import get_mj_model_data
 from conf import openloong_conf
 import numpy as np
 import h5py
@@ -13,40 +15,38 @@ class OpenLoongDataStorage(AbstractDataStorage):
     def __init__(self, dataset_path: str, hdf5_path: str = None):
         super().__init__(dataset_path=dataset_path, hdf5_path=hdf5_path)
         self.data["time_step"] = []
+        self._obs_plan: ObservationPlan = None
         
     def collection_data(self, data: dict, env: OrcaGymLocalEnv, **kwargs):
+        # obs_callback返回的数组之后不会再被写入, 存储直接持有, 不再拷贝
         for key, value in data.items():
             if key not in self.data:
                 self.data[key] = []
             self.data[key].append(value)
-        self.data["time_step"].append(env.data.time)
+        # 多实例仿真时环境换入的是当前实例的MjData
+        self.data["time_step"].append(get_mj_model_data(env)[1].time)
         
     def obs_callback(self, env: OrcaGymLocalEnv) -> dict:
-        obs = {}
-        joint_names = openloong_conf.l_arm["joint_names"] + openloong_conf.r_arm["joint_names"]
-        joint_names = [env.joint(joint_name) for joint_name in joint_names]
+        model, _ = get_mj_model_data(env)
+        if self._obs_plan is None or self._obs_plan.model is not model:
+            self._obs_plan = self.compile_obs_plan(env)
+        return self._obs_plan.gather(env)
 
+    def compile_obs_plan(self, env: OrcaGymLocalEnv) -> ObservationPlan:
+        '''
+        @description: 按openloong_conf编译观测采集计划, 模型重新加载后需要重新编译
+        '''
+        joint_names = openloong_conf.l_arm["joint_names"] + openloong_conf.r_arm["joint_names"]
         gripper_names = openloong_conf.gripper_2f85_l["joint_names"] + openloong_conf.gripper_2f85_r["joint_names"]
-        gripper_names = [env.joint(gripper_name) for gripper_name in gripper_names]
-
         gripper_motor_names = openloong_conf.gripper_2f85_l["actuator_names"] + openloong_conf.gripper_2f85_r["actuator_names"]
-        gripper_motor_names = [env.actuator(gripper_motor_name) for gripper_motor_name in gripper_motor_names]
-        gripper_motor_id = [env.model.actuator_name2id(gripper_motor_name) for gripper_motor_name in gripper_motor_names]
-
         ee_site_names = [openloong_conf.l_arm["ee_site_name"], openloong_conf.r_arm["ee_site_name"]]
-        ee_site_names = [env.site(ee_site_name) for ee_site_name in ee_site_names]
-
-        qpos = env.query_joint_qpos(joint_names)
-        gripper_qpos = env.query_joint_qpos(gripper_names)
-        ee_site_pos_quat = env.query_site_pos_and_quat_B(ee_site_names, [env.body(openloong_conf.base_body)])
-        gripper_motor_values = [env.ctrl[gripper_motor_id] for gripper_motor_id in gripper_motor_id]
-
-        obs["/action/joint/position"] = np.array([qpos[joint_name] for joint_name in joint_names], dtype=np.float32).flatten()
-        obs["/action/effector/position"] = np.array([gripper_qpos[gripper_name] for gripper_name in gripper_names], dtype=np.float32).flatten()
-        obs["/action/effector/motor"] = np.array([gripper_motor_values], dtype=np.float32).flatten()
-        obs["/action/end/position"] = np.array([ee_site_pos_quat[ee_site_name]["xpos"] for ee_site_name in ee_site_names], dtype=np.float32)
-        obs["/action/end/orientation"] = np.array([ee_site_pos_quat[ee_site_name]["xquat"][[1, 2, 3, 0]] for ee_site_name in ee_site_names], dtype=np.float32)
-        return obs   
+        return ObservationPlan(env, [
+            ("/action/joint/position", OBS_JOINT_QPOS, joint_names),
+            ("/action/effector/position", OBS_JOINT_QPOS, gripper_names),
+            ("/action/effector/motor", OBS_CTRL, gripper_motor_names),
+            ("/action/end/position", OBS_SITE_POS_B, ee_site_names),
+            ("/action/end/orientation", OBS_SITE_QUAT_B, ee_site_names),
+        ], openloong_conf.base_body)
 
 
     def clear_data(self):
@@ -2,13 +2,21 @@ import abc
 import numpy as np
 from scipy.interpolate import CubicSpline
 from orca_gym.log import OrcaLog
+from scene.random_util import default_rng
 
 orca_logger = OrcaLog.get_instance()
 
 class AbstractInterpolator(metaclass=abc.ABCMeta):
 
-    def __init__(self, noise_value: float):
+    def __init__(self, noise_value: float, rng: np.random.Generator = None):
+        '''
+        @param:
+            noise_value: 噪声值
+            rng: 噪声使用的随机数生成器, 多进程时传入random_util.make_rng生成的生成器;
+                默认从模块共享的生成器派生一个子序列, 插值在后台线程运行, 不与主线程共用生成器
+        '''
         self.noise_value = noise_value
+        self.rng = rng if rng is not None else default_rng().spawn(1)[0]
 
     @abc.abstractmethod
     def interpolate(self, dataset: np.array, **kwargs):
@@ -21,8 +29,8 @@ class AbstractInterpolator(metaclass=abc.ABCMeta):
 
 
 class OpenLoongInterpolator(AbstractInterpolator):
-    def __init__(self, noise_value: float):
-        super().__init__(noise_value)
+    def __init__(self, noise_value: float, rng: np.random.Generator = None):
+        super().__init__(noise_value, rng)
         self._insertion_indices = None  # 缓存插值位置
 
     def get_interpolation_paths(self) -> list[str]:
@@ -142,7 +150,7 @@ class OpenLoongInterpolator(AbstractInterpolator):
             # 计算插值值
             mean = np.mean(group, axis=0)
             std = np.std(group, axis=0)
-            noise = np.random.uniform(0, self.noise_value, size=group[0].shape)
+            noise = self.rng.uniform(0, self.noise_value, size=group[0].shape)
             interpolated = mean + std + noise
             new_values.append(interpolated)
             
@@ -201,7 +209,7 @@ class OpenLoongInterpolator(AbstractInterpolator):
             
             # 计算插值值
             q_interp = self._slerp_multiple(group, 0.5)
-            noise = np.random.uniform(-self.noise_value, self.noise_value, size=q_interp.shape)
+            noise = self.rng.uniform(-self.noise_value, self.noise_value, size=q_interp.shape)
             q_interp = q_interp + noise
             q_interp = q_interp / np.linalg.norm(q_interp, axis=-1, keepdims=True)
             new_values.append(q_interp)
@@ -232,12 +240,13 @@ class OpenLoongInterpolator(AbstractInterpolator):
 class OpenLoongInterpolatorAdvanced(AbstractInterpolator):
     """改进版插值器：使用三次样条插值和SLERP"""
     
-    def __init__(self, noise_value: float, interpolation_factor: int = 3):
+    def __init__(self, noise_value: float, interpolation_factor: int = 3, rng: np.random.Generator = None):
         """
         @param noise_value: 噪声值
         @param interpolation_factor: 插值倍数，每两个点之间插入的点数
+        @param rng: 噪声使用的随机数生成器
         """
-        super().__init__(noise_value)
+        super().__init__(noise_value, rng)
         self.interpolation_factor = interpolation_factor
 
     def get_interpolation_paths(self) -> list[str]:
@@ -288,7 +297,7 @@ class OpenLoongInterpolatorAdvanced(AbstractInterpolator):
         for dim in range(dataset.shape[-1]):
             cs = CubicSpline(t_original, dataset[:, dim])
             interpolated = cs(t_new)
-            noise = np.random.uniform(-self.noise_value, self.noise_value, size=interpolated.shape)
+            noise = self.rng.uniform(-self.noise_value, self.noise_value, size=interpolated.shape)
             result.append(interpolated + noise)
         
         result = np.array(result).T
@@ -313,7 +322,7 @@ class OpenLoongInterpolatorAdvanced(AbstractInterpolator):
                 t = j / self.interpolation_factor
                 if j < self.interpolation_factor:
                     q_interp = self._slerp(q1, q2, t)
-                    noise = np.random.uniform(-self.noise_value, self.noise_value, size=q_interp.shape)
+                    noise = self.rng.uniform(-self.noise_value, self.noise_value, size=q_interp.shape)
                     q_interp = q_interp + noise
                     q_interp = q_interp / np.linalg.norm(q_interp, axis=-1, keepdims=True)
                     result.append(q_interp)
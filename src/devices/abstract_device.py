@@ -1,9 +1,12 @@
 import abc
+import threading
+import time
 
 from orca_gym.devices.pico_joytsick import PicoJoystick, PicoJoystickKey
 from typing import Callable, override
 import numpy as np
 from orca_gym.log.orca_log import OrcaLog
+from devices.input_log import InputLogWriter, encode_key_state, encode_transform
 orca_logger = OrcaLog.get_instance()
 
 class AbstractDevice(metaclass=abc.ABCMeta):
@@ -11,36 +14,183 @@ class AbstractDevice(metaclass=abc.ABCMeta):
     def update(self):
         raise NotImplementedError
 
+    def is_finished(self) -> bool:
+        '''
+        @description: 输入是否已经结束(例如回放完毕), 实时设备永远不会结束
+        '''
+        return False
+
 class PicoJoystickDevice(AbstractDevice):
-    def __init__(self, pico_joystick: PicoJoystick):
+    def __init__(self, pico_joystick: PicoJoystick,
+                 threaded: bool = False,
+                 poll_interval: float = 0.001,
+                 stale_timeout: float = 0.1,
+                 stats_interval: float = 10.0,
+                 input_log_path: str = None):
+        '''
+        @param:
+            pico_joystick: VR手柄
+            threaded: 是否由后台线程读取手柄, 控制循环只取最新的一帧, 不等待输入I/O
+            poll_interval: 后台线程轮询间隔(秒)
+            stale_timeout: 控制循环取到的帧超过该时间(秒)视为过期
+            stats_interval: 每隔多少秒输出一次输入延迟统计, 0表示不输出
+            input_log_path: 可选, 把手柄原始输入和控制循环的取样时刻记录到该文件, 用PicoReplayDevice回放
+        '''
         self.pico_joystick = pico_joystick
         self.keys = []
+        self._events: list[Callable[[list | None, dict | None], None]] = []
+        # 坐标变换的输出缓冲, 每个按键一份, 回调不能保留这些数组的引用
+        self._relative_position = {key: np.zeros(3, dtype=np.float64) for key in [PicoJoystickKey.L_TRANSFORM, PicoJoystickKey.R_TRANSFORM]}
+        self._relative_quat = {key: np.zeros(4, dtype=np.float64) for key in [PicoJoystickKey.L_TRANSFORM, PicoJoystickKey.R_TRANSFORM]}
+
+        self.threaded = threaded
+        self.poll_interval = poll_interval
+        self.stale_timeout = stale_timeout
+        self.stats_interval = stats_interval
+        # 最新一帧 (序号, 到达时间, transform, key_state), 整体替换引用, 读写都不加锁
+        self._latest_sample: tuple[int, float, list | None, dict | None] = None
+        self._received_nums = 0
+        self._consumed_seq = 0
+        self._reset_input_stats()
+        self._stop_event = threading.Event()
+        self._reader_thread: threading.Thread = None
+        self._input_log = InputLogWriter(input_log_path) if input_log_path is not None else None
+        if threaded:
+            self.start()
+
+    def start(self):
+        if self._reader_thread is not None:
+            return
+        self._stop_event.clear()
+        self._reader_thread = threading.Thread(target=self._read_loop, name="PicoJoystickReader", daemon=True)
+        self._reader_thread.start()
+
+    def close(self):
+        if self._reader_thread is not None:
+            self._stop_event.set()
+            self._reader_thread.join()
+            self._reader_thread = None
+            self.log_input_stats()
+        if self._input_log is not None:
+            self._input_log.close()
+            orca_logger.info(f"Input log {self._input_log.path}: {self._input_log.sample_nums} samples, {self._input_log.tick_nums} ticks")
+
+    def clock(self) -> float:
+        '''
+        @description: 输入的时间, 按键防抖等依赖时间的逻辑使用, 回放时为日志中的时间
+        '''
+        return time.time()
 
     def bind_key_event(self, key: PicoJoystickKey, event: Callable[[list | None, dict | None], None]):
         self.pico_joystick.bind_key_event(key, event)
         self.keys.append(key)
+        self._events.append(event)
 
     @override
     def update(self):
-        self.pico_joystick.update(self.keys)
+        if not self.threaded:
+            if self._input_log is None:
+                self.pico_joystick.update(self.keys)
+                return
+            # 需要记录原始输入时自己读取并触发回调
+            transform, key_state = self.pico_joystick.get_transform_list(), self.pico_joystick.get_key_state()
+            self._input_log.write_sample(transform, key_state)
+            self._input_log.write_tick()
+            self._dispatch(transform, key_state)
+            return
+
+        sample = self._latest_sample
+        if sample is None:
+            return
+        seq, arrival_time, transform, key_state = sample
+        now = time.perf_counter()
+        if seq != self._consumed_seq:
+            self._consumed_seq = seq
+            latency = now - arrival_time
+            self._dispatched_nums += 1
+            self._latency_sum += latency
+            self._latency_max = max(self._latency_max, latency)
+        if now - arrival_time > self.stale_timeout:
+            self._stale_nums += 1
+        # 和同步模式一致, 没有新帧时用最新一帧重复触发回调
+        if self._input_log is not None:
+            self._input_log.write_tick()
+        self._dispatch(transform, key_state)
+
+        if self.stats_interval > 0 and now - self._stats_start_time >= self.stats_interval:
+            self.log_input_stats()
+            self._reset_input_stats()
+
+    def _dispatch(self, transform: list | None, key_state: dict | None):
+        for event in self._events:
+            event(transform, key_state)
+
+    def _read_loop(self):
+        last_payload = None
+        while not self._stop_event.is_set():
+            key_state = self.pico_joystick.get_key_state()
+            if key_state is not None:
+                transform = self.pico_joystick.get_transform_list()
+                # 按内容判断是否有新数据, 手柄原地更新key_state或者重复发送同一帧时都不会误判
+                payload = encode_key_state(key_state) + (encode_transform(transform) if transform is not None else b"")
+                if payload != last_payload:
+                    last_payload = payload
+                    self._receive(transform, key_state)
+            time.sleep(self.poll_interval)
+
+    def _receive(self, transform: list | None, key_state: dict | None):
+        if self._input_log is not None:
+            self._input_log.write_sample(transform, key_state)
+        self._received_nums += 1
+        previous_sample = self._latest_sample
+        if previous_sample is not None and previous_sample[0] != self._consumed_seq:
+            # 上一帧还没被控制循环取走就被覆盖
+            self._dropped_nums += 1
+        self._latest_sample = (self._received_nums, time.perf_counter(), transform, key_state)
+
+    def _reset_input_stats(self):
+        self._stats_start_time = time.perf_counter()
+        self._dispatched_nums = 0
+        self._dropped_nums = 0
+        self._stale_nums = 0
+        self._latency_sum = 0.0
+        self._latency_max = 0.0
+
+    def get_input_stats(self) -> dict:
+        '''
+        @description: 当前统计窗口内的输入统计, 延迟为手柄帧到达到控制循环触发回调的时间
+        '''
+        return {
+            "received": self._received_nums,
+            "dispatched": self._dispatched_nums,
+            "dropped": self._dropped_nums,
+            "stale": self._stale_nums,
+            "latency_mean_ms": self._latency_sum / self._dispatched_nums * 1000 if self._dispatched_nums > 0 else None,
+            "latency_max_ms": self._latency_max * 1000,
+        }
+
+    def log_input_stats(self):
+        stats = self.get_input_stats()
+        latency_mean = f"{stats['latency_mean_ms']:.1f}ms" if stats["latency_mean_ms"] is not None else "n/a"
+        orca_logger.info(f"Pico input: {stats['dispatched']} dispatched, {stats['dropped']} dropped, {stats['stale']} stale ticks, "
+                         f"latency mean {latency_mean} max {stats['latency_max_ms']:.1f}ms")
 
     def transform_event(self, key: PicoJoystickKey, transform: list | None, key_state: dict | None, event: Callable[[np.array, np.array], None]):
         if transform is None:
             return
         # 这里的left_relative_quat是(w,x,y,z)格式, Unity左手系, y轴向上，z轴向前， x轴向右
         if key == PicoJoystickKey.L_TRANSFORM:
-            relative_position, relative_quat = key_state["leftHand"]["position"], key_state["leftHand"]["rotation"]
+            position, quat = key_state["leftHand"]["position"], key_state["leftHand"]["rotation"]
 
         elif key == PicoJoystickKey.R_TRANSFORM:
-            relative_position, relative_quat = key_state["rightHand"]["position"], key_state["rightHand"]["rotation"]
+            position, quat = key_state["rightHand"]["position"], key_state["rightHand"]["rotation"]
         else:
             raise ValueError(f"Invalid key: {key}")
 
         #转换为mujoco右手系， z轴向上， x轴向前， y轴向左
-        relative_position = np.array(relative_position)[[2, 0, 1]]
-        relative_position[1] = -relative_position[1]
-        relative_quat = np.array(relative_quat)[[3, 2, 0, 1]]
-        relative_quat[1], relative_quat[3] = -relative_quat[1], -relative_quat[3]
+        relative_position, relative_quat = self._relative_position[key], self._relative_quat[key]
+        relative_position[0], relative_position[1], relative_position[2] = position[2], -position[0], position[1]
+        relative_quat[0], relative_quat[1], relative_quat[2], relative_quat[3] = quat[3], -quat[2], quat[0], -quat[1]
         event(relative_position, relative_quat)
 
     def trigger_event(self, key: PicoJoystickKey, transform: list | None, key_state: dict | None, event: Callable[[float], None]):
@@ -24,6 +24,7 @@ class DataDevice(AbstractDevice):
         self.update_task_status = False
         
         self.unit_datasets_path = []
+        self.current_unit_path = None
         self.data = None
         self.hdf5_path = hdf5_path
         self.load_unit_dataset()
@@ -92,6 +93,20 @@ class DataDevice(AbstractDevice):
             if os.path.isdir(dir_path):
                 self.unit_datasets_path.append(dir_path)
  
+    def set_unit_datasets(self, unit_datasets_path: list[str]):
+        '''
+        @description: 指定要回放的单元数据目录列表, 替换load_unit_dataset扫描的结果, 同一目录可以出现多次
+        @param:
+            unit_datasets_path: 单元数据目录列表, 按列表顺序回放
+        '''
+        self.unit_datasets_path = list(reversed(unit_datasets_path))
+
+    def get_current_unit_path(self) -> str:
+        '''
+        @description: 获取当前正在回放的单元数据目录
+        '''
+        return self.current_unit_path
+
     def load_data(self) ->bool:
         '''
         @description: 加载数据
@@ -102,6 +117,7 @@ class DataDevice(AbstractDevice):
             self.data = None
             return False
         unit_path = self.unit_datasets_path.pop()
+        self.current_unit_path = unit_path
         hdf5_path = os.path.join(unit_path, self.hdf5_path)
         with h5py.File(hdf5_path, "r") as f:
             self.data = {}
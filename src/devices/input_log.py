@@ -0,0 +1,180 @@
+import struct
+import threading
+import time
+import numpy as np
+
+# 输入日志: 文件头之后是一条条记录, 每条记录以(类型, 相对时间)开头
+#   SAMPLE: 手柄的一帧原始输入, 后接标志位、两只手柄的状态和transform
+#   TICK: 控制循环在这一时刻触发了回调, 使用的是它之前最新的一帧
+INPUT_LOG_MAGIC = b"PICOLOG2"
+# 第一版日志没有记录transform的内容, 只有是否有效的标志位
+INPUT_LOG_MAGIC_V1 = b"PICOLOG1"
+RECORD_SAMPLE = 0
+RECORD_TICK = 1
+
+_RECORD_HEADER = struct.Struct("<Bd")
+_SAMPLE_FLAGS = struct.Struct("<B")
+# transform: 元素个数, 之后每个元素为(维数, 各维长度)和float64数据
+_TRANSFORM_COUNT = struct.Struct("<B")
+_TRANSFORM_NDIM = struct.Struct("<B")
+FLAG_KEY_STATE = 0x01
+FLAG_TRANSFORM = 0x02
+
+# 每只手柄按固定顺序压成float32: position(3), rotation(4), triggerValue, primaryButtonPressed,
+# secondaryButtonPressed, gripButtonPressed, joystickPosition(2)
+HANDS = ["leftHand", "rightHand"]
+HAND_FIELD_SIZES = [("position", 3), ("rotation", 4), ("triggerValue", 1), ("primaryButtonPressed", 1),
+                    ("secondaryButtonPressed", 1), ("gripButtonPressed", 1), ("joystickPosition", 2)]
+HAND_SIZE = sum(size for _, size in HAND_FIELD_SIZES)
+KEY_STATE_BYTES = len(HANDS) * HAND_SIZE * 4
+_BUTTON_FIELDS = {"primaryButtonPressed", "secondaryButtonPressed", "gripButtonPressed"}
+
+
+def encode_key_state(key_state: dict) -> bytes:
+    values = np.zeros(len(HANDS) * HAND_SIZE, dtype=np.float32)
+    offset = 0
+    for hand in HANDS:
+        hand_state = key_state.get(hand, {})
+        for field, size in HAND_FIELD_SIZES:
+            value = hand_state.get(field, 0.0)
+            values[offset:offset + size] = value if size > 1 else float(value)
+            offset += size
+    return values.tobytes()
+
+
+def decode_key_state(data: bytes) -> dict:
+    values = np.frombuffer(data, dtype=np.float32)
+    key_state = {}
+    offset = 0
+    for hand in HANDS:
+        hand_state = {}
+        for field, size in HAND_FIELD_SIZES:
+            if size > 1:
+                hand_state[field] = values[offset:offset + size].tolist()
+            elif field in _BUTTON_FIELDS:
+                hand_state[field] = bool(values[offset])
+            else:
+                hand_state[field] = float(values[offset])
+            offset += size
+        key_state[hand] = hand_state
+    return key_state
+
+
+def encode_transform(transform: list) -> bytes:
+    parts = [_TRANSFORM_COUNT.pack(len(transform))]
+    for item in transform:
+        array = np.asarray(item, dtype=np.float64)
+        parts.append(_TRANSFORM_NDIM.pack(array.ndim))
+        parts.append(struct.pack(f"<{array.ndim}I", *array.shape))
+        parts.append(array.tobytes())
+    return b"".join(parts)
+
+
+def decode_transform(data: bytes, offset: int) -> tuple[list | None, int]:
+    '''
+    @description: 从offset处解码transform
+    @return:
+        (transform, 下一条数据的偏移), 数据不完整时transform为None
+    '''
+    if offset + _TRANSFORM_COUNT.size > len(data):
+        return None, offset
+    (count,) = _TRANSFORM_COUNT.unpack_from(data, offset)
+    offset += _TRANSFORM_COUNT.size
+    transform = []
+    for _ in range(count):
+        if offset + _TRANSFORM_NDIM.size > len(data):
+            return None, offset
+        (ndim,) = _TRANSFORM_NDIM.unpack_from(data, offset)
+        offset += _TRANSFORM_NDIM.size
+        shape_format = struct.Struct(f"<{ndim}I")
+        if offset + shape_format.size > len(data):
+            return None, offset
+        shape = shape_format.unpack_from(data, offset)
+        offset += shape_format.size
+        size = int(np.prod(shape)) * 8
+        if offset + size > len(data):
+            return None, offset
+        array = np.frombuffer(data, dtype=np.float64, count=size // 8, offset=offset).reshape(shape).copy()
+        offset += size
+        transform.append(float(array) if ndim == 0 else array)
+    return transform, offset
+
+
+class InputLogWriter:
+    '''
+    @description: 记录手柄原始输入和控制循环的取样时刻, 读线程和控制线程都会写入, 写入时加锁
+    '''
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(INPUT_LOG_MAGIC)
+        self._lock = threading.Lock()
+        self._start_time = time.time()
+        self.sample_nums = 0
+        self.tick_nums = 0
+
+    def write_sample(self, transform: list | None, key_state: dict | None):
+        flags = (FLAG_KEY_STATE if key_state is not None else 0) | (FLAG_TRANSFORM if transform is not None else 0)
+        payload = encode_key_state(key_state) if key_state is not None else b""
+        if transform is not None:
+            payload += encode_transform(transform)
+        with self._lock:
+            self._file.write(_RECORD_HEADER.pack(RECORD_SAMPLE, time.time() - self._start_time))
+            self._file.write(_SAMPLE_FLAGS.pack(flags))
+            self._file.write(payload)
+            self.sample_nums += 1
+
+    def write_tick(self):
+        with self._lock:
+            self._file.write(_RECORD_HEADER.pack(RECORD_TICK, time.time() - self._start_time))
+            self.tick_nums += 1
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def read_input_log(path: str) -> list[tuple[int, float, list | None, dict | None]]:
+    '''
+    @description: 读取输入日志
+    @return:
+        [(记录类型, 相对时间, transform, key_state)], TICK记录的transform和key_state为None,
+        transform的每个元素为float64数组; 第一版日志没有transform的内容, 有效时用空列表表示
+    '''
+    with open(path, "rb") as f:
+        data = f.read()
+    magic = data[:len(INPUT_LOG_MAGIC)]
+    if magic not in (INPUT_LOG_MAGIC, INPUT_LOG_MAGIC_V1):
+        raise ValueError(f"{path} is not a pico input log")
+    has_transform_payload = magic == INPUT_LOG_MAGIC
+
+    records = []
+    offset = len(INPUT_LOG_MAGIC)
+    while offset + _RECORD_HEADER.size <= len(data):
+        record_type, timestamp = _RECORD_HEADER.unpack_from(data, offset)
+        offset += _RECORD_HEADER.size
+        if record_type == RECORD_TICK:
+            records.append((record_type, timestamp, None, None))
+            continue
+        if offset + _SAMPLE_FLAGS.size > len(data):
+            break
+        (flags,) = _SAMPLE_FLAGS.unpack_from(data, offset)
+        offset += _SAMPLE_FLAGS.size
+        key_state = None
+        if flags & FLAG_KEY_STATE:
+            if offset + KEY_STATE_BYTES > len(data):
+                # 录制中断时最后一条记录可能不完整
+                break
+            key_state = decode_key_state(data[offset:offset + KEY_STATE_BYTES])
+            offset += KEY_STATE_BYTES
+        transform = None
+        if flags & FLAG_TRANSFORM:
+            if has_transform_payload:
+                transform, offset = decode_transform(data, offset)
+                if transform is None:
+                    break
+            else:
+                transform = []
+        records.append((record_type, timestamp, transform, key_state))
+    return records
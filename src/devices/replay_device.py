@@ -0,0 +1,49 @@
+from typing import Callable, override
+from orca_gym.devices.pico_joytsick import PicoJoystickKey
+from orca_gym.log.orca_log import OrcaLog
+from devices.abstract_device import PicoJoystickDevice
+from devices.input_log import RECORD_TICK, read_input_log
+
+orca_logger = OrcaLog.get_instance()
+
+
+class PicoReplayDevice(PicoJoystickDevice):
+    '''
+    @description: 回放PicoJoystickDevice录制的输入日志, 绑定方式和回调与PicoJoystickDevice相同,
+                  每次update对应录制时的一个控制周期, 不等待真实时间, 可以无界面全速重新仿真遥操作
+    '''
+    def __init__(self, input_log_path: str):
+        super().__init__(pico_joystick=None)
+        self.input_log_path = input_log_path
+        self._records = read_input_log(input_log_path)
+        tick_indices = [i for i, record in enumerate(self._records) if record[0] == RECORD_TICK]
+        self._last_tick_index = tick_indices[-1] if len(tick_indices) > 0 else -1
+        self._cursor = 0
+        self._transform = None
+        self._key_state = None
+        self._time = 0.0
+        orca_logger.info(f"Replay {input_log_path}: {len(self._records) - len(tick_indices)} samples, {len(tick_indices)} ticks")
+
+    @override
+    def bind_key_event(self, key: PicoJoystickKey, event: Callable[[list | None, dict | None], None]):
+        self.keys.append(key)
+        self._events.append(event)
+
+    @override
+    def update(self):
+        while self._cursor <= self._last_tick_index:
+            record_type, timestamp, transform, key_state = self._records[self._cursor]
+            self._cursor += 1
+            if record_type == RECORD_TICK:
+                self._time = timestamp
+                self._dispatch(self._transform, self._key_state)
+                return
+            self._transform, self._key_state = transform, key_state
+
+    @override
+    def is_finished(self) -> bool:
+        return self._cursor > self._last_tick_index
+
+    @override
+    def clock(self) -> float:
+        return self._time
@@ -1,10 +1,25 @@
+import copy
+import time
 from typing import Callable
 from orca_gym.environment.orca_gym_local_env import OrcaGymLocalEnv
 from orca_gym.log.orca_log import OrcaLog
+from envs.dataCollection.model_cache import ModelCache, model_content_key
+from envs.dataCollection.kinematics_cache import KinematicsCache
+from envs.dataCollection.lazy_observation import LazyObservation
+from scene.physics_state import get_mj_model_data
+import mujoco
 import numpy as np
 
 orca_logger = OrcaLog.get_instance()
 
+# OrcaGymLocal.init_simulation设置的、只由模型决定的状态, 命中缓存时全部换回;
+# MjData和按MjData尺寸分配的_q*_cache每次新建, data包装随后从新的MjData刷新;
+# 缓存中的MjModel是加载后未经修改的副本, 换回时再复制一份, 原地修改(位姿、灯光)不会留在缓存里
+CACHED_GYM_ATTRS = ("_xml_path", "_mjModel", "opt", "model", "data")
+
+# 默认状态包含完整的积分状态(time, qpos, qvel, act, ctrl, 外力, mocap等), 一次mj_setState写回
+DEFAULT_STATE_SPEC = mujoco.mjtState.mjSTATE_INTEGRATION
+
 class DataCollectionEnv(OrcaGymLocalEnv):
     def __init__(
         self,
@@ -14,9 +29,25 @@ class DataCollectionEnv(OrcaGymLocalEnv):
         time_step: float,
         default_joint_values: dict[str, float],
         obs_callback: Callable[[OrcaGymLocalEnv], dict],
+        model_cache_size: int = 4,
         **kwargs
     ):
+        '''
+        @param:
+            model_cache_size: 按内容哈希缓存多少个编译好的模型, 0表示不缓存, 每次发布场景都重新加载
+        '''
         self.obs_callback = obs_callback
+        # 父类构造时就会调用initialize_simulation, 缓存需要先创建
+        self.model_cache = ModelCache(model_cache_size) if model_cache_size > 0 else None
+        # 当前帧的位姿缓存, 控制器共享, 仿真步进或前向计算后失效
+        self.kinematics = KinematicsCache(self)
+        # 每次加载模型后第一次完整reset时记录的默认状态, 之后的回合直接写回
+        self._default_state: np.ndarray = None
+        self._default_state_model: mujoco.MjModel = None
+        # 当前加载模型的内容哈希, 以及就绪检测时已经下载、下次加载直接使用的模型xml
+        self.model_key: str = None
+        self._fetched_model_xml: str = None
+        self.reset_stats = {"fast_resets": 0, "full_resets": 0, "last_reset_time": 0.0, "total_reset_time": 0.0}
         super().__init__(
             frame_skip = frame_skip,
             orcagym_addr = orcagym_addr,
@@ -38,12 +69,21 @@ class DataCollectionEnv(OrcaGymLocalEnv):
     def step(self, action):
         self.ctrl = action
         self.do_simulation(self.ctrl, self.frame_skip)
-        obs = self._get_obs().copy()
+        # 只有读取观测(任务RUNNING时写入存储)才会调用obs_callback
+        obs = LazyObservation(self, self.obs_callback)
         terminated = False
         truncated = False
         reward = 0.0    
         return obs, reward, terminated, truncated, {}
 
+    def do_simulation(self, ctrl, n_frames) -> None:
+        super().do_simulation(ctrl, n_frames)
+        self.kinematics.invalidate()
+
+    def mj_forward(self):
+        super().mj_forward()
+        self.kinematics.invalidate()
+
     def reset_model(self):
         orca_logger.info(f"reset model")
         self.nu = self.model.nu
@@ -52,22 +92,125 @@ class DataCollectionEnv(OrcaGymLocalEnv):
 
         self.set_default_joint_values(self.default_joint_values)    
         self.mj_forward()
-        obs = self._get_obs().copy()
+        self._capture_default_state()
+        # 父类reset在reset_model之后可能还会做前向计算, 这里直接计算观测
+        return self._get_obs(), {}
+
+    def fast_reset(self, with_obs: bool = False):
+        '''
+        @description: 回合重置的快速路径, 把缓存的默认状态一次性写回并做一次前向计算, 不重新解析关节名称;
+                      模型刚加载或默认关节值变化后还没有缓存时退回完整的reset
+        @param:
+            with_obs: 是否计算观测, 数据采集流程不使用reset的观测
+        @return:
+            (obs, info), with_obs为False时obs为None
+        '''
+        start_time = time.perf_counter()
+        model, data = get_mj_model_data(self)
+        if self._default_state is None or self._default_state_model is not model:
+            obs, info = self.reset()
+            self._record_reset_time(False, time.perf_counter() - start_time)
+            return (obs if with_obs else None), info
+
+        mujoco.mj_setState(model, data, self._default_state, DEFAULT_STATE_SPEC)
+        self.mj_forward()
+        obs = LazyObservation(self, self.obs_callback) if with_obs else None
+        self._record_reset_time(True, time.perf_counter() - start_time)
         return obs, {}
 
+    def get_reset_stats(self) -> dict:
+        '''
+        @description: 获取fast_reset的统计
+        @return:
+            {"fast_resets", "full_resets": 次数, "last_reset_time", "mean_reset_time": 秒}
+        '''
+        reset_nums = self.reset_stats["fast_resets"] + self.reset_stats["full_resets"]
+        return {"fast_resets": self.reset_stats["fast_resets"],
+                "full_resets": self.reset_stats["full_resets"],
+                "last_reset_time": self.reset_stats["last_reset_time"],
+                "mean_reset_time": self.reset_stats["total_reset_time"] / reset_nums if reset_nums > 0 else 0.0}
+
+    def _record_reset_time(self, fast: bool, reset_time: float):
+        self.reset_stats["fast_resets" if fast else "full_resets"] += 1
+        self.reset_stats["last_reset_time"] = reset_time
+        self.reset_stats["total_reset_time"] += reset_time
+
+    def _capture_default_state(self):
+        model, data = get_mj_model_data(self)
+        if self._default_state_model is not model or self._default_state is None:
+            self._default_state = np.empty(mujoco.mj_stateSize(model, DEFAULT_STATE_SPEC), dtype=np.float64)
+            self._default_state_model = model
+        mujoco.mj_getState(model, data, self._default_state, DEFAULT_STATE_SPEC)
+
     def init_env(self):
         orca_logger.info(f"gym address: self.gym: {id(self.gym)}")
         self.model, self.data = self.initialize_simulation()
+        self.kinematics.invalidate()
+        self._default_state = None
         self.reset()
         orca_logger.info(f"gym address: self.gym: {id(self.gym)}")
+
+    def fetch_model_xml(self) -> str:
+        '''
+        @description: 下载服务端当前发布的模型xml, 不编译; 下一次initialize_simulation直接使用, 不重复下载
+        @return:
+            模型xml路径
+        '''
+        self._fetched_model_xml = self.loop.run_until_complete(self._load_model_xml())
+        return self._fetched_model_xml
+
+    def initialize_simulation(self):
+        '''
+        @description: 下载发布后的模型xml, 内容与缓存中的模型相同时换回缓存的模型, 否则编译并加入缓存
+        '''
+        start_time = time.perf_counter()
+        model_xml_path = self._fetched_model_xml if self._fetched_model_xml is not None else self.fetch_model_xml()
+        self._fetched_model_xml = None
+        key = model_content_key(model_xml_path)
+        self.model_key = key
+        if self.model_cache is None:
+            self.loop.run_until_complete(self._initialize_orca_sim(model_xml_path))
+            return self.gym.model, self.gym.data
+
+        gym_state = self.model_cache.get(key)
+        hit = gym_state is not None
+        if hit:
+            self._restore_gym_state(gym_state)
+        else:
+            self.loop.run_until_complete(self._initialize_orca_sim(model_xml_path))
+            gym_state = {attr: getattr(self.gym, attr) for attr in CACHED_GYM_ATTRS}
+            gym_state["_mjModel"] = copy.copy(self.gym._mjModel)
+            self.model_cache.put(key, gym_state)
+        self.model_cache.record_load_time(time.perf_counter() - start_time)
+        orca_logger.info(f"Model {key[:8]} {'hit' if hit else 'miss'} "
+                         f"in {self.model_cache.last_load_time * 1000:.0f}ms, cache stats: {self.model_cache.stats()}")
+        return self.gym.model, self.gym.data
+
+    def _restore_gym_state(self, gym_state: dict):
+        '''
+        @description: 换回缓存的模型, 新建MjData并按新模型的尺寸重新分配OrcaGymLocal的qpos/qvel/qacc缓冲,
+            与OrcaGymLocal.init_simulation的最后几步一致
+        '''
+        gym = self.gym
+        for attr in CACHED_GYM_ATTRS:
+            setattr(gym, attr, gym_state[attr])
+        # copy.copy(MjModel)是完整复制(mj_copyModel), 远比重新编译便宜
+        gym._mjModel = copy.copy(gym_state["_mjModel"])
+        gym._mjData = mujoco.MjData(gym._mjModel)
+        gym._qpos_cache = np.array(gym._mjData.qpos, copy=True)
+        gym._qvel_cache = np.array(gym._mjData.qvel, copy=True)
+        gym._qacc_cache = np.array(gym._mjData.qacc, copy=True)
+        gym.update_data()
         
     def set_default_joint_values(self, default_joint_values: dict[str, float]):
+        if default_joint_values != self.default_joint_values:
+            self._default_state = None
         self.default_joint_values = default_joint_values
         self._default_joint_qpos = {self.joint(joint_name): np.float32(value) for joint_name, value in default_joint_values.items()}
         self.set_joint_qpos(self._default_joint_qpos)
         
     def _set_obs_space(self):
-        self.observation_space = self.generate_observation_space(self._get_obs().copy())
+        self.observation_space = self.generate_observation_space(self._get_obs())
     
 
     def _set_action_space(self):
@@ -0,0 +1,62 @@
+import numpy as np
+from orca_gym.environment.orca_gym_local_env import OrcaGymLocalEnv
+
+
+class KinematicsCache:
+    '''
+    @description: 当前仿真帧的位姿缓存, 同一帧内多个控制器共享body和site位姿查询,
+                  环境在do_simulation/mj_forward之后调用invalidate使缓存失效
+    '''
+    def __init__(self, env: OrcaGymLocalEnv, cached: bool = True):
+        '''
+        @param:
+            env: 环境
+            cached: False时每次都重新查询, 用于不会调用invalidate的环境
+        '''
+        self.env = env
+        self.cached = cached
+        self._body_poses: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._site_poses: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self.frame = 0
+
+    def invalidate(self):
+        self._body_poses.clear()
+        self._site_poses.clear()
+        self.frame += 1
+
+    def body_pose(self, body_name: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''
+        @return:
+            xpos: (3,), xmat: (3, 3), xquat: (4,) 四元数(w, x, y, z)
+        '''
+        pose = self._body_poses.get(body_name, None)
+        if pose is None:
+            xpos, xmat, xquat = self.env.get_body_xpos_xmat_xquat([body_name])
+            pose = (np.asarray(xpos, dtype=np.float64)[:3],
+                    np.asarray(xmat, dtype=np.float64)[:9].reshape(3, 3),
+                    np.asarray(xquat, dtype=np.float64)[:4])
+            if self.cached:
+                self._body_poses[body_name] = pose
+        return pose
+
+    def site_pose(self, site_name: str) -> tuple[np.ndarray, np.ndarray]:
+        '''
+        @return:
+            xpos: (3,), xquat: (4,) 四元数(w, x, y, z)
+        '''
+        pose = self._site_poses.get(site_name, None)
+        if pose is None:
+            site_pos_quat = self.env.query_site_pos_and_quat([site_name])[site_name]
+            pose = (np.asarray(site_pos_quat["xpos"], dtype=np.float64),
+                    np.asarray(site_pos_quat["xquat"], dtype=np.float64))
+            if self.cached:
+                self._site_poses[site_name] = pose
+        return pose
+
+
+def get_kinematics_cache(env: OrcaGymLocalEnv) -> KinematicsCache:
+    '''
+    @description: 取环境共享的位姿缓存, 环境没有提供时返回不缓存的查询器
+    '''
+    kinematics = getattr(env, "kinematics", None)
+    return kinematics if kinematics is not None else KinematicsCache(env, cached=False)
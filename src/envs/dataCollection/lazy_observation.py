@@ -0,0 +1,45 @@
+from collections.abc import Iterator, Mapping
+from typing import Callable
+import numpy as np
+from orca_gym.environment.orca_gym_local_env import OrcaGymLocalEnv
+from orca_gym.log.orca_log import OrcaLog
+
+orca_logger = OrcaLog.get_instance()
+
+
+class LazyObservation(Mapping):
+    '''
+    @description: 延迟计算的观测, 第一次读取时才调用obs_callback, 没有读取的步(例如任务未开始)不产生观测开销;
+                  只在环境下一次步进或前向计算之前有效, 之后读取会报错
+    '''
+    __slots__ = ("_env", "_obs_callback", "_frame", "_obs")
+
+    def __init__(self, env: OrcaGymLocalEnv, obs_callback: Callable[[OrcaGymLocalEnv], dict]):
+        self._env = env
+        self._obs_callback = obs_callback
+        self._frame = env.kinematics.frame
+        self._obs: dict[str, np.ndarray] = None
+
+    @property
+    def computed(self) -> bool:
+        return self._obs is not None
+
+    def materialize(self) -> dict[str, np.ndarray]:
+        '''
+        @description: 计算并返回观测字典, obs_callback返回的数组之后不会再被写入, 调用方可以直接持有
+        '''
+        if self._obs is None:
+            if self._env.kinematics.frame != self._frame:
+                orca_logger.error(f"Observation of frame {self._frame} read at frame {self._env.kinematics.frame}")
+                raise ValueError("Lazy observation read after the simulation advanced")
+            self._obs = self._obs_callback(self._env)
+        return self._obs
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self.materialize()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.materialize())
+
+    def __len__(self) -> int:
+        return len(self.materialize())
@@ -0,0 +1,66 @@
+import os
+from typing import override
+import mujoco
+from orca_gym.core.orca_gym_local import OrcaGymLocal
+from orca_gym.log.orca_log import OrcaLog
+from envs.dataCollection.dataCollection_env import DataCollectionEnv
+from scene.physics_state import get_mj_model_data
+
+orca_logger = OrcaLog.get_instance()
+
+
+class LocalDataCollectionEnv(DataCollectionEnv):
+    '''
+    @description: 不连接OrcaGym服务的数据采集环境, 直接加载本地MJCF(通常由LocalMJCFScene合成),
+                  查询接口与DataCollectionEnv相同; 没有渲染服务, render和视频录制不生效
+    '''
+    def __init__(self, model_xml_path: str, **kwargs):
+        '''
+        @param:
+            model_xml_path: 本地MJCF路径, 每次init_env都从这里重新加载
+        '''
+        if not os.path.exists(model_xml_path):
+            orca_logger.error(f"Local model {model_xml_path} not found, publish the local scene first")
+            raise ValueError(f"Local model {model_xml_path} not found")
+        self.model_xml_path = model_xml_path
+        super().__init__(**kwargs)
+
+    @override
+    def initialize_grpc(self):
+        # 只使用OrcaGymLocal的本地仿真和查询, 不创建grpc通道
+        self.channel = None
+        self.stub = None
+        self.gym = OrcaGymLocal(self.stub)
+
+    @override
+    def pause_simulation(self):
+        pass
+
+    @override
+    async def _load_model_xml(self):
+        return self.model_xml_path
+
+    @override
+    def reset_simulation(self):
+        model, data = get_mj_model_data(self)
+        if model.nkey > 0:
+            mujoco.mj_resetDataKeyframe(model, data, 0)
+        else:
+            mujoco.mj_resetData(model, data)
+        self.mj_forward()
+
+    @override
+    def render(self):
+        pass
+
+    @override
+    def begin_save_video(self, file_path: str, *args, **kwargs):
+        orca_logger.warning("Local env has no render server, video is not saved")
+
+    @override
+    def stop_save_video(self, *args, **kwargs):
+        pass
+
+    @override
+    def close(self):
+        pass
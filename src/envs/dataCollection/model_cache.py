@@ -0,0 +1,69 @@
+import hashlib
+from collections import OrderedDict
+from orca_gym.log.orca_log import OrcaLog
+
+orca_logger = OrcaLog.get_instance()
+
+
+def model_content_key(model_xml_path: str) -> str:
+    '''
+    @description: 发布场景后下载的模型xml的内容哈希, 相同场景得到相同的键
+    '''
+    with open(model_xml_path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class ModelCache:
+    '''
+    @description: 按模型内容哈希缓存编译好的模型, 缓存的是未经修改的MjModel副本和只由模型决定的包装状态(见CACHED_GYM_ATTRS),
+                  再次发布相同场景时复制模型并新建MjData, 不重新编译
+    '''
+    def __init__(self, max_models: int = 4):
+        '''
+        @param:
+            max_models: 最多缓存多少个模型, 超出后淘汰最久未使用的模型
+        '''
+        self.max_models = max_models
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.load_time = 0.0
+        self.last_load_time = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> dict | None:
+        entry = self._entries.get(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, gym_state: dict):
+        self._entries[key] = gym_state
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_models:
+            evicted_key, _ = self._entries.popitem(last=False)
+            orca_logger.debug(f"Model cache evicted {evicted_key[:8]}")
+
+    def record_load_time(self, load_time: float):
+        self.last_load_time = load_time
+        self.load_time += load_time
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "models": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "load_time": self.load_time,
+            "last_load_time": self.last_load_time,
+        }
@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import mujoco
+import numpy as np
+from orca_gym.log.orca_log import OrcaLog
+from envs.dataCollection.dataCollection_env import DataCollectionEnv
+from scene.physics_state import get_mj_model_data
+
+orca_logger = OrcaLog.get_instance()
+
+
+class VectorDataCollectionEnv:
+    '''
+    @description: 同一进程内的多实例仿真, N个MjData共享DataCollectionEnv编译好的模型,
+                  物理步进在一个批量循环里完成, 可选线程池并行(mj_step执行时释放GIL);
+                  activate(i)把第i个实例换入环境, 控制器、任务、观测和场景放置照常通过环境的查询接口工作
+    '''
+    def __init__(self, env: DataCollectionEnv, num_instances: int, num_threads: int = 0):
+        '''
+        @param:
+            env: 已经创建的环境, 提供模型和查询接口
+            num_instances: 实例数量
+            num_threads: 物理步进的线程数, 0表示在主线程中逐个步进
+        '''
+        if num_instances < 1:
+            orca_logger.error(f"num_instances must be greater than 0, got {num_instances}")
+            raise ValueError("num_instances must be greater than 0")
+        self.env = env
+        self.num_instances = num_instances
+        self.model: mujoco.MjModel = None
+        self.datas: list[mujoco.MjData] = []
+        self.ctrls: list[np.ndarray] = []
+        self._executor = ThreadPoolExecutor(max_workers=num_threads) if num_threads > 0 else None
+        self._active_index: int = None
+        self.sync_model()
+
+    def sync_model(self) -> bool:
+        '''
+        @description: 环境重新加载模型(场景重新发布)后为每个实例重新创建MjData
+        @return:
+            是否重新创建了实例
+        '''
+        model, _ = get_mj_model_data(self.env)
+        if model is self.model:
+            return False
+        self.model = model
+        self.datas = [mujoco.MjData(model) for _ in range(self.num_instances)]
+        self.ctrls = [np.zeros(model.nu, dtype=np.float32) for _ in range(self.num_instances)]
+        return True
+
+    @contextmanager
+    def activate(self, index: int):
+        '''
+        @description: 把第index个实例的MjData和控制量换入环境, 退出时换回环境自己的数据;
+            换入换出后都刷新gym.data, 通过gym.data读取状态的查询看到的是当前激活的实例
+        '''
+        if self._active_index is not None:
+            orca_logger.error(f"Instance {self._active_index} is already active")
+            raise ValueError("Nested instance activation is not supported")
+        gym = self.env.gym
+        env_data, env_ctrl = gym._mjData, self.env.ctrl
+        gym._mjData, self.env.ctrl = self.datas[index], self.ctrls[index]
+        gym.update_data()
+        self._active_index = index
+        self.env.kinematics.invalidate()
+        try:
+            yield self.env
+        finally:
+            gym._mjData, self.env.ctrl = env_data, env_ctrl
+            gym.update_data()
+            self._active_index = None
+            self.env.kinematics.invalidate()
+
+    def reset(self, index: int):
+        '''
+        @description: 用环境缓存的默认状态重置第index个实例
+        '''
+        # 先在环境自己的数据上走一次fast_reset, 确保默认状态已经记录, 实例上只做一次写回
+        self.env.fast_reset(with_obs=False)
+        with self.activate(index):
+            self.env.fast_reset(with_obs=False)
+        self.ctrls[index][:] = 0.0
+
+    def step(self, ctrls: dict[int, np.ndarray]):
+        '''
+        @description: 写入控制量并步进frame_skip个物理步, 只步进ctrls中的实例
+        @param:
+            ctrls: {实例索引: 控制量}
+        '''
+        for index, ctrl in ctrls.items():
+            self.ctrls[index][:] = ctrl
+            self.datas[index].ctrl[:] = ctrl
+        if self._executor is not None and len(ctrls) > 1:
+            list(self._executor.map(self._step_instance, ctrls.keys()))
+        else:
+            for index in ctrls.keys():
+                self._step_instance(index)
+        self.env.kinematics.invalidate()
+
+    def _step_instance(self, index: int):
+        mujoco.mj_step(self.model, self.datas[index], nstep=self.env.frame_skip)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,330 @@
+'''
+无界面批量数据增强入口, 任务由yaml描述, 示例见 augment_job.yaml:
+
+    orca-augment path/to/augment_job.yaml
+
+每个源数据回合完成(数据写盘)后会向 <output>/.augment_progress/worker_XXX.jsonl 追加一条记录,
+任务被中断后重新运行同一份yaml, 已完成的源数据回合会被跳过。
+'''
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from yaml import load, Loader
+
+ENTRY_POINT = "envs.dataCollection.dataCollection_env:DataCollectionEnv"
+LOCAL_ENTRY_POINT = "envs.dataCollection.local_env:LocalDataCollectionEnv"
+PROGRESS_DIR = ".augment_progress"
+
+JOB_DEFAULTS = {
+    "hdf5_path": "record/proprio_stats.hdf5",
+    "orcagym_addr": "localhost:50051",
+    "agent_name": "openloong_gripper_2f85_fix_base_usda",
+    "env_name": "DataCollection",
+    "interpolator": None,
+    "variants_per_source": 1,
+    "pacing": "max",
+    "render": False,
+    "save_video": False,
+    "workers": 1,
+    "seed": None,
+    "batched_osc": False,
+    "instances": 1,
+    "instance_threads": 0,
+    "backend": "grpc",
+    "local_scene": None,
+}
+
+
+def load_job_spec(job_path: str) -> dict:
+    '''
+    @description: 读取任务描述文件, 补全默认值, 相对路径相对于任务文件所在目录
+    '''
+    with open(job_path, "r") as f:
+        job = load(f, Loader=Loader) or {}
+
+    for key in ["source_dataset", "output", "scene_config"]:
+        if job.get(key) is None:
+            raise ValueError(f"Augmentation job spec must set '{key}'")
+    job = {**JOB_DEFAULTS, **job}
+
+    job_dir = os.path.dirname(os.path.abspath(job_path))
+    for key in ["source_dataset", "output", "scene_config"]:
+        job[key] = os.path.join(job_dir, job[key]) if not os.path.isabs(job[key]) else job[key]
+
+    if job["pacing"] not in ["max", "realtime"]:
+        raise ValueError(f"Invalid pacing: {job['pacing']}, must be 'max' or 'realtime'")
+    if job["variants_per_source"] < 1 or job["workers"] < 1 or job["instances"] < 1:
+        raise ValueError("variants_per_source, workers and instances must be greater than 0")
+    if job["instances"] > 1 and not job["batched_osc"]:
+        raise ValueError("instances > 1 requires batched_osc: true, per-arm OSC controllers can't switch between instances")
+    if job["backend"] not in ["grpc", "local"]:
+        raise ValueError(f"Invalid backend: {job['backend']}, must be 'grpc' or 'local'")
+    if job["backend"] == "local":
+        local_scene = job["local_scene"]
+        if local_scene is None or local_scene.get("base_xml") is None:
+            raise ValueError("Local backend must set 'local_scene.base_xml'")
+        resolve = lambda path: os.path.join(job_dir, path) if not os.path.isabs(path) else path
+        job["local_scene"] = {
+            "base_xml": resolve(local_scene["base_xml"]),
+            "assets": {spawnable: asset if asset == "light" else resolve(asset)
+                       for spawnable, asset in (local_scene.get("assets") or {}).items()},
+        }
+    if isinstance(job["orcagym_addr"], str):
+        job["orcagym_addr"] = [job["orcagym_addr"]]
+    return job
+
+
+def create_interpolator(interpolator_spec: dict | None, rng=None):
+    '''
+    @description: 根据 {type: 类名, params: {...}} 创建插值器, 为空时不插值
+    @param:
+        rng: 插值噪声使用的随机数生成器
+    '''
+    from devices.Interpolator.abstract_interpolator import OpenLoongInterpolator, OpenLoongInterpolatorAdvanced
+
+    if interpolator_spec is None:
+        return None
+    interpolators = {
+        "OpenLoongInterpolator": OpenLoongInterpolator,
+        "OpenLoongInterpolatorAdvanced": OpenLoongInterpolatorAdvanced,
+    }
+    interpolator_type = interpolator_spec.get("type")
+    if interpolator_type not in interpolators:
+        raise ValueError(f"Invalid interpolator type: {interpolator_type}, must be one of {list(interpolators.keys())}")
+    return interpolators[interpolator_type](**interpolator_spec.get("params", {}), rng=rng)
+
+
+def list_source_units(source_dataset: str, hdf5_path: str) -> list[str]:
+    '''
+    @description: 列出源数据集下包含hdf5文件的单元数据目录, 按名称排序保证各次运行的划分一致
+    '''
+    return sorted(os.path.join(source_dataset, subdir) for subdir in os.listdir(source_dataset)
+                  if os.path.isfile(os.path.join(source_dataset, subdir, hdf5_path)))
+
+
+class ProgressManifest:
+    '''
+    @description: 追加写入的进度清单, 每个worker一个jsonl文件, 每行一条回合记录
+    '''
+    def __init__(self, output: str):
+        self.progress_dir = os.path.join(output, PROGRESS_DIR)
+        os.makedirs(self.progress_dir, exist_ok=True)
+
+    def worker_path(self, worker_id: int) -> str:
+        return os.path.join(self.progress_dir, f"worker_{worker_id:03d}.jsonl")
+
+    def append(self, worker_id: int, record: dict):
+        with open(self.worker_path(worker_id), "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def records(self) -> list[dict]:
+        records = []
+        for path in sorted(glob.glob(os.path.join(self.progress_dir, "worker_*.jsonl"))):
+            with open(path, "r") as f:
+                for line in f:
+                    line = line.strip()
+                    # 进程被杀时最后一行可能不完整, 直接忽略
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        return records
+
+    def finished_counts(self) -> dict[str, int]:
+        counts = {}
+        for record in self.records():
+            counts[record["source"]] = counts.get(record["source"], 0) + 1
+        return counts
+
+
+def plan_episodes(job: dict, manifest: ProgressManifest) -> list[str]:
+    '''
+    @description: 根据进度清单计算还需要回放的源数据目录(相对source_dataset), 每个源重复剩余的变体次数
+    '''
+    finished = manifest.finished_counts()
+    pending = []
+    for unit_path in list_source_units(job["source_dataset"], job["hdf5_path"]):
+        source = os.path.relpath(unit_path, job["source_dataset"])
+        pending.extend([source] * max(job["variants_per_source"] - finished.get(source, 0), 0))
+    return pending
+
+
+def run_worker(job: dict, worker_id: int, sources: list[str], run_id: str):
+    from orca_gym.log.orca_log import get_orca_logger
+    from conf import openloong_conf
+    from controllers import controllers
+    from dataCollectionManager.data_collection_manager import DataCollectionManager
+    from dataCollectionManager.vector_data_collection import VectorDataCollection
+    from dataStorage.openloong_data_storage import OpenLoongDataStorage
+    from devices.data_device import DataDevice
+    from scene.random_util import make_rng
+    from scene.local_scene import LocalMJCFScene
+    from scene.scene_manager import SceneManager
+    from task.pick_place_task import PickPlaceTask
+
+    orca_logger = get_orca_logger(name="DataCollection",
+                                  log_file=f"augment_worker_{worker_id:03d}.log",
+                                  max_bytes=10*1024*1024,
+                                  backup_count=5,
+                                  console_level="INFO",
+                                  file_level="DEBUG",
+                                  log_dir=os.path.join(job["output"], PROGRESS_DIR),
+                                  use_colors=True,
+                                  force_reinit=True)
+    orca_logger.info(f"Worker {worker_id}: {len(sources)} episodes to augment")
+
+    orcagym_addr = job["orcagym_addr"][worker_id % len(job["orcagym_addr"])]
+    default_joint_values = {}
+    for arm in [openloong_conf.l_arm, openloong_conf.r_arm]:
+        for joint_name, value in zip(arm["joint_names"], arm["neutral_joint_values"]):
+            default_joint_values[joint_name] = value
+
+    # 多实例时每个实例一个设备, 源数据按顺序轮流分配
+    instance_nums = min(job["instances"], len(sources))
+    # 每个worker使用独立的随机数生成器, 设置seed后可以复现; 生成器不是线程安全的,
+    # 主线程的场景随机化和任务目标用一个子序列, 每个设备在后台线程加载数据时的插值噪声各用一个子序列
+    scene_rng, *noise_rngs = make_rng(job["seed"], worker_id).spawn(1 + instance_nums)
+    data_devices = []
+    for index in range(instance_nums):
+        data_device = DataDevice(job["source_dataset"], job["hdf5_path"], interpolator=create_interpolator(job["interpolator"], noise_rngs[index]))
+        data_device.set_unit_datasets([os.path.join(job["source_dataset"], source) for source in sources[index::instance_nums]])
+        data_devices.append(data_device)
+    data_device = data_devices[0]
+
+    with open(job["scene_config"], "r") as f:
+        config = load(f, Loader=Loader)
+    # 本地后端在worker内合成场景MJCF并直接加载, 不连接OrcaGym服务
+    local_scene, local_model_xml = None, None
+    if job["backend"] == "local":
+        local_model_xml = os.path.join(job["output"], PROGRESS_DIR, f"local_scene_{worker_id:03d}.xml")
+        local_scene = LocalMJCFScene(job["local_scene"]["base_xml"], job["local_scene"]["assets"], local_model_xml)
+
+    scene_manager = SceneManager(orcagym_addr, config=config, scene=local_scene, rng=scene_rng,
+                                 config_dir=os.path.dirname(job["scene_config"]))
+
+    data_storage = OpenLoongDataStorage(dataset_path=job["output"], hdf5_path=job["hdf5_path"])
+    data_storage.set_video_path("video")
+
+    data_collection_manager = DataCollectionManager(
+        agent_name=job["agent_name"],
+        env_name=job["env_name"],
+        entry_point=LOCAL_ENTRY_POINT if local_scene is not None else ENTRY_POINT,
+        default_joint_values=default_joint_values,
+        obs_callback=data_storage.obs_callback,
+        env_index=worker_id,
+        orcagym_addr=orcagym_addr,
+        device=data_device,
+        scene_manager=scene_manager,
+        data_storage=data_storage,
+        local_model_xml=local_model_xml,
+    )
+    env = data_collection_manager.env
+    env.reset()
+
+    data_collection_manager.mode = DataCollectionManager.DataCollectionMode.AUGMENTATION
+    data_collection_manager.save_video = job["save_video"]
+    data_collection_manager.render = job["render"]
+    data_collection_manager.realtime_pacing = job["pacing"] == "realtime"
+    data_collection_manager.set_disable_actuator_group([openloong_conf.positions_group])
+
+    def add_controllers(target, device: DataDevice):
+        # target是DataCollectionManager或多实例中的VectorInstance, 接口相同
+        if job["batched_osc"]:
+            controllers.add_dual_arm_osc_openloong_data_controller(target, env, [openloong_conf.l_arm, openloong_conf.r_arm], openloong_conf.base_body, device)
+        else:
+            controllers.add_arm_osc_openloong_data_controller(target, env, openloong_conf.l_arm, openloong_conf.base_body, device, left_arm=True)
+            controllers.add_arm_osc_openloong_data_controller(target, env, openloong_conf.r_arm, openloong_conf.base_body, device, left_arm=False)
+        controllers.add_gripper_2f85_openloong_data_controller(target, env, openloong_conf.gripper_2f85_l, openloong_conf.base_body, device, left_gripper=True)
+        controllers.add_gripper_2f85_openloong_data_controller(target, env, openloong_conf.gripper_2f85_r, openloong_conf.base_body, device, left_gripper=False)
+        target.set_task(PickPlaceTask(env))
+        controllers.add_task_status_openloong_data_controller(target, env, device, openloong_conf.base_body)
+
+    vector_data_collection = None
+    if instance_nums > 1:
+        vector_data_collection = VectorDataCollection(data_collection_manager, instance_nums, job["instance_threads"])
+        for instance, device in zip(vector_data_collection.instances, data_devices):
+            instance.set_device(device)
+            storage = data_storage if instance.index == 0 else OpenLoongDataStorage(dataset_path=job["output"], hdf5_path=job["hdf5_path"])
+            instance.set_data_storage(storage)
+            add_controllers(instance, device)
+    else:
+        add_controllers(data_collection_manager, data_device)
+
+    manifest = ProgressManifest(job["output"])
+
+    def record_episode(episode_record: dict):
+        manifest.append(worker_id, {
+            "run_id": run_id,
+            "source": os.path.relpath(episode_record["source"], job["source_dataset"]),
+            "success": episode_record["success"],
+            "time": time.time(),
+        })
+
+    data_collection_manager.add_episode_end_callback(record_episode)
+    if vector_data_collection is not None:
+        vector_data_collection.run()
+    else:
+        data_collection_manager.run()
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Headless batch data augmentation")
+    parser.add_argument("job", help="augmentation job spec (yaml)")
+    args = parser.parse_args(argv)
+
+    job = load_job_spec(args.job)
+    manifest = ProgressManifest(job["output"])
+    pending = plan_episodes(job, manifest)
+    run_id = str(uuid.uuid4())
+    print(f"Augmentation job: {len(pending)} episodes pending, {job['workers']} workers, run id {run_id}")
+    if len(pending) == 0:
+        return
+
+    # 按源数据分组轮流分配, 同一源的变体留在同一个worker上
+    sources = {}
+    for source in pending:
+        sources[source] = sources.get(source, 0) + 1
+    shards = [[] for _ in range(min(job["workers"], len(sources)))]
+    for i, (source, count) in enumerate(sources.items()):
+        shards[i % len(shards)].extend([source] * count)
+
+    start_time = time.time()
+    if len(shards) == 1:
+        run_worker(job, 0, shards[0], run_id)
+    else:
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=run_worker, args=(job, worker_id, shard, run_id))
+                   for worker_id, shard in enumerate(shards) if len(shard) > 0]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    elapsed_time = time.time() - start_time
+
+    records = [record for record in manifest.records() if record.get("run_id") == run_id]
+    episodes = len(records)
+    successes = sum(1 for record in records if record["success"])
+    episodes_per_hour = episodes / elapsed_time * 3600 if elapsed_time > 0 else 0.0
+    success_yield = successes / episodes if episodes > 0 else 0.0
+    remaining = len(plan_episodes(job, manifest))
+    print(f"Augmented {episodes} episodes in {elapsed_time:.1f}s: "
+          f"{episodes_per_hour:.1f} episodes/hour, "
+          f"success yield {success_yield * 100:.1f}% ({successes}/{episodes}), "
+          f"{remaining} episodes remaining")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+'''
+离线生成物理稳定的场景布局池:
+
+    orca-layout-pool example.yaml --nums 2000
+
+按 actor.random 配置采样布局, 仿真到物体静止, 过滤掉掉落或不满足任务前置条件的布局,
+保存为 <output>/layout_pool_<配置哈希>.npz。在场景配置中设置 actor.random.layout_pool: <output>,
+SceneManager 每个回合直接从布局池中取一个布局。相对路径都相对于场景配置文件所在目录。
+'''
+import argparse
+import os
+import sys
+
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from yaml import load, Loader
+
+ENTRY_POINT = "envs.dataCollection.dataCollection_env:DataCollectionEnv"
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Build a physics-settled scene layout pool")
+    parser.add_argument("config", help="scene config (yaml)")
+    parser.add_argument("--nums", type=int, default=1000, help="number of layouts")
+    parser.add_argument("--output", default=None, help="layout pool directory, default actor.random.layout_pool in config")
+    parser.add_argument("--orcagym-addr", default="localhost:50051")
+    parser.add_argument("--agent-name", default="openloong_gripper_2f85_fix_base_usda")
+    parser.add_argument("--max-steps", type=int, default=200, help="max control steps to settle a layout")
+    parser.add_argument("--velocity-tolerance", type=float, default=1e-3)
+    parser.add_argument("--min-height", type=float, default=None, help="drop layouts whose actors settle below this height")
+    args = parser.parse_args(argv)
+
+    from orca_gym.log.orca_log import get_orca_logger
+    from conf import openloong_conf
+    from dataCollectionManager.data_collection_manager import DataCollectionManager
+    from scene.layout_pool import build_layout_pool, layout_pool_path, resolve_layout_pool_dir
+    from scene.scene_manager import SceneManager
+    from task.pick_place_task import PickPlaceTask
+
+    orca_logger = get_orca_logger(name="DataCollection", console_level="INFO", use_colors=True, force_reinit=True)
+
+    with open(args.config, "r") as f:
+        config = load(f, Loader=Loader)
+    output = args.output if args.output is not None else config.get("actor", {}).get("random", {}).get("layout_pool", None)
+    if output is None:
+        raise ValueError("Layout pool directory is not set, use --output or actor.random.layout_pool")
+    # 和SceneManager一样, 相对路径相对于配置文件所在目录
+    output = resolve_layout_pool_dir(output, os.path.dirname(os.path.abspath(args.config)))
+
+    default_joint_values = {}
+    for arm in [openloong_conf.l_arm, openloong_conf.r_arm]:
+        for joint_name, value in zip(arm["joint_names"], arm["neutral_joint_values"]):
+            default_joint_values[joint_name] = value
+
+    # 生成布局池时不能再从旧的布局池中取布局
+    pool_config = {**config, "actor": {**config.get("actor", {})}}
+    pool_config["actor"]["random"] = {key: value for key, value in config.get("actor", {}).get("random", {}).items() if key != "layout_pool"}
+    scene_manager = SceneManager(args.orcagym_addr, config=pool_config)
+    data_collection_manager = DataCollectionManager(
+        agent_name=args.agent_name,
+        env_name="LayoutPool",
+        entry_point=ENTRY_POINT,
+        default_joint_values=default_joint_values,
+        obs_callback=lambda env: {},
+        orcagym_addr=args.orcagym_addr,
+        scene_manager=scene_manager,
+    )
+    env = data_collection_manager.env
+    env.reset()
+    data_collection_manager.set_disable_actuator_group([openloong_conf.positions_group])
+    scene_manager.spawn_scene()
+    env.disable_actuator(data_collection_manager.disable_actuator_group)
+
+    task = PickPlaceTask(env)
+    min_height = args.min_height
+    if min_height is None:
+        min_height = config.get("task", {}).get("failure", {}).get("min_height", None)
+    layout_pool = build_layout_pool(scene_manager, env, default_joint_values, args.nums,
+                                    layout_filter=task.get_layout_filter(scene_manager),
+                                    min_height=min_height,
+                                    max_steps=args.max_steps,
+                                    velocity_tolerance=args.velocity_tolerance)
+
+    pool_path = layout_pool_path(output, scene_manager.get_actor_config())
+    layout_pool.save(pool_path)
+    orca_logger.info(f"Saved {len(layout_pool)} layouts to {pool_path}")
+    env.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -60,7 +60,7 @@ def main():
     orca_logger.info("Creating scene manager")
     with open(os.path.join(base_dir, "example.yaml"), "r") as f:
         config = load(f, Loader=Loader)
-    scene_manager = SceneManager(orcagym_addr, config=config)
+    scene_manager = SceneManager(orcagym_addr, config=config, config_dir=base_dir)
 
     orca_logger.info("Creating data storage")
     data_storage = OpenLoongDataStorage(dataset_path=os.path.join(base_dir, "aug_dataset"), hdf5_path="record/proprio_stats.hdf5")
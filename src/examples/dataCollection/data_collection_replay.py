@@ -0,0 +1,121 @@
+import argparse
+import os
+import sys
+import time
+
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from scene.scene_manager import SceneManager
+from task.pick_place_task import PickPlaceTask
+from devices.replay_device import PicoReplayDevice
+from orca_gym.devices.pico_joytsick import PicoJoystickKey
+from orca_gym.environment.orca_gym_local_env import OrcaGymLocalEnv
+from orca_gym.log.orca_log import get_orca_logger, OrcaLog
+import numpy as np
+from dataCollectionManager.data_collection_manager import DataCollectionManager
+from controllers import controllers
+from conf import openloong_conf
+from yaml import load, Loader
+from dataStorage.openloong_data_storage import OpenLoongDataStorage
+
+ENTRY_POINT = "envs.dataCollection.dataCollection_env:DataCollectionEnv"
+
+base_dir = os.path.dirname(os.path.realpath(__file__))
+log_dir = os.path.join(base_dir, "logs")
+log_file = "data_collection_replay.log"
+
+orca_logger = get_orca_logger(name="DataCollection", 
+                              log_file=log_file, 
+                              max_bytes=10*1024*1024, 
+                              backup_count=5, 
+                              console_level="INFO", 
+                              file_level="INFO",
+                              log_dir=log_dir,
+                              use_colors=True,
+                              force_reinit=True)
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Replay a recorded pico input log without the VR device")
+    parser.add_argument("input_log", help="pico input log recorded by data_collection_tele.py")
+    parser.add_argument("--scene_config", default=os.path.join(base_dir, "example.yaml"))
+    parser.add_argument("--dataset", default=os.path.join(base_dir, "replay_dataset"))
+    parser.add_argument("--render", action="store_true")
+    parser.add_argument("--rewind", action="store_true", help="the input log was recorded with --rewind")
+    args = parser.parse_args(argv)
+
+    orca_logger.info(f"log file: {log_file}")
+    orca_logger.info(f"log dir: {log_dir}")
+
+    orcagym_addr = "localhost:50051"
+    env_name = "DataCollectionReplay"
+    env_index = 0
+    agent_name = "openloong_gripper_2f85_fix_base_usda"
+    default_joint_values = {}
+
+    for joint_name, value in zip(openloong_conf.l_arm["joint_names"], openloong_conf.l_arm["neutral_joint_values"]):
+        default_joint_values[joint_name] = value
+    for joint_name, value in zip(openloong_conf.r_arm["joint_names"], openloong_conf.r_arm["neutral_joint_values"]):
+        default_joint_values[joint_name] = value
+    
+    orca_logger.info("Creating replay device")
+    pico_joystick_device = PicoReplayDevice(args.input_log)
+
+    orca_logger.info("Creating scene manager")
+    with open(args.scene_config, "r") as f:
+        config = load(f, Loader=Loader)
+    scene_manager = SceneManager(orcagym_addr, config=config, config_dir=os.path.dirname(os.path.abspath(args.scene_config)))
+
+    orca_logger.info("Creating data storage")
+    data_storage = OpenLoongDataStorage(dataset_path=args.dataset, hdf5_path="record/proprio_stats.hdf5")
+    data_storage.set_video_path("video")
+
+    orca_logger.info("Creating data collection manager")
+    data_collection_manager = DataCollectionManager(
+        agent_name=agent_name,
+        env_name=env_name,
+        entry_point=ENTRY_POINT,
+        default_joint_values=default_joint_values,
+        obs_callback=data_storage.obs_callback,
+        env_index=env_index,
+        device=pico_joystick_device,
+        scene_manager=scene_manager,
+        data_storage=data_storage,
+    )
+    env = data_collection_manager.env
+    env.reset()
+
+    orca_logger.info("Disabling position controller")
+    data_collection_manager.set_disable_actuator_group([openloong_conf.positions_group])
+
+    orca_logger.info("Creating left gripper controller")
+    controllers.add_gripper_2f85_pico_controller(data_collection_manager, env, openloong_conf.gripper_2f85_l, openloong_conf.base_body, pico_joystick_device, [PicoJoystickKey.X, PicoJoystickKey.Y, PicoJoystickKey.L_TRIGGER])
+    
+    orca_logger.info("Creating right gripper controller")
+    controllers.add_gripper_2f85_pico_controller(data_collection_manager, env, openloong_conf.gripper_2f85_r, openloong_conf.base_body, pico_joystick_device, [PicoJoystickKey.A, PicoJoystickKey.B, PicoJoystickKey.R_TRIGGER])
+    
+    orca_logger.info("Creating left arm controller")
+    controllers.add_arm_osc_pico_controller(data_collection_manager, env, openloong_conf.l_arm, openloong_conf.base_body, pico_joystick_device, PicoJoystickKey.L_TRANSFORM)
+    
+    orca_logger.info("Creating right arm controller")
+    controllers.add_arm_osc_pico_controller(data_collection_manager, env, openloong_conf.r_arm, openloong_conf.base_body, pico_joystick_device, PicoJoystickKey.R_TRANSFORM)
+    
+    orca_logger.info("Creating pick place task")
+    data_collection_manager.set_task(PickPlaceTask(env))
+    controllers.add_task_status_pico_controller(data_collection_manager, env, pico_joystick_device, openloong_conf.base_body)
+    # 与录制时绑定相同的回退按键, 回放出相同的回退
+    if args.rewind:
+        controllers.add_rewind_pico_controller(data_collection_manager, pico_joystick_device)
+
+    # 全速回放, 不等待真实时间
+    data_collection_manager.save_video = False
+    data_collection_manager.render = args.render
+    data_collection_manager.realtime_pacing = False
+    
+    data_collection_manager.run()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
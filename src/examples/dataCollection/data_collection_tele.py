@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 import time
@@ -37,7 +38,13 @@ orca_logger = get_orca_logger(name="DataCollection",
                               force_reinit=True)
 
 
-def main():
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Teleoperated data collection with the pico joystick")
+    parser.add_argument("--no_input_log", action="store_true", help="don't record the raw pico input log for replay")
+    parser.add_argument("--rewind", action="store_true",
+                        help="rewind to the last checkpoint with the right grip button, disables video recording")
+    args = parser.parse_args(argv)
+
     orca_logger.info(f"log file: {log_file}")
     orca_logger.info(f"log dir: {log_dir}")
 
@@ -53,12 +60,17 @@ def main():
         default_joint_values[joint_name] = value
     
     orca_logger.info("Creating device")
-    pico_joystick_device = PicoJoystickDevice(PicoJoystick())
+    # 后台线程读取手柄, 控制循环不等待输入I/O
+    # 默认同时记录手柄原始输入, 可以用 data_collection_replay.py 无界面全速重新仿真, --no_input_log 关闭
+    input_log_path = None
+    if not args.no_input_log:
+        input_log_path = os.path.join(log_dir, f"pico_input_{time.strftime('%Y%m%d_%H%M%S')}.bin")
+    pico_joystick_device = PicoJoystickDevice(PicoJoystick(), threaded=True, input_log_path=input_log_path)
 
     orca_logger.info("Creating scene manager")
     with open(os.path.join(base_dir, "example.yaml"), "r") as f:
         config = load(f, Loader=Loader)
-    scene_manager = SceneManager(orcagym_addr, config=config)
+    scene_manager = SceneManager(orcagym_addr, config=config, config_dir=base_dir)
 
     orca_logger.info("Creating data storage")
     data_storage = OpenLoongDataStorage(dataset_path=os.path.join(base_dir, "dataset"), hdf5_path="record/proprio_stats.hdf5")
@@ -97,10 +109,16 @@ def main():
     orca_logger.info("Creating pick place task")
     data_collection_manager.set_task(PickPlaceTask(env))
     controllers.add_task_status_pico_controller(data_collection_manager, env, pico_joystick_device, openloong_conf.base_body)
+    # 右手握把键回退到上一个检查点; 录制的视频无法截断, 开启回退时不录制视频
+    if args.rewind:
+        controllers.add_rewind_pico_controller(data_collection_manager, pico_joystick_device)
 
-    data_collection_manager.save_video = True
+    data_collection_manager.save_video = not args.rewind
     
-    data_collection_manager.run()
+    try:
+        data_collection_manager.run()
+    finally:
+        pico_joystick_device.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import numpy as np
+from orca_gym.environment import OrcaGymLocalEnv
+from orca_gym.log import OrcaLog
+from scene.random_util import default_rng
+
+orca_log = OrcaLog.get_instance()
+
+
+def actor_config_hash(actor_config: dict) -> str:
+    '''
+    @description: actor配置的内容哈希, 配置变化后旧的布局池不再匹配
+    '''
+    actor_config = dict(actor_config)
+    # 布局池目录本身不影响布局内容
+    actor_config["random"] = {key: value for key, value in actor_config.get("random", {}).items() if key != "layout_pool"}
+    content = json.dumps(actor_config, sort_keys=True, default=str)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+
+def resolve_layout_pool_dir(pool_dir: str, config_dir: str = None) -> str:
+    '''
+    @description: actor.random.layout_pool中的相对路径相对于场景配置文件所在目录, 生成和使用布局池时解析方式一致
+    @param:
+        config_dir: 场景配置文件所在目录, None时相对于当前工作目录
+    '''
+    if config_dir is None or os.path.isabs(pool_dir):
+        return pool_dir
+    return os.path.join(config_dir, pool_dir)
+
+
+def layout_pool_path(pool_dir: str, actor_config: dict) -> str:
+    return os.path.join(pool_dir, f"layout_pool_{actor_config_hash(actor_config)}.npz")
+
+
+class LayoutPool:
+    '''
+    @description: 预先生成并经过物理稳定的场景布局池
+        joint_names: (A,) 6自由度actor的关节名称
+        qpos: (N, A, 7) 每个布局中每个actor的关节位置, 不在场景中的actor为停放位置
+        in_scene: (N, A) 每个布局中哪些actor在场景中
+    '''
+    def __init__(self, joint_names: list[str], qpos: np.ndarray, in_scene: np.ndarray, config_hash: str):
+        self.joint_names = list(joint_names)
+        self.qpos = np.asarray(qpos, dtype=np.float32)
+        self.in_scene = np.asarray(in_scene, dtype=bool)
+        self.config_hash = config_hash
+
+    def __len__(self) -> int:
+        return len(self.qpos)
+
+    def draw(self, index: int = None, rng: np.random.Generator = None) -> tuple[dict[str, np.ndarray], list[str]]:
+        '''
+        @description: 随机取出一个布局
+        @return:
+            actors_qpos: {关节名称: 关节位置}, 包含所有actor
+            in_scene_actors: 在场景中的actor关节名称
+        '''
+        if index is None:
+            rng = rng if rng is not None else default_rng()
+            index = rng.integers(len(self))
+        actors_qpos = {joint_name: self.qpos[index, i].astype(np.float64) for i, joint_name in enumerate(self.joint_names)}
+        in_scene_actors = [joint_name for i, joint_name in enumerate(self.joint_names) if self.in_scene[index, i]]
+        return actors_qpos, in_scene_actors
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(path,
+                            joint_names=np.array(self.joint_names),
+                            qpos=self.qpos,
+                            in_scene=self.in_scene,
+                            config_hash=np.array(self.config_hash))
+
+    @classmethod
+    def load(cls, path: str) -> "LayoutPool":
+        with np.load(path) as f:
+            return cls([str(name) for name in f["joint_names"]], f["qpos"], f["in_scene"], str(f["config_hash"]))
+
+
+def settle_actors(env: OrcaGymLocalEnv,
+                  joint_names: list[str],
+                  default_joint_values: dict[str, float],
+                  max_steps: int = 200,
+                  velocity_tolerance: float = 1e-3) -> bool:
+    '''
+    @description: 让场景中的物体在重力下落稳, 机器人每一步都被拉回默认关节位置, 避免碰到物体
+    @param:
+        joint_names: 需要检查速度的actor关节
+        max_steps: 最多仿真多少个控制周期
+        velocity_tolerance: 关节速度绝对值都小于该值时认为已经静止
+    @return:
+        是否在max_steps之内静止
+    '''
+    for _ in range(max_steps):
+        env.set_default_joint_values(default_joint_values)
+        env.do_simulation(env.ctrl, env.frame_skip)
+        qvel = env.query_joint_qvel(joint_names)
+        if all(np.max(np.abs(qvel[joint_name])) < velocity_tolerance for joint_name in joint_names):
+            return True
+    return False
+
+
+def build_layout_pool(scene_manager,
+                      env: OrcaGymLocalEnv,
+                      default_joint_values: dict[str, float],
+                      nums: int,
+                      layout_filter = None,
+                      min_height: float = None,
+                      max_steps: int = 200,
+                      velocity_tolerance: float = 1e-3,
+                      max_attempts: int = None) -> LayoutPool:
+    '''
+    @description: 按actor.random配置采样布局, 仿真到物体静止, 过滤掉无效布局后生成布局池
+    @param:
+        scene_manager: 场景管理器, 场景需要已经生成
+        env: 环境
+        default_joint_values: 机器人默认关节位置
+        nums: 需要的布局数量
+        layout_filter: 可选, 任务前置条件, 对静止后的位置再检查一次
+        min_height: 可选, 静止后物体高度低于该值(掉下桌面)的布局无效
+    '''
+    if len(scene_manager.spec.actor.six_dof_indices) != len(scene_manager.spec.actor.names):
+        orca_log.error("Layout pool only supports 6 dof actors")
+        raise ValueError("Layout pool only supports 6 dof actors")
+    joint_names = scene_manager.get_six_dof_joints_in_env()
+    max_attempts = max_attempts if max_attempts is not None else nums * 10
+    qpos_list, in_scene_list = [], []
+    attempts = 0
+    while len(qpos_list) < nums and attempts < max_attempts:
+        attempts += 1
+        if hasattr(env, "fast_reset"):
+            env.fast_reset(with_obs=False)
+        else:
+            env.reset()
+        scene_manager.update_actor_qpos(layout_filter=layout_filter)
+        in_scene_actors = [actor_info["joint_name"] for actor_info in scene_manager.get_scene_info().values()]
+        in_scene_actors = [joint_name for joint_name in in_scene_actors if joint_name in joint_names]
+        if len(in_scene_actors) > 0 and not settle_actors(env, in_scene_actors, default_joint_values, max_steps, velocity_tolerance):
+            continue
+
+        qpos = env.query_joint_qpos(joint_names)
+        positions = np.array([qpos[joint_name][:3] for joint_name in in_scene_actors]).reshape(-1, 3)
+        if min_height is not None and np.any(positions[:, 2] < min_height):
+            continue
+        if layout_filter is not None and len(positions) > 0 and not np.all(layout_filter(positions)):
+            continue
+
+        qpos_list.append(np.array([qpos[joint_name] for joint_name in joint_names], dtype=np.float32))
+        in_scene_list.append(np.array([joint_name in in_scene_actors for joint_name in joint_names], dtype=bool))
+        if len(qpos_list) % 100 == 0:
+            orca_log.info(f"Layout pool: {len(qpos_list)}/{nums} layouts after {attempts} attempts")
+
+    orca_log.info(f"Layout pool: {len(qpos_list)} valid layouts from {attempts} attempts")
+    return LayoutPool(joint_names,
+                      np.array(qpos_list, dtype=np.float32).reshape(-1, len(joint_names), 7),
+                      np.array(in_scene_list, dtype=bool).reshape(-1, len(joint_names)),
+                      actor_config_hash(scene_manager.get_actor_config()))
@@ -0,0 +1,112 @@
+import os
+import mujoco
+import numpy as np
+from orca_gym.environment import OrcaGymLocalEnv
+from orca_gym.log import OrcaLog
+from scene.physics_state import get_mj_model_data
+
+orca_log = OrcaLog.get_instance()
+
+# asset_map中表示灯光的资产, 灯光直接在世界中创建MuJoCo灯光, 不需要MJCF文件
+LIGHT_ASSET = "light"
+
+
+def xyzw_to_wxyz(quat) -> np.ndarray:
+    quat = np.asarray(quat, dtype=np.float64)
+    return np.array([quat[3], quat[0], quat[1], quat[2]], dtype=np.float64)
+
+
+def light_direction(quat_wxyz: np.ndarray) -> np.ndarray:
+    '''
+    @description: 灯光默认朝向-z, 按旋转得到世界坐标系下的方向
+    '''
+    mat = np.zeros(9, dtype=np.float64)
+    mujoco.mju_quat2Mat(mat, quat_wxyz)
+    return -mat.reshape(3, 3)[:, 2]
+
+
+class LocalMJCFScene:
+    '''
+    @description: 本地场景服务, 接口与OrcaGymScene一致, 不需要OrcaStudio和OrcaGym服务;
+                  发布场景时把actor的MJCF挂到导出的基础场景上(关节带actor名称前缀, 与OrcaStudio导出一致),
+                  写出合成后的MJCF, 环境从该文件加载; 位姿和灯光开关直接修改环境中已加载的模型
+    '''
+    def __init__(self, base_xml: str, asset_map: dict[str, str], model_xml_path: str):
+        '''
+        @param:
+            base_xml: 从OrcaStudio导出的基础场景MJCF(包含机器人和静态场景)
+            asset_map: {actor的spawnable资产路径: actor的MJCF文件或LIGHT_ASSET}, MJCF中的网格等资源需要使用绝对路径
+            model_xml_path: 合成后的MJCF写出路径, 与LocalDataCollectionEnv的model_xml_path一致
+        '''
+        if not os.path.exists(base_xml):
+            orca_log.error(f"Base scene {base_xml} not found")
+            raise ValueError(f"Base scene {base_xml} not found")
+        self.base_xml = base_xml
+        self.asset_map = asset_map
+        self.model_xml_path = model_xml_path
+        self.actors = []
+        self.published_actors = []
+        self.publish_count = 0
+        self.env: OrcaGymLocalEnv = None
+        # 先发布只有基础场景的模型, 环境创建时就可以加载
+        self.publish_scene()
+
+    def set_env(self, env: OrcaGymLocalEnv):
+        self.env = env
+
+    def add_actor(self, actor):
+        if actor.spawnable_name not in self.asset_map:
+            orca_log.error(f"No local asset for {actor.spawnable_name}")
+            raise ValueError(f"No local asset for {actor.spawnable_name}")
+        if actor.scale != 1.0:
+            orca_log.warning(f"Local scene ignores scale of {actor.name}")
+        self.actors.append(actor)
+
+    def publish_scene(self):
+        '''
+        @description: 合成基础场景和暂存的actor, 写出MJCF, 环境在init_env时重新加载
+        '''
+        spec = mujoco.MjSpec.from_file(self.base_xml)
+        for actor in self.actors:
+            quat = xyzw_to_wxyz(actor.rotation)
+            asset = self.asset_map[actor.spawnable_name]
+            if asset == LIGHT_ASSET:
+                spec.worldbody.add_light(name=actor.name, pos=np.asarray(actor.position, dtype=np.float64), dir=light_direction(quat))
+                continue
+            frame = spec.worldbody.add_frame(pos=np.asarray(actor.position, dtype=np.float64), quat=quat)
+            spec.attach(mujoco.MjSpec.from_file(asset), prefix=f"{actor.name}_", frame=frame)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.model_xml_path)), exist_ok=True)
+        # 先写临时文件再替换, 环境不会读到写了一半的文件
+        tmp_path = self.model_xml_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(spec.to_xml())
+        os.replace(tmp_path, self.model_xml_path)
+        self.published_actors = self.actors
+        self.actors = []
+        self.publish_count += 1
+        orca_log.info(f"Local scene published with {len(self.published_actors)} actors to {self.model_xml_path}")
+
+    def set_actor_transform(self, actor_name: str, position: np.ndarray, rotation: np.ndarray, scale: float = 1.0):
+        '''
+        @description: 原地修改已加载模型中actor根体或灯光的位姿
+        '''
+        model = self._loaded_model()
+        quat = xyzw_to_wxyz(rotation)
+        light_id = mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_LIGHT, actor_name)
+        if light_id >= 0:
+            model.light_pos[light_id] = position
+            model.light_dir[light_id] = light_direction(quat)
+            return
+        prefix = f"{actor_name}_"
+        for body_id in range(1, model.nbody):
+            if model.body_parentid[body_id] == 0 and mujoco.mj_id2name(model, mujoco.mjtObj.mjOBJ_BODY, body_id).startswith(prefix):
+                model.body_pos[body_id] = position
+                model.body_quat[body_id] = quat
+
+    def _loaded_model(self) -> mujoco.MjModel:
+        if self.env is None:
+            orca_log.error("Local scene needs the env to update the loaded model")
+            raise ValueError("Local scene needs the env to update the loaded model")
+        model, _ = get_mj_model_data(self.env)
+        return model
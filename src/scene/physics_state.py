@@ -0,0 +1,94 @@
+import base64
+import mujoco
+import numpy as np
+from orca_gym.environment import OrcaGymLocalEnv
+from orca_gym.log import OrcaLog
+
+orca_log = OrcaLog.get_instance()
+
+# scene_info中保存物理状态的键, 与actor名称区分开
+PHYSICS_STATE_KEY = "__physics_state__"
+
+# 与mj_getState一致的状态组成: time, qpos, qvel, act
+PHYSICS_STATE_SPEC = (mujoco.mjtState.mjSTATE_TIME
+                      | mujoco.mjtState.mjSTATE_QPOS
+                      | mujoco.mjtState.mjSTATE_QVEL
+                      | mujoco.mjtState.mjSTATE_ACT)
+
+
+def get_mj_model_data(env: OrcaGymLocalEnv) -> tuple[mujoco.MjModel, mujoco.MjData]:
+    '''
+    @description: 获取环境底层的MjModel和MjData, 本地仿真时才可用
+    '''
+    return env.gym._mjModel, env.gym._mjData
+
+
+def get_physics_state_vector(env: OrcaGymLocalEnv, out: np.ndarray = None) -> np.ndarray:
+    '''
+    @description: 读取当前物理状态向量(PHYSICS_STATE_SPEC), 用于内存中的快照
+    @param:
+        out: 可选, 复用的输出数组
+    '''
+    model, data = get_mj_model_data(env)
+    if out is None:
+        out = np.empty(mujoco.mj_stateSize(model, PHYSICS_STATE_SPEC), dtype=np.float64)
+    mujoco.mj_getState(model, data, out, PHYSICS_STATE_SPEC)
+    return out
+
+
+def set_physics_state_vector(env: OrcaGymLocalEnv, state: np.ndarray):
+    '''
+    @description: 一次性写回get_physics_state_vector读取的状态向量, 并做一次前向计算
+    '''
+    model, data = get_mj_model_data(env)
+    mujoco.mj_setState(model, data, state, PHYSICS_STATE_SPEC)
+    env.mj_forward()
+
+
+def get_model_names(model: mujoco.MjModel, obj_type: mujoco.mjtObj, count: int) -> list[str]:
+    return [mujoco.mj_id2name(model, obj_type, i) for i in range(count)]
+
+
+def capture_physics_state(env: OrcaGymLocalEnv) -> dict:
+    '''
+    @description: 将当前物理状态打包成可以写入json的字典
+    @return:
+        {"spec": 状态组成, "nq", "nv", "na": 模型维度,
+         "joints", "actuators": 按模型顺序的关节和执行器名称, 决定qpos/qvel/act的排布,
+         "data": base64编码的float64状态向量}
+    '''
+    model, _ = get_mj_model_data(env)
+    state = get_physics_state_vector(env)
+    return {
+        "spec": int(PHYSICS_STATE_SPEC),
+        "nq": int(model.nq),
+        "nv": int(model.nv),
+        "na": int(model.na),
+        "joints": get_model_names(model, mujoco.mjtObj.mjOBJ_JOINT, model.njnt),
+        "actuators": get_model_names(model, mujoco.mjtObj.mjOBJ_ACTUATOR, model.nu),
+        "data": base64.b64encode(state.tobytes()).decode("ascii"),
+    }
+
+
+def is_physics_state_compatible(env: OrcaGymLocalEnv, physics_state: dict) -> bool:
+    '''
+    @description: 状态组成、模型维度以及关节和执行器的名称顺序都一致时, 状态向量才能按位置写回当前模型;
+        维度相同但关节顺序不同的模型(例如actor生成顺序变化)会把状态写到错误的关节上
+    '''
+    model, _ = get_mj_model_data(env)
+    return (physics_state.get("spec") == int(PHYSICS_STATE_SPEC)
+            and physics_state.get("nq") == model.nq
+            and physics_state.get("nv") == model.nv
+            and physics_state.get("na") == model.na
+            and physics_state.get("joints") == get_model_names(model, mujoco.mjtObj.mjOBJ_JOINT, model.njnt)
+            and physics_state.get("actuators") == get_model_names(model, mujoco.mjtObj.mjOBJ_ACTUATOR, model.nu))
+
+
+def restore_physics_state(env: OrcaGymLocalEnv, physics_state: dict):
+    '''
+    @description: 一次性写回capture_physics_state保存的物理状态, 并做一次前向计算
+    '''
+    model, data = get_mj_model_data(env)
+    state = np.frombuffer(base64.b64decode(physics_state["data"]), dtype=np.float64)
+    mujoco.mj_setState(model, data, state, physics_state["spec"])
+    env.mj_forward()
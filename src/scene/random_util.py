@@ -1,32 +1,125 @@
 import numpy as np
-from scipy.spatial.transform import Rotation
 
-def get_random_qpos(qpos_bound: np.ndarray, dof: int)-> np.array:
+# 模块默认的随机数生成器, 多进程时每个worker用make_rng生成自己的生成器
+_default_rng = np.random.default_rng()
+
+
+def make_rng(seed: int = None, worker_id: int = 0) -> np.random.Generator:
+    '''
+    @description: 生成worker独立的随机数生成器, 相同seed和worker_id可以复现, 不同worker之间的随机序列互不相关
+    @param:
+        seed: 随机种子, None时使用系统熵
+        worker_id: worker编号
+    '''
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(worker_id,)))
+
+
+def default_rng() -> np.random.Generator:
+    return _default_rng
+
+
+def set_default_seed(seed: int = None, worker_id: int = 0):
+    global _default_rng
+    _default_rng = make_rng(seed, worker_id)
+
+
+def euler_xyz_to_quat(euler: np.ndarray) -> np.ndarray:
+    '''
+    @description: 外旋xyz欧拉角转四元数, 与Rotation.from_euler('xyz', euler)一致
+    @param:
+        euler: (..., 3)
+    @return:
+        (..., 4) 四元数(w, x, y, z)
+    '''
+    half = np.asarray(euler, dtype=np.float64) * 0.5
+    cos, sin = np.cos(half), np.sin(half)
+    cx, cy, cz = cos[..., 0], cos[..., 1], cos[..., 2]
+    sx, sy, sz = sin[..., 0], sin[..., 1], sin[..., 2]
+    return np.stack([cx * cy * cz + sx * sy * sz,
+                     sx * cy * cz - cx * sy * sz,
+                     cx * sy * cz + sx * cy * sz,
+                     cx * cy * sz - sx * sy * cz], axis=-1)
+
+
+def sample_uniform(bounds: np.ndarray, size: tuple = (), rng: np.random.Generator = None) -> np.ndarray:
+    '''
+    @description: 一次性按范围均匀采样, 上下界相等的维度直接取下界
+    @param:
+        bounds: (..., D, 2) 每个维度的[min, max]
+        size: 额外的批次维度, 结果形状为 size + bounds.shape[:-1]
+    '''
+    rng = rng if rng is not None else _default_rng
+    bounds = np.asarray(bounds, dtype=np.float64)
+    low, span = bounds[..., 0], bounds[..., 1] - bounds[..., 0]
+    samples = low + rng.random(tuple(size) + low.shape) * span
+    return np.where(span == 0, low, samples)
+
+
+def sample_poses(bounds: np.ndarray, rng: np.random.Generator = None) -> np.ndarray:
+    '''
+    @description: 一次采样K个位姿
+    @param:
+        bounds: (K, 6, 2) 或 (6, 2) 位置和外旋xyz欧拉角的范围
+    @return:
+        (K, 7) 或 (7,) 位置和四元数(w, x, y, z)
+    '''
+    samples = sample_uniform(bounds, rng=rng)
+    return np.concatenate([samples[..., :3], euler_xyz_to_quat(samples[..., 3:])], axis=-1)
+
+
+def get_random_qpos(qpos_bound: np.ndarray, dof: int, rng: np.random.Generator = None)-> np.array:
+    qpos_bound = np.asarray(qpos_bound, dtype=np.float64)
     if dof == 1 or dof == 3:
-        qpos = np.random.uniform(qpos_bound[0][0], qpos_bound[0][1])
+        qpos = sample_uniform(qpos_bound.reshape(-1, 2)[:1], rng=rng)[0]
     elif dof == 6:
-        position = np.array([np.random.uniform(qpos_bound[0][0], qpos_bound[0][1]) if qpos_bound[0][0] != qpos_bound[0][1] else qpos_bound[0][0], 
-                             np.random.uniform(qpos_bound[1][0], qpos_bound[1][1]) if qpos_bound[1][0] != qpos_bound[1][1] else qpos_bound[1][0], 
-                             np.random.uniform(qpos_bound[2][0], qpos_bound[2][1]) if qpos_bound[2][0] != qpos_bound[2][1] else qpos_bound[2][0]])
-        rotation = np.array([np.random.uniform(qpos_bound[3][0], qpos_bound[3][1]) if qpos_bound[3][0] != qpos_bound[3][1] else qpos_bound[3][0], 
-                             np.random.uniform(qpos_bound[4][0], qpos_bound[4][1]) if qpos_bound[4][0] != qpos_bound[4][1] else qpos_bound[4][0], 
-                             np.random.uniform(qpos_bound[5][0], qpos_bound[5][1]) if qpos_bound[5][0] != qpos_bound[5][1] else qpos_bound[5][0]])
-        quat = Rotation.from_euler('xyz', rotation).as_quat()
-        qpos = np.concatenate([position, quat[[3, 0, 1, 2]]])
+        qpos = sample_poses(qpos_bound[:6], rng=rng)
     return qpos
 
 
-def get_random_transform(position_bound: np.array, rotation_bound: np.array)-> np.array:
-    position = np.array([np.random.uniform(position_bound[0][0], position_bound[0][1]) if position_bound[0][0] != position_bound[0][1] else position_bound[0][0], 
-                         np.random.uniform(position_bound[1][0], position_bound[1][1]) if position_bound[1][0] != position_bound[1][1] else position_bound[1][0], 
-                         np.random.uniform(position_bound[2][0], position_bound[2][1]) if position_bound[2][0] != position_bound[2][1] else position_bound[2][0]])
-    rotation = np.array([np.random.uniform(rotation_bound[0][0], rotation_bound[0][1]) if rotation_bound[0][0] != rotation_bound[0][1] else rotation_bound[0][0], 
-                         np.random.uniform(rotation_bound[1][0], rotation_bound[1][1]) if rotation_bound[1][0] != rotation_bound[1][1] else rotation_bound[1][0], 
-                         np.random.uniform(rotation_bound[2][0], rotation_bound[2][1]) if rotation_bound[2][0] != rotation_bound[2][1] else rotation_bound[2][0]])
-    quat = Rotation.from_euler('xyz', rotation).as_quat()
-    return np.concatenate([position, quat])
+def get_random_transform(position_bound: np.array, rotation_bound: np.array, rng: np.random.Generator = None)-> np.array:
+    '''
+    @return:
+        (7,) 位置和四元数(x, y, z, w)
+    '''
+    pose = sample_poses(np.concatenate([position_bound, rotation_bound]), rng=rng)
+    return pose[[0, 1, 2, 4, 5, 6, 3]]
 
-def choose_random_indices(nums: int, nums_range: list[int])-> list[int]:
-    pick_nums = (np.random.randint(nums_range[0], nums_range[1]) 
+def choose_random_indices(nums: int, nums_range: list[int], rng: np.random.Generator = None)-> list[int]:
+    rng = rng if rng is not None else _default_rng
+    pick_nums = (rng.integers(nums_range[0], nums_range[1])
                 if nums_range[0] != nums_range[1] else nums_range[0])
-    return np.random.choice(range(nums), pick_nums, replace=False)
\ No newline at end of file
+    return rng.choice(nums, pick_nums, replace=False)
+
+def sample_six_dof_layouts(qpos_bound: np.ndarray,
+                           radii: np.ndarray,
+                           batch_size: int,
+                           layout_filter = None,
+                           rng: np.random.Generator = None) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    @description: 一次性采样batch_size个布局, 每个布局包含len(radii)个6自由度actor,
+                  按xy平面上的占地半径剔除相互重叠的布局, 再用layout_filter剔除不满足任务前置条件的布局
+    @param:
+        qpos_bound: (6, 2) 位置和欧拉角的范围, 上下界相等时该维度固定
+        radii: (M,) 每个actor的占地半径
+        batch_size: 候选布局数量
+        layout_filter: 可选, 输入(N, 3)位置, 返回(N,)布尔数组, True表示该位置可用
+    @return:
+        qpos: (batch_size, M, 7) 候选布局, 四元数为(w, x, y, z)
+        valid: (batch_size,) 布局是否可用
+    '''
+    radii = np.asarray(radii, dtype=np.float64)
+    actor_nums = len(radii)
+    samples = sample_uniform(qpos_bound, size=(batch_size, actor_nums), rng=rng)
+    positions = samples[..., :3]
+    qpos = np.concatenate([positions, euler_xyz_to_quat(samples[..., 3:])], axis=-1)
+
+    valid = np.ones(batch_size, dtype=bool)
+    if actor_nums > 1 and np.any(radii > 0):
+        delta = positions[:, :, None, :2] - positions[:, None, :, :2]
+        distance = np.linalg.norm(delta, axis=-1)
+        overlap = distance < (radii[:, None] + radii[None, :])
+        overlap[:, np.arange(actor_nums), np.arange(actor_nums)] = False
+        valid &= ~np.any(overlap, axis=(1, 2))
+    if layout_filter is not None and actor_nums > 0:
+        valid &= np.all(np.asarray(layout_filter(positions.reshape(-1, 3))).reshape(batch_size, actor_nums), axis=1)
+    return qpos, valid
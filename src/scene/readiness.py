@@ -0,0 +1,41 @@
+import time
+from typing import Callable
+from orca_gym.log import OrcaLog
+
+orca_log = OrcaLog.get_instance()
+
+
+def wait_until_ready(probe: Callable[[], bool],
+                     timeout: float = 30.0,
+                     initial_interval: float = 0.05,
+                     max_interval: float = 1.0,
+                     backoff: float = 2.0) -> float:
+    '''
+    @description: 轮询probe直到返回True, 轮询间隔按backoff指数增长, probe抛出的异常视为尚未就绪
+    @param:
+        probe: 就绪检测函数
+        timeout: 超时时间(秒)
+        initial_interval: 首次重试间隔(秒)
+        max_interval: 最大重试间隔(秒)
+        backoff: 间隔增长倍数
+    @return:
+        从开始轮询到就绪的耗时(秒)
+    '''
+    start_time = time.perf_counter()
+    interval = initial_interval
+    attempts = 0
+    last_error = None
+    while True:
+        attempts += 1
+        try:
+            if probe():
+                return time.perf_counter() - start_time
+        except Exception as e:
+            last_error = e
+        elapsed_time = time.perf_counter() - start_time
+        if elapsed_time >= timeout:
+            orca_log.error(f"Not ready after {attempts} attempts in {elapsed_time:.2f}s, last error: {last_error}")
+            raise TimeoutError(f"Not ready after {elapsed_time:.2f}s") from last_error
+        time.sleep(min(interval, timeout - elapsed_time))
+        interval = min(interval * backoff, max_interval)
+
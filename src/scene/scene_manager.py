@@ -1,3 +1,4 @@
+import os
 import time
 from orca_gym.scene.orca_gym_scene import OrcaGymScene
 from orca_gym.log import OrcaLog
@@ -9,58 +10,181 @@ import numpy as np
 from orca_gym.environment import OrcaGymLocalEnv
 from orca_gym.scene.orca_gym_scene import Actor, MaterialInfo, LightInfo, OrcaGymScene
 from orca_gym.log import OrcaLog
-from scene.random_util import choose_random_indices, get_random_qpos, get_random_transform
+from scene.random_util import choose_random_indices, default_rng, get_random_transform, sample_six_dof_layouts
+from scene.readiness import wait_until_ready
+from envs.dataCollection.model_cache import model_content_key
+from scene.layout_pool import LayoutPool, layout_pool_path, resolve_layout_pool_dir
+from scene.physics_state import PHYSICS_STATE_KEY, capture_physics_state, is_physics_state_compatible, restore_physics_state
+from scene.scene_spec import SceneSpec, compile_scene_config
 
 orca_log = OrcaLog.get_instance()
 
+# 环境不能下载服务端模型时, 发布场景后固定等待的时间(秒)
+PUBLISH_SETTLE_TIME = 3.0
+
+# 随机布局每批候选数量和最多批次
+LAYOUT_BATCH_SIZE = 64
+LAYOUT_MAX_BATCHES = 10
+
+def diff_scene_spec(published_spec: dict[str, dict], pending_spec: dict[str, dict]) -> tuple[bool, dict[str, dict]]:
+    '''
+    @description: 比较两个场景描述
+    @return:
+        structural: actor名称或资产有变化, 需要重新发布场景
+        transform_changes: 只有位姿/缩放变化的actor
+    '''
+    if published_spec.keys() != pending_spec.keys():
+        return True, {}
+    transform_changes = {}
+    for actor_name, actor_spec in pending_spec.items():
+        published = published_spec[actor_name]
+        if published["asset_path"] != actor_spec["asset_path"]:
+            return True, {}
+        if (not np.allclose(published["position"], actor_spec["position"])
+                or not np.allclose(published["rotation"], actor_spec["rotation"])
+                or published["scale"] != actor_spec["scale"]):
+            transform_changes[actor_name] = actor_spec
+    return False, transform_changes
+
+
+def read_model_xml(model_xml_path: str) -> str:
+    with open(model_xml_path, "r") as f:
+        return f.read()
+
+
+def xml_has_name(model_xml: str, name: str) -> bool:
+    return f'"{name}"' in model_xml or f"'{name}'" in model_xml
+
+
 class SceneManager:
-    def __init__(self, grpc_addr: str, config: dict = {}, env: OrcaGymLocalEnv = None, init_env_callback = None):
-        self._scene = OrcaGymScene(grpc_addr)
-        self._config = config
-        self._config_check()
+    def __init__(self, grpc_addr: str, config: dict = {}, env: OrcaGymLocalEnv = None, init_env_callback = None,
+                 scene: OrcaGymScene = None, readiness_probe = None, ready_timeout: float = 30.0,
+                 rng: np.random.Generator = None, config_dir: str = None):
+        '''
+        @param:
+            grpc_addr: OrcaGym服务地址, 传入scene时不使用
+            config: 场景配置
+            env: 环境
+            init_env_callback: 场景发布后重新初始化环境的回调
+            scene: 场景服务, 默认连接grpc_addr上的OrcaGymScene, 没有OrcaGym服务时传入LocalMJCFScene
+            readiness_probe: 场景发布后的就绪检测函数, 默认下载服务端的模型xml, 内容与发布前不同并且包含已生成actor的关节时就绪
+            ready_timeout: 等待场景就绪的超时时间(秒)
+            rng: 随机数生成器, 多进程时每个worker传入random_util.make_rng生成的生成器, 默认使用模块共享的生成器
+            config_dir: 场景配置文件所在目录, 配置中的相对路径(actor.random.layout_pool)相对于该目录
+        '''
+        self._scene = scene if scene is not None else OrcaGymScene(grpc_addr)
+        self._readiness_probe = readiness_probe
+        self._ready_timeout = ready_timeout
+        self._rng = rng if rng is not None else default_rng()
+        self.publish_latency = None
+        # 配置只在这里校验和编译一次, 之后都从只读的spec读取
+        self._spec = compile_scene_config(config)
         self._init_env_callback = init_env_callback
         self._random_count = 0
         self._first_spawn_actor = True
-        self._light_random_cycle = self._config.get("light", {}).get("random", {}).get("cycle", 20)
-
-        self.env = env
+        # 每次发布场景并重新初始化环境后递增, 依赖模型的静态缓存以此判断是否失效
+        self._scene_version = 0
+        # 已发布的场景和待提交的场景, {actor_name: {asset_path, position, rotation, scale}}
+        self._published_spec: dict[str, dict] = {}
+        self._pending_spec: dict[str, dict] = {}
+        self._in_place_warned = False
+        # 中间空场景发布后服务端模型的内容哈希, 作为下一次publish_scene就绪检测的基准
+        self._empty_model_key: str = None
+
+        self.env = None
+        if env is not None:
+            self.set_env(env)
         self.scene_info = {}
+        self.physics_state = None
+
+        # 预先生成的稳定布局池, actor.random.layout_pool 指定布局池目录, 找不到匹配当前配置的布局池时实时采样
+        self._layout_pool: LayoutPool = None
+        layout_pool_dir = self._spec.actor.layout_pool
+        if layout_pool_dir is not None:
+            pool_path = layout_pool_path(resolve_layout_pool_dir(layout_pool_dir, config_dir), self.get_actor_config())
+            if os.path.exists(pool_path):
+                self.set_layout_pool(LayoutPool.load(pool_path))
+            else:
+                orca_log.warning(f"Layout pool {pool_path} not found, sample layouts online")
+
+    @property
+    def scene_version(self) -> int:
+        return self._scene_version
+
+    @property
+    def spec(self) -> SceneSpec:
+        return self._spec
+
+    @property
+    def rng(self) -> np.random.Generator:
+        '''
+        @description: 场景随机化使用的随机数生成器, 任务等需要和场景一起复现的随机选择也使用它
+        '''
+        return self._rng
+
+    @property
+    def supports_in_place_update(self) -> bool:
+        '''
+        @description: 场景服务能否原地修改actor位姿, 目前只有本地后端(LocalMJCFScene)支持, OrcaGymScene不支持
+        '''
+        return hasattr(self._scene, "set_actor_transform")
 
     def register_init_env_callback(self, init_env_callback):
         self._init_env_callback = init_env_callback
 
     def set_env(self, env: OrcaGymLocalEnv):
         self.env = env
+        # 本地场景服务需要环境来原地修改已加载的模型
+        if hasattr(self._scene, "set_env"):
+            self._scene.set_env(env)
+
+    def get_actor_config(self) -> dict:
+        return self._spec.config.get("actor", {})
+
+    def set_layout_pool(self, layout_pool: LayoutPool):
+        self._layout_pool = layout_pool
+        orca_log.info(f"Use layout pool with {len(layout_pool)} layouts")
+
+    def get_six_dof_joints_in_env(self) -> list[str]:
+        return list(self._spec.actor.six_dof_joint_names)
 
     def get_actors_joints_in_env(self)-> list[str]:
         '''
         OrcaStudio导出xml时，会携带命名空间前缀， 这里的前缀就是actor name, 
         因为actor spawnable到场景中，会默认放在全局配置Components下
         '''
-        actor_names = self._config.get("actor", {}).get("names", [])
-        actor_joints = self._config.get("actor", {}).get("joints", [])
-        actor_joints = [actor_names[i] + f"_{actor_joints[i]}" for i in range(len(actor_names))]
-
-        return actor_joints
+        return list(self._spec.actor.joint_names)
 
     def serialize_scene(self, in_scene_actors: list[str])-> dict:
         self.scene_info = {}
-        actor_names = self._config.get("actor", {}).get("names", [])
-        actor_joints = self.get_actors_joints_in_env()
-        for i in range(len(actor_joints)):
-            if actor_joints[i] in in_scene_actors:
-                self.scene_info[actor_names[i]] = {
-                    "joint_name": actor_joints[i],
-                    "joint_qpos": list(self.get_actor_qpos(actor_joints[i])),
-                }
+        actor_names = self._spec.actor.names
+        actor_joints = self._spec.actor.joint_names
+        in_scene_actors = set(in_scene_actors)
+        in_scene_indices = [i for i in range(len(actor_joints)) if actor_joints[i] in in_scene_actors]
+        actors_qpos = self.env.query_joint_qpos([actor_joints[i] for i in in_scene_indices]) if len(in_scene_indices) > 0 else {}
+        for i in in_scene_indices:
+            self.scene_info[actor_names[i]] = {
+                "joint_name": actor_joints[i],
+                "joint_qpos": list(actors_qpos[actor_joints[i]]),
+            }
+        try:
+            self.physics_state = capture_physics_state(self.env)
+        except AttributeError:
+            # 环境不提供底层MjData时只保存actor的关节位置
+            self.physics_state = None
         return self.scene_info
 
-    def get_scene_info(self)-> dict:
+    def get_scene_info(self, with_physics_state: bool = False)-> dict:
+        '''
+        @param:
+            with_physics_state: 是否附带完整的物理状态(time, qpos, qvel, act), 保存数据时使用
+        '''
+        if with_physics_state and self.physics_state is not None:
+            return {**self.scene_info, PHYSICS_STATE_KEY: self.physics_state}
         return self.scene_info
 
     def get_task_config(self)-> dict:
-        task_config = self._config.get("task", {})
-        return task_config
+        return self._spec.task
 
     def set_actor_qpos(self, joint_name: str, qpos: np.array):
         '''
@@ -74,353 +198,250 @@ class SceneManager:
         qpos = self.env.query_joint_qpos([joint_name])[joint_name]
         return qpos
 
-    def update_actor_qpos(self, restore: bool = False, scene_info: dict = None):
+    def set_actors_qpos(self, actors_qpos: dict[str, np.ndarray]):
+        '''
+        @description: 一次性设置多个actor的关节位置, 并只做一次前向计算
+        @param:
+            actors_qpos: {关节名称: 关节位置}
+        '''
+        if len(actors_qpos) == 0:
+            return
+        self.env.set_joint_qpos(actors_qpos)
+        self.env.mj_forward()
+
+    def update_actor_qpos(self, restore: bool = False, scene_info: dict = None, layout_filter = None):
         '''
         @parma
             restore: 是否复原场景
             scene_info: 复原场景时用到的场景信息
+            layout_filter: 可选, 随机布局时的任务前置条件, 输入(N, 3)位置, 返回(N,)布尔数组
         '''
-        self.reset_actor_pos()
+        # 先把所有6自由度actor停放到远处, 再覆盖本回合要放置的actor, 合并成一次写入
+        actors_qpos = self.get_park_qpos()
         in_scene_actors = []
 
         if restore:
+            physics_state = scene_info.get(PHYSICS_STATE_KEY, None)
+            in_scene_actors = [actor_info["joint_name"] for actor_name, actor_info in scene_info.items() if actor_name != PHYSICS_STATE_KEY]
+            if physics_state is not None and is_physics_state_compatible(self.env, physics_state):
+                # 完整物理状态一次性写回, 包含停放的actor、速度和接触稳定后的状态
+                restore_physics_state(self.env, physics_state)
+                orca_log.info(f"Restored physics state with {len(in_scene_actors)} actors")
+                self.serialize_scene(in_scene_actors)
+                return
+            if physics_state is not None:
+                orca_log.warning("Physics state doesn't match the current model, restore actor qpos only")
             for actor_name, actor_info in scene_info.items():
-                self.set_actor_qpos(actor_info["joint_name"], actor_info["joint_qpos"])
-                in_scene_actors.append(actor_info["joint_name"])
-        else:
-            random_config = self._config.get("actor", {}).get("random", {})
-            is_random_qpos = random_config.get("qpos", False)
-            if is_random_qpos:
-                actor_random_nums = random_config.get("nums", [0, 0])
-                pick_nums = (np.random.randint(actor_random_nums[0], actor_random_nums[1]) 
-                            if actor_random_nums[0] != actor_random_nums[1] else actor_random_nums[0])
-                if pick_nums > 0:
-                    # 随机挑选pick_nums索引，从range(len(actor_names))中挑选
-                    joints = self.get_actors_joints_in_env()
-                    joints_dof = self._config.get("actor", {}).get("joints_dof", [])
-                    pick_indices = np.random.choice(range(len(joints)), pick_nums, replace=False)
-                    for i in pick_indices:
-                        joint_name = joints[i]
-                        in_scene_actors.append(joint_name)
-                        dof = joints_dof[i]
-
-                        if dof == 6:
-                            bound_position = random_config.get("six_dof", {}).get("bound_position")
-                            bound_rotation = random_config.get("six_dof", {}).get("bound_rotation", [[0, 0], [0, 0], [0, 0]])             
-                            center = random_config.get("six_dof", {}).get("center")
-                            bound_position = [[center[0] + bound_position[0][0], center[0] + bound_position[0][1]], 
-                                              [center[1] + bound_position[1][0], center[1] + bound_position[1][1]], 
-                                              [center[2] + bound_position[2][0], center[2] + bound_position[2][1]]]
-
-                            qpos_bound = np.concatenate([bound_position, bound_rotation])
-
-                        elif dof == 3:
-                            bound = random_config.get("three_dof", {}).get("bound")                            
-                            qpos_bound = np.concatenate([bound])
-                        elif dof == 1:
-                            bound = random_config.get("one_dof", {}).get("bound")
-                            qpos_bound = np.concatenate([bound])
-                        qpos = get_random_qpos(qpos_bound, dof)
-                        orca_log.info(f"set actor qpos: {joint_name}, {qpos}")
-                        self.set_actor_qpos(joint_name, qpos)
-                        self.env.mj_forward()
-        
+                if actor_name != PHYSICS_STATE_KEY:
+                    actors_qpos[actor_info["joint_name"]] = actor_info["joint_qpos"]
+        elif self._layout_pool is not None and len(self._layout_pool) > 0:
+            pool_qpos, in_scene_actors = self._layout_pool.draw(rng=self._rng)
+            actors_qpos.update(pool_qpos)
+        elif self._spec.actor.random_qpos:
+            actor_spec = self._spec.actor
+            actor_random_nums = actor_spec.random_nums
+            pick_nums = (self._rng.integers(actor_random_nums[0], actor_random_nums[1]) 
+                        if actor_random_nums[0] != actor_random_nums[1] else actor_random_nums[0])
+            if pick_nums > 0:
+                # 随机挑选pick_nums个actor, 再按自由度分组, 每组一次性采样
+                joints = actor_spec.joint_names
+                pick_indices = self._rng.choice(len(joints), pick_nums, replace=False)
+                picked = np.zeros(len(joints), dtype=bool)
+                picked[pick_indices] = True
+                in_scene_actors = [joints[i] for i in pick_indices]
+
+                for dof_indices, bound in ((actor_spec.three_dof_indices, actor_spec.three_dof_bound),
+                                           (actor_spec.one_dof_indices, actor_spec.one_dof_bound)):
+                    dof_indices = dof_indices[picked[dof_indices]]
+                    if len(dof_indices) > 0:
+                        values = self._rng.uniform(bound[0], bound[1], size=len(dof_indices))
+                        for i, value in zip(dof_indices, values):
+                            actors_qpos[joints[i]] = value
+
+                six_dof_indices = actor_spec.six_dof_indices[picked[actor_spec.six_dof_indices]]
+                if len(six_dof_indices) > 0:
+                    layout = self.sample_six_dof_layout(six_dof_indices, layout_filter)
+                    for i, qpos in zip(six_dof_indices, layout):
+                        actors_qpos[joints[i]] = qpos
+
+        self.set_actors_qpos(actors_qpos)
+        orca_log.info(f"Placed {len(in_scene_actors)} actors: {in_scene_actors}")
         self.serialize_scene(in_scene_actors)
 
+    def sample_six_dof_layout(self, actor_indices: np.ndarray, layout_filter = None) -> np.ndarray:
+        '''
+        @description: 按批次采样6自由度actor的布局, 在写入仿真之前剔除重叠和不满足任务前置条件的布局
+        @param:
+            actor_indices: 参与布局的actor索引
+            layout_filter: 可选, 任务前置条件
+        @return:
+            (len(actor_indices), 7) 每个actor的关节位置
+        '''
+        qpos_bound = self._spec.actor.six_dof_bound
+        radii = self._spec.actor.footprint_radius[actor_indices]
+
+        for batch in range(LAYOUT_MAX_BATCHES):
+            qpos, valid = sample_six_dof_layouts(qpos_bound, radii, LAYOUT_BATCH_SIZE, layout_filter, self._rng)
+            valid_indices = np.flatnonzero(valid)
+            if len(valid_indices) > 0:
+                return qpos[valid_indices[0]]
+        orca_log.warning(f"No valid layout in {LAYOUT_MAX_BATCHES * LAYOUT_BATCH_SIZE} candidates, use an unchecked one")
+        return qpos[0]
+
+    def get_park_qpos(self) -> dict[str, list[float]]:
+        '''
+        @description: 6自由度actor的停放位置(无穷远), {关节名称: 关节位置}
+        '''
+        return {joint_name: [100000, 100000, 1, 1, 0, 0, 0] for joint_name in self._spec.actor.six_dof_joint_names}
+
     def reset_actor_pos(self):
-        joints_dof = self._config.get("actor", {}).get("joints_dof", [])
-        joint_names = self.get_actors_joints_in_env()
-        for i in range(len(joints_dof)):
-            dof = joints_dof[i]
-            joint_name = joint_names[i]
-            if dof == 6:
-                self.set_actor_qpos(joint_name, [100000, 100000, 1, 1, 0, 0, 0])
+        self.set_actors_qpos(self.get_park_qpos())
 
     def spawn_scene(self):
         #将所有的actor加入到场景中
         if self.is_update_light():
-            self.publish_scene_without_init_env()
             self.spawn_actors()
             self.spawn_lights()
-            self.publish_scene()
+            self.commit_scene()
             self._first_spawn_actor = False
         if self._first_spawn_actor:
-            self.publish_scene_without_init_env()
             self._first_spawn_actor = False
             self.spawn_actors()
-            self.publish_scene()
+            self.commit_scene()
         self._random_count += 1
 
+    def commit_scene(self):
+        '''
+        @description: 将add_actor/add_light暂存的场景与已发布的场景比较,
+            资产集合变化时重新发布场景并重新初始化环境,
+            只有位姿变化时, 场景服务支持原地更新(见supports_in_place_update)则原地更新, 不重新加载模型;
+            OrcaGym服务的OrcaGymScene没有原地修改actor位姿的接口, 位姿变化仍然重新发布场景
+        '''
+        pending_spec, self._pending_spec = self._pending_spec, {}
+        structural, transform_changes = diff_scene_spec(self._published_spec, pending_spec)
+        if not structural and len(transform_changes) > 0 and not self.supports_in_place_update:
+            if not self._in_place_warned:
+                orca_log.warning("Scene backend can't update actor transforms in place, transform changes republish the scene")
+                self._in_place_warned = True
+            structural = True
+
+        if structural:
+            orca_log.info(f"Republish scene with {len(pending_spec)} actors")
+            self.publish_scene_without_init_env()
+            for actor_name, actor_spec in pending_spec.items():
+                self._scene.add_actor(Actor(actor_name, actor_spec["asset_path"], actor_spec["position"], actor_spec["rotation"], actor_spec["scale"]))
+            self.publish_scene()
+        elif len(transform_changes) > 0:
+            orca_log.info(f"Update {len(transform_changes)} actor transforms in place")
+            for actor_name, actor_spec in transform_changes.items():
+                self._scene.set_actor_transform(actor_name, actor_spec["position"], actor_spec["rotation"], actor_spec["scale"])
+        self._published_spec = pending_spec
+
     def spawn_actors(self):
-        actor_names = self._config.get("actor", {}).get("names", [])
-        actor_spawnables = self._config.get("actor", {}).get("spawnable", [])
-        joints_dof = self._config.get("actor", {}).get("joints_dof", [])
-        # 初始位置为无穷远
-        for i in range(len(actor_names)):
-            dof = joints_dof[i]
-            actor_name = actor_names[i]
-            actor_spawnable = actor_spawnables[i]
+        actor_spec = self._spec.actor
+        # 6自由度actor初始位置为无穷远, 其余放在各自的center
+        for i in range(len(actor_spec.names)):
+            dof = actor_spec.joints_dof[i]
+            actor_name = actor_spec.names[i]
+            actor_spawnable = actor_spec.spawnables[i]
             orca_log.info(f"spawn actor: {actor_name}, {actor_spawnable}")
             if dof == 6:
                 self.add_actor(actor_name, actor_spawnable, [100000, 100000, 1], [0, 0, 0, 1])
             elif dof == 3:
-                center = self._config.get("actor", {}).get("random", {}).get("three_dof", {}).get("center")
-                self.add_actor(actor_name, actor_spawnable, [center[0], center[1], center[2]], [0, 0, 0, 1])
+                self.add_actor(actor_name, actor_spawnable, actor_spec.three_dof_center, [0, 0, 0, 1])
             elif dof == 1:
-                center = self._config.get("actor", {}).get("random", {}).get("one_dof", {}).get("center")
-                self.add_actor(actor_name, actor_spawnable, [center[0], center[1], center[2]], [0, 0, 0, 1])
+                self.add_actor(actor_name, actor_spawnable, actor_spec.one_dof_center, [0, 0, 0, 1])
     
     def is_update_light(self):
-        light_config = self._config.get("light", {})
-        light_random = light_config.get("random", {})
-        is_random_position = light_random.get("position", False)
-        is_random_rotation = light_random.get("rotation", False)
-        if not (is_random_position or is_random_rotation):
+        if not self._spec.light.is_random:
             return False
-        if self._random_count % self._light_random_cycle == 0:
+        if self._random_count % self._spec.light.cycle == 0:
             return True
         return False
 
     def spawn_lights(self):
-        light_config = self._config.get("light", {})
-        light_names = light_config.get("names", [])
-        light_spawnable = light_config.get("spawnable", [])
-
-        light_random = light_config.get("random", {})
-        is_random_position = light_random.get("position", False)
-        is_random_rotation = light_random.get("rotation", False)
-
-        if not (is_random_position or is_random_rotation):
+        light_spec = self._spec.light
+        if not light_spec.is_random:
             return
 
-        light_random_nums = light_random.get("nums")
-        light_random_center = light_random.get("center")
-        light_random_bound_position = light_random.get("bound_position", [[0, 0], [0, 0], [0, 0]])
-        bound_rotation = light_random.get("bound_rotation", [[0, 0], [0, 0], [0, 0]])
-        bound_position = [[light_random_center[0] + light_random_bound_position[0][0], light_random_center[0] + light_random_bound_position[0][1]], 
-                          [light_random_center[1] + light_random_bound_position[1][0], light_random_center[1] + light_random_bound_position[1][1]], 
-                          [light_random_center[2] + light_random_bound_position[2][0], light_random_center[2] + light_random_bound_position[2][1]]]
-       
-        light_index = choose_random_indices(len(light_names), light_random_nums)
+        light_index = choose_random_indices(len(light_spec.names), light_spec.random_nums, self._rng)
         for i in light_index:
-            light_name = light_names[i]
-            light_spawnable = light_spawnable[i]
-            transform = get_random_transform(bound_position, bound_rotation)
-            self.add_light(light_name, light_spawnable, transform[:3], transform[3:])
+            transform = get_random_transform(light_spec.position_bound, light_spec.rotation_bound, self._rng)
+            self.add_light(light_spec.names[i], light_spec.spawnables[i], transform[:3], transform[3:])
 
     def publish_scene_without_init_env(self):
-        self._scene.publish_scene()    
+        '''
+        @description: 发布不含actor的中间场景; 使用默认就绪检测时等服务端换成该场景, 记下它的内容哈希,
+            之后的publish_scene以它为基准, 即使新场景与上次加载的完全相同也能判断新模型已就绪
+        '''
+        self._scene.publish_scene()
+        if self._uses_served_model_probe():
+            wait_until_ready(self._served_empty_model_ready, timeout=self._ready_timeout)
+
+    def _uses_served_model_probe(self) -> bool:
+        return self._init_env_callback is not None and self._readiness_probe is None and hasattr(self.env, "fetch_model_xml")
 
     def publish_scene(self):
         """
         Publish the scene to the ORCA Gym environment.
         """
+        # 基准哈希: 中间空场景的哈希, 没有中间发布时为发布前环境已加载模型的哈希, 服务端换成新模型后哈希才会变化
+        previous_model_key = self._empty_model_key if self._empty_model_key is not None else getattr(self.env, "model_key", None)
+        self._empty_model_key = None
         self._scene.publish_scene()
-        time.sleep(3)
+        publish_time = time.perf_counter()
         if self._init_env_callback is not None:
+            if self._readiness_probe is not None:
+                wait_until_ready(self._readiness_probe, timeout=self._ready_timeout)
+            elif self._uses_served_model_probe():
+                wait_until_ready(lambda: self._served_model_ready(previous_model_key), timeout=self._ready_timeout)
+            else:
+                orca_log.warning(f"Env can't fetch the served model, wait {PUBLISH_SETTLE_TIME}s after publish")
+                time.sleep(PUBLISH_SETTLE_TIME)
+            # 就绪后只重新初始化一次环境, 使用探测时已经下载的模型
             self._init_env_callback()
         else:
             orca_log.warning("init_env_callback is not set")
+        self.publish_latency = time.perf_counter() - publish_time
+        orca_log.info(f"Scene ready {self.publish_latency * 1000:.0f}ms after publish")
+        self._scene_version += 1
 
-    def add_actor(self, actor_name: str, asset_path: str, position: np.ndarray, rotation: np.ndarray, scale: float = 1.0):
-        actor = Actor(actor_name, asset_path, position, rotation, scale)
-        self._scene.add_actor(actor)
+    def _served_model_ready(self, previous_model_key: str) -> bool:
+        '''
+        @description: 默认就绪检测, 只下载服务端当前的模型xml, 不编译;
+            内容哈希与基准(中间空场景或发布前加载的模型)不同, 并且包含所有已生成actor的关节时视为新模型已就绪;
+            配置中没有actor时发布的总是基础场景, 直接就绪
+        '''
+        joint_names = self._spec.actor.joint_names
+        if len(joint_names) == 0:
+            return True
+        model_xml_path = self.env.fetch_model_xml()
+        if model_content_key(model_xml_path) == previous_model_key:
+            return False
+        model_xml = read_model_xml(model_xml_path)
+        return all(xml_has_name(model_xml, joint_name) for joint_name in joint_names)
 
-    def add_light(self, light_name: str, asset_path: str, position: np.ndarray, rotation: np.ndarray, scale: float = 1.0):
-        actor = Actor(light_name, asset_path, position, rotation, scale)
-        self._scene.add_actor(actor)
+    def _served_empty_model_ready(self) -> bool:
+        '''
+        @description: 中间空场景的就绪检测, 服务端的模型xml不包含任何actor的关节时就绪, 记下它的内容哈希
+        '''
+        model_xml_path = self.env.fetch_model_xml()
+        model_xml = read_model_xml(model_xml_path)
+        if any(xml_has_name(model_xml, joint_name) for joint_name in self._spec.actor.joint_names):
+            return False
+        self._empty_model_key = model_content_key(model_xml_path)
+        return True
 
-    
-    def _config_check(self):
+    def add_actor(self, actor_name: str, asset_path: str, position: np.ndarray, rotation: np.ndarray, scale: float = 1.0):
         '''
-        check the config is valid
+        @description: 暂存actor, commit_scene时与已发布的场景比较后生效
         '''
-        actor_config = self._config.get("actor", {})
-        actor_names = actor_config.get("names", [])
-        actor_spawnable = actor_config.get("spawnable", [])
-        actor_joints_dof = actor_config.get("joints_dof", [])
-        actor_joints = actor_config.get("joints", [])
-
-        if len(actor_names) != len(actor_spawnable):
-            orca_log.error(f'''Has {len(actor_names)} actors and {len(actor_spawnable)} spawnables, 
-            The number of actor names and spawnable must be the same.''')
-            raise ValueError("The number of actor names and spawnable must be the same.")
-        
-
-        if len(actor_names) != len(actor_joints):
-            orca_log.error("The number of actor names and joints must be the same.")
-            raise ValueError("The number of actor names and joints must be the same.")
-
-        actor_joints_dof = actor_config.get("joints_dof", [])
-        if len(actor_names) != len(actor_joints_dof):
-            orca_log.error("The number of actor names and joints_dof must be the same.")
-            raise ValueError("The number of actor names and joints_dof must be the same.")
-        
-        actor_random = actor_config.get("random", {})
-        actor_random_qpos = actor_random.get("qpos", False)
-        actor_random_nums = actor_random.get("nums", [0, 0])
-        actor_random_six_dof = actor_random.get("six_dof", None)
-        actor_random_three_dof = actor_random.get("three_dof", None)
-        actor_random_one_dof = actor_random.get("one_dof", None)
-
-        if actor_random_qpos:
-            if not (actor_random_nums[0] > 0 
-                and actor_random_nums[1] > actor_random_nums[0]
-                and actor_random_nums[1] <= len(actor_names)):
-                orca_log.error("The actor.random.nums is invalid, the first number must be greater than 0, the second number must be greater than the first number, and the second number must be less than the number of actors.")
-                raise ValueError("The actor.random.nums is invalid, the first number must be greater than 0, the second number must be greater than the first number, and the second number must be less than the number of actors.")
-            
-        if 6 in actor_joints_dof:
-            if actor_random_six_dof is None:
-                orca_log.error("actor.random.six_dof is not set")
-                orca_log.error('''example:
-                                actor:
-                                  random:
-                                    six_dof:
-                                      center: [0, 0, 0]
-                                      bound_position: [[-1, 1], [-1, 1], [0, 2]]
-                                      bound_rotation: [[0, 3.14159], [0, 3.14159], [0, 3.14159]]
-                                ''')
-                raise ValueError("actor.random.six_dof is not set")
-            else:
-                if actor_random_six_dof.get("bound_position", None) is None:
-                    orca_log.error("actor.random.six_dof.bound_position is not set")
-                    orca_log.error('''example:
-                                    actor:
-                                      random:
-                                        six_dof:
-                                          bound_position: [[-1, 1], [-1, 1], [0, 2]]
-                                          bound_rotation: [[0, 3.14159], [0, 3.14159], [0, 3.14159]]
-                                    ''')
-                    raise ValueError("actor.random.six_dof.bound_position is not set")
-                if actor_random_six_dof.get("center", None) is None:
-                    orca_log.error("actor.random.six_dof.center is not set")
-                    orca_log.error('''example:
-                                    actor:
-                                      random:
-                                        six_dof:
-                                          center: [0, 0, 0]
-                                    ''')
-                    raise ValueError("actor.random.six_dof.center is not set")
-        if 3 in actor_joints_dof:
-            if actor_random_three_dof is None or actor_random_three_dof.get("center", None) is None:
-                orca_log.error("actor.random.three_dof is not set or actor.random.three_dof.center is not set")
-                orca_log.error('''example:
-                                    actor:
-                                      random:
-                                        three_dof:
-                                          center: [0, 0, 0]
-                                          bound: [0, 1]
-                                    ''')
-                raise ValueError("actor.random.three_dof is not set or actor.random.three_dof.center is not set")
-            else:
-                if actor_random_three_dof.get("bound", None) is None:
-                    orca_log.error("actor.random.three_dof.bound is not set")
-                    orca_log.error('''example:
-                                    actor:
-                                      random:
-                                        three_dof:
-                                          bound: [0, 1]
-                                    ''')
-                    raise ValueError("actor.random.three_dof.bound is not set")
-
-        if 1 in actor_joints_dof:
-            if actor_random_one_dof is None or actor_random_one_dof.get("center", None) is None:
-                orca_log.error("actor.random.one_dof is not set")
-                orca_log.error('''example:
-                                actor:
-                                  random:
-                                    one_dof:
-                                      bound: [-1, 1]
-                                    ''')
-                raise ValueError("actor.random.one_dof is not set or actor.random.one_dof.center is not set")
-            else:
-                if actor_random_one_dof.get("bound", None) is None:
-                    orca_log.error("actor.random.one_dof.bound is not set")
-                    orca_log.error('''example:
-                                    actor:
-                                      random:
-                                        one_dof:
-                                          bound: [-1, 1]
-                                    ''')
-                    raise ValueError("actor.random.one_dof.bound is not set")
-
-
-        light_config = self._config.get("light", {})
-        light_names = light_config.get("names", [])
-        light_spawnable = light_config.get("spawnable", [])
-        light_random = light_config.get("random", None)
-        if len(light_names) != len(light_spawnable):
-            orca_log.error(f'''Has {len(light_names)} lights and {len(light_spawnable)} spawnables, 
-            The number of light names and spawnable must be the same.''')
-            raise ValueError("The number of light names and spawnable must be the same.")
-        
-        if light_random is not None:
-            is_random_position = light_random.get("position", False)
-            is_random_rotation = light_random.get("rotation", False)
-            light_random_center = light_random.get("center", None)            
-            light_random_bound_position = light_random.get("bound_position", None)
-            light_random_bound_rotation = light_random.get("bound_rotation", None)
-            light_random_nums = light_random.get("nums", [0, 0])   
-            light_random_cycle = light_random.get("cycle", 20)
-
-            if is_random_position and light_random_bound_position is None:
-                orca_log.error("light.random.bound_position is not set")
-                orca_log.error('''example:
-                                light:
-                                  random:
-                                    center: [0, 0, 0]
-                                    position: true
-                                    bound_position: [[-1, 1], [-1, 1], [0, 2]]
-                                ''')
-                raise ValueError("light.random.bound_position is not set")
-
-            if is_random_rotation and light_random_bound_rotation is None:
-                orca_log.error("light.random.bound_rotation is not set")
-                orca_log.error('''example:
-                                light:
-                                  random:
-                                    center: [0, 0, 0]
-                                    rotation: true
-                                    bound_rotation: [[0, 3.14159], [0, 3.14159], [0, 3.14159]]
-                                ''')
-                raise ValueError("light.random.bound_rotation is not set")
-
-            if light_random_center is None:
-                orca_log.error("light.random.center is not set")
-                orca_log.error('''example:
-                                light:
-                                  random:
-                                    position: true
-                                    center: [0, 0, 0]
-                                    bound_position: [[-1, 1], [-1, 1], [0, 2]]
-                                ''')
-                raise ValueError("light.random.center is not set")
-
-            if not (light_random_nums[0] > 0 
-                and light_random_nums[1] >= light_random_nums[0]
-                and light_random_nums[1] <= len(light_names)):
-                orca_log.error("The light.random.nums is invalid, the first number must be greater than 0, the second number must be greater than the first number, and the second number must be less than the number of lights.")
-                raise ValueError("The light.random.nums is invalid, the first number must be greater than 0, the second number must be greater than the first number, and the second number must be less than the number of lights.")
-        
-            if light_random_cycle <= 0:
-                orca_log.error("light.random.cycle is invalid, the cycle must be greater than 0")
-                orca_log.error('''example:
-                                light:
-                                  random:
-                                    cycle: 20
-                                ''')
-                raise ValueError("light.random.cycle is invalid, the cycle must be greater than 0")
-        else:
-            orca_log.error("light.random is not set")
-            orca_log.error('''example:
-                            light:
-                              random:
-                                position: true
-                                rotation: true
-                                center: [0, 0, 0]
-                                bound_position: [[-1, 1], [-1, 1], [0, 2]]
-                                bound_rotation: [[0, 3.14159], [0, 3.14159], [0, 3.14159]]
-                                nums: [3, 5]
-                            ''')
-            raise ValueError("light.random is not set")
\ No newline at end of file
+        self._pending_spec[actor_name] = {
+            "asset_path": asset_path,
+            "position": np.asarray(position, dtype=np.float64),
+            "rotation": np.asarray(rotation, dtype=np.float64),
+            "scale": scale,
+        }
+
+    def add_light(self, light_name: str, asset_path: str, position: np.ndarray, rotation: np.ndarray, scale: float = 1.0):
+        self.add_actor(light_name, asset_path, position, rotation, scale)
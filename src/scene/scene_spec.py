@@ -0,0 +1,385 @@
+from types import MappingProxyType
+import numpy as np
+from orca_gym.log import OrcaLog
+
+orca_log = OrcaLog.get_instance()
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+def _offset_bound(center, bound_position) -> np.ndarray:
+    '''
+    @description: 将相对center的位置范围转换为绝对范围, 返回(3, 2)
+    '''
+    center = np.asarray(center, dtype=np.float64).reshape(3, 1)
+    return center + np.asarray(bound_position, dtype=np.float64).reshape(3, 2)
+
+
+class _FrozenSpec:
+    '''
+    @description: 编译后的配置只读, 构造完成后不允许再修改属性
+    '''
+    __slots__ = ()
+
+    def _set_fields(self, **fields):
+        for key, value in fields.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+
+class ActorSpec(_FrozenSpec):
+    '''
+    @description: 编译后的actor配置
+        names / spawnables / joints: 每个actor的名称、资产和关节
+        joint_names: 环境中的关节名称, 带actor名称前缀
+        joints_dof: (A,) 每个actor的自由度
+        six_dof_indices / three_dof_indices / one_dof_indices: 各自由度actor的索引
+        six_dof_joint_names: 6自由度actor的关节名称
+        footprint_radius: (A,) 占地半径, 未配置时为0
+        random_qpos: 是否随机摆放
+        random_nums: 随机摆放数量范围
+        six_dof_bound: (6, 2) 绝对位置和欧拉角范围
+        three_dof_center / one_dof_center: (3,) 初始位置
+        three_dof_bound / one_dof_bound: (2,) 关节位置范围
+        layout_pool: 布局池目录
+    '''
+    __slots__ = ("names", "spawnables", "joints", "joint_names", "joints_dof",
+                 "six_dof_indices", "three_dof_indices", "one_dof_indices", "six_dof_joint_names",
+                 "footprint_radius", "random_qpos", "random_nums",
+                 "six_dof_bound", "three_dof_center", "three_dof_bound", "one_dof_center", "one_dof_bound",
+                 "layout_pool")
+
+    def __init__(self, actor_config: dict):
+        names = tuple(actor_config.get("names", []))
+        joints = tuple(actor_config.get("joints", []))
+        joints_dof = _readonly(np.asarray(actor_config.get("joints_dof", []), dtype=np.int64))
+        joint_names = tuple(f"{actor_name}_{joint}" for actor_name, joint in zip(names, joints))
+        six_dof_indices = _readonly(np.flatnonzero(joints_dof == 6))
+
+        footprint_radius = actor_config.get("footprint_radius", None)
+        footprint_radius = (np.zeros(len(names)) if footprint_radius is None
+                            else np.asarray(footprint_radius, dtype=np.float64))
+
+        random_config = actor_config.get("random", {})
+        six_dof_config = random_config.get("six_dof", None)
+        six_dof_bound = None
+        if six_dof_config is not None:
+            bound_rotation = six_dof_config.get("bound_rotation", [[0, 0], [0, 0], [0, 0]])
+            six_dof_bound = _readonly(np.concatenate([
+                _offset_bound(six_dof_config["center"], six_dof_config["bound_position"]),
+                np.asarray(bound_rotation, dtype=np.float64).reshape(3, 2)]))
+
+        dof_centers, dof_bounds = {}, {}
+        for key in ["three_dof", "one_dof"]:
+            dof_config = random_config.get(key, None)
+            if dof_config is None:
+                dof_centers[key], dof_bounds[key] = None, None
+                continue
+            dof_centers[key] = _readonly(np.asarray(dof_config["center"], dtype=np.float64).reshape(3))
+            # bound 可以写成 [low, high] 或 [[low, high]]
+            dof_bounds[key] = _readonly(np.asarray(dof_config["bound"], dtype=np.float64).reshape(2))
+
+        self._set_fields(
+            names=names,
+            spawnables=tuple(actor_config.get("spawnable", [])),
+            joints=joints,
+            joint_names=joint_names,
+            joints_dof=joints_dof,
+            six_dof_indices=six_dof_indices,
+            three_dof_indices=_readonly(np.flatnonzero(joints_dof == 3)),
+            one_dof_indices=_readonly(np.flatnonzero(joints_dof == 1)),
+            six_dof_joint_names=tuple(joint_names[i] for i in six_dof_indices),
+            footprint_radius=_readonly(footprint_radius),
+            random_qpos=bool(random_config.get("qpos", False)),
+            random_nums=tuple(random_config.get("nums", [0, 0])),
+            six_dof_bound=six_dof_bound,
+            three_dof_center=dof_centers["three_dof"],
+            three_dof_bound=dof_bounds["three_dof"],
+            one_dof_center=dof_centers["one_dof"],
+            one_dof_bound=dof_bounds["one_dof"],
+            layout_pool=random_config.get("layout_pool", None),
+        )
+
+
+class LightSpec(_FrozenSpec):
+    '''
+    @description: 编译后的灯光配置
+        names / spawnables: 每个灯光的名称和资产
+        random_position / random_rotation: 是否随机位置/旋转
+        position_bound: (3, 2) 绝对位置范围
+        rotation_bound: (3, 2) 欧拉角范围
+        random_nums: 每次生成的灯光数量范围
+        cycle: 每隔多少回合重新随机灯光
+    '''
+    __slots__ = ("names", "spawnables", "random_position", "random_rotation",
+                 "position_bound", "rotation_bound", "random_nums", "cycle")
+
+    def __init__(self, light_config: dict):
+        light_random = light_config.get("random", {})
+        self._set_fields(
+            names=tuple(light_config.get("names", [])),
+            spawnables=tuple(light_config.get("spawnable", [])),
+            random_position=bool(light_random.get("position", False)),
+            random_rotation=bool(light_random.get("rotation", False)),
+            position_bound=_readonly(_offset_bound(light_random.get("center", [0, 0, 0]),
+                                                   light_random.get("bound_position", [[0, 0], [0, 0], [0, 0]]))),
+            rotation_bound=_readonly(np.asarray(light_random.get("bound_rotation", [[0, 0], [0, 0], [0, 0]]),
+                                                dtype=np.float64).reshape(3, 2)),
+            random_nums=tuple(light_random.get("nums", [0, 0])),
+            cycle=light_random.get("cycle", 20),
+        )
+
+    @property
+    def is_random(self) -> bool:
+        return self.random_position or self.random_rotation
+
+
+class SceneSpec(_FrozenSpec):
+    '''
+    @description: 编译并校验后的场景配置, 由compile_scene_config生成
+        config: 原始配置
+        actor: ActorSpec
+        light: LightSpec
+        task: 任务配置(只读)
+    '''
+    __slots__ = ("config", "actor", "light", "task")
+
+    def __init__(self, config: dict):
+        self._set_fields(
+            config=config,
+            actor=ActorSpec(config.get("actor", {})),
+            light=LightSpec(config.get("light", {})),
+            task=MappingProxyType(dict(config.get("task", {}))),
+        )
+
+
+def compile_scene_config(config: dict) -> SceneSpec:
+    '''
+    @description: 校验场景配置, 并编译成只读的SceneSpec
+    '''
+    check_scene_config(config)
+    return SceneSpec(config)
+
+
+def check_scene_config(config: dict):
+    '''
+    check the config is valid
+    '''
+    actor_config = config.get("actor", {})
+    actor_names = actor_config.get("names", [])
+    actor_spawnable = actor_config.get("spawnable", [])
+    actor_joints_dof = actor_config.get("joints_dof", [])
+    actor_joints = actor_config.get("joints", [])
+
+    if len(actor_names) != len(actor_spawnable):
+        orca_log.error(f'''Has {len(actor_names)} actors and {len(actor_spawnable)} spawnables,
+        The number of actor names and spawnable must be the same.''')
+        raise ValueError("The number of actor names and spawnable must be the same.")
+
+    if len(actor_names) != len(actor_joints):
+        orca_log.error("The number of actor names and joints must be the same.")
+        raise ValueError("The number of actor names and joints must be the same.")
+
+    if len(actor_names) != len(actor_joints_dof):
+        orca_log.error("The number of actor names and joints_dof must be the same.")
+        raise ValueError("The number of actor names and joints_dof must be the same.")
+
+    invalid_dof = [dof for dof in actor_joints_dof if dof not in (1, 3, 6)]
+    if len(invalid_dof) > 0:
+        orca_log.error(f"actor.joints_dof must be 1, 3 or 6, got {invalid_dof}")
+        raise ValueError("actor.joints_dof must be 1, 3 or 6")
+
+    actor_footprint_radius = actor_config.get("footprint_radius", None)
+    if actor_footprint_radius is not None and len(actor_footprint_radius) != len(actor_names):
+        orca_log.error("The number of actor names and footprint_radius must be the same.")
+        raise ValueError("The number of actor names and footprint_radius must be the same.")
+
+    actor_random = actor_config.get("random", {})
+    actor_random_qpos = actor_random.get("qpos", False)
+    actor_random_nums = actor_random.get("nums", [0, 0])
+    actor_random_six_dof = actor_random.get("six_dof", None)
+    actor_random_three_dof = actor_random.get("three_dof", None)
+    actor_random_one_dof = actor_random.get("one_dof", None)
+
+    if actor_random_qpos:
+        if not (actor_random_nums[0] > 0
+            and actor_random_nums[1] > actor_random_nums[0]
+            and actor_random_nums[1] <= len(actor_names)):
+            orca_log.error("The actor.random.nums is invalid, the first number must be greater than 0, the second number must be greater than the first number, and the second number must be less than the number of actors.")
+            raise ValueError("The actor.random.nums is invalid, the first number must be greater than 0, the second number must be greater than the first number, and the second number must be less than the number of actors.")
+
+    if 6 in actor_joints_dof:
+        if actor_random_six_dof is None:
+            orca_log.error("actor.random.six_dof is not set")
+            orca_log.error('''example:
+                            actor:
+                              random:
+                                six_dof:
+                                  center: [0, 0, 0]
+                                  bound_position: [[-1, 1], [-1, 1], [0, 2]]
+                                  bound_rotation: [[0, 3.14159], [0, 3.14159], [0, 3.14159]]
+                            ''')
+            raise ValueError("actor.random.six_dof is not set")
+        else:
+            if actor_random_six_dof.get("bound_position", None) is None:
+                orca_log.error("actor.random.six_dof.bound_position is not set")
+                orca_log.error('''example:
+                                actor:
+                                  random:
+                                    six_dof:
+                                      bound_position: [[-1, 1], [-1, 1], [0, 2]]
+                                      bound_rotation: [[0, 3.14159], [0, 3.14159], [0, 3.14159]]
+                                ''')
+                raise ValueError("actor.random.six_dof.bound_position is not set")
+            if actor_random_six_dof.get("center", None) is None:
+                orca_log.error("actor.random.six_dof.center is not set")
+                orca_log.error('''example:
+                                actor:
+                                  random:
+                                    six_dof:
+                                      center: [0, 0, 0]
+                                ''')
+                raise ValueError("actor.random.six_dof.center is not set")
+    if 3 in actor_joints_dof:
+        if actor_random_three_dof is None or actor_random_three_dof.get("center", None) is None:
+            orca_log.error("actor.random.three_dof is not set or actor.random.three_dof.center is not set")
+            orca_log.error('''example:
+                                actor:
+                                  random:
+                                    three_dof:
+                                      center: [0, 0, 0]
+                                      bound: [0, 1]
+                                ''')
+            raise ValueError("actor.random.three_dof is not set or actor.random.three_dof.center is not set")
+        else:
+            if actor_random_three_dof.get("bound", None) is None:
+                orca_log.error("actor.random.three_dof.bound is not set")
+                orca_log.error('''example:
+                                actor:
+                                  random:
+                                    three_dof:
+                                      bound: [0, 1]
+                                ''')
+                raise ValueError("actor.random.three_dof.bound is not set")
+
+    if 1 in actor_joints_dof:
+        if actor_random_one_dof is None or actor_random_one_dof.get("center", None) is None:
+            orca_log.error("actor.random.one_dof is not set")
+            orca_log.error('''example:
+                            actor:
+                              random:
+                                one_dof:
+                                  bound: [-1, 1]
+                                ''')
+            raise ValueError("actor.random.one_dof is not set or actor.random.one_dof.center is not set")
+        else:
+            if actor_random_one_dof.get("bound", None) is None:
+                orca_log.error("actor.random.one_dof.bound is not set")
+                orca_log.error('''example:
+                                actor:
+                                  random:
+                                    one_dof:
+                                      bound: [-1, 1]
+                                ''')
+                raise ValueError("actor.random.one_dof.bound is not set")
+
+    for key in ["three_dof", "one_dof"]:
+        dof_config = actor_random.get(key, None)
+        if dof_config is None:
+            continue
+        if dof_config.get("bound", None) is not None and np.size(dof_config["bound"]) != 2:
+            orca_log.error(f"actor.random.{key}.bound must be [low, high]")
+            raise ValueError(f"actor.random.{key}.bound is invalid")
+        if dof_config.get("center", None) is not None and np.size(dof_config["center"]) != 3:
+            orca_log.error(f"actor.random.{key}.center must be [x, y, z]")
+            raise ValueError(f"actor.random.{key}.center is invalid")
+
+    if actor_random_six_dof is not None:
+        if np.shape(actor_random_six_dof.get("bound_position", [[0, 0], [0, 0], [0, 0]])) != (3, 2) \
+                or np.shape(actor_random_six_dof.get("bound_rotation", [[0, 0], [0, 0], [0, 0]])) != (3, 2):
+            orca_log.error("actor.random.six_dof.bound_position and bound_rotation must be [[min, max], [min, max], [min, max]]")
+            raise ValueError("actor.random.six_dof bounds are invalid")
+
+    light_config = config.get("light", {})
+    light_names = light_config.get("names", [])
+    light_spawnable = light_config.get("spawnable", [])
+    light_random = light_config.get("random", None)
+    if len(light_names) != len(light_spawnable):
+        orca_log.error(f'''Has {len(light_names)} lights and {len(light_spawnable)} spawnables,
+        The number of light names and spawnable must be the same.''')
+        raise ValueError("The number of light names and spawnable must be the same.")
+
+    if light_random is not None:
+        is_random_position = light_random.get("position", False)
+        is_random_rotation = light_random.get("rotation", False)
+        light_random_center = light_random.get("center", None)
+        light_random_bound_position = light_random.get("bound_position", None)
+        light_random_bound_rotation = light_random.get("bound_rotation", None)
+        light_random_nums = light_random.get("nums", [0, 0])
+        light_random_cycle = light_random.get("cycle", 20)
+
+        if is_random_position and light_random_bound_position is None:
+            orca_log.error("light.random.bound_position is not set")
+            orca_log.error('''example:
+                            light:
+                              random:
+                                center: [0, 0, 0]
+                                position: true
+                                bound_position: [[-1, 1], [-1, 1], [0, 2]]
+                            ''')
+            raise ValueError("light.random.bound_position is not set")
+
+        if is_random_rotation and light_random_bound_rotation is None:
+            orca_log.error("light.random.bound_rotation is not set")
+            orca_log.error('''example:
+                            light:
+                              random:
+                                center: [0, 0, 0]
+                                rotation: true
+                                bound_rotation: [[0, 3.14159], [0, 3.14159], [0, 3.14159]]
+                            ''')
+            raise ValueError("light.random.bound_rotation is not set")
+
+        if light_random_center is None:
+            orca_log.error("light.random.center is not set")
+            orca_log.error('''example:
+                            light:
+                              random:
+                                position: true
+                                center: [0, 0, 0]
+                                bound_position: [[-1, 1], [-1, 1], [0, 2]]
+                            ''')
+            raise ValueError("light.random.center is not set")
+
+        if not (light_random_nums[0] > 0
+            and light_random_nums[1] >= light_random_nums[0]
+            and light_random_nums[1] <= len(light_names)):
+            orca_log.error("The light.random.nums is invalid, the first number must be greater than 0, the second number must be greater than the first number, and the second number must be less than the number of lights.")
+            raise ValueError("The light.random.nums is invalid, the first number must be greater than 0, the second number must be greater than the first number, and the second number must be less than the number of lights.")
+
+        if light_random_cycle <= 0:
+            orca_log.error("light.random.cycle is invalid, the cycle must be greater than 0")
+            orca_log.error('''example:
+                            light:
+                              random:
+                                cycle: 20
+                            ''')
+            raise ValueError("light.random.cycle is invalid, the cycle must be greater than 0")
+    else:
+        orca_log.error("light.random is not set")
+        orca_log.error('''example:
+                        light:
+                          random:
+                            position: true
+                            rotation: true
+                            center: [0, 0, 0]
+                            bound_position: [[-1, 1], [-1, 1], [0, 2]]
+                            bound_rotation: [[0, 3.14159], [0, 3.14159], [0, 3.14159]]
+                            nums: [3, 5]
+                        ''')
+        raise ValueError("light.random is not set")
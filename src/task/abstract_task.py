@@ -6,13 +6,37 @@ from scene.scene_manager import SceneManager
 orca_logger = OrcaLog.get_instance()
 
 class AbstractTask(metaclass=abc.ABCMeta):
-    def __init__(self, env: OrcaGymLocalEnv):
+    def __init__(self, env: OrcaGymLocalEnv, failure_check_interval: int = 0):
+        '''
+        @param:
+            env: 环境
+            failure_check_interval: 每隔多少步检查一次is_failed, 0表示不检查
+        '''
         self.env = env
+        self.failure_check_interval = failure_check_interval
 
     @abc.abstractmethod
     def is_success(self):
         raise NotImplementedError("Subclasses must implement this method")
 
+    def is_failed(self) -> bool:
+        '''
+        @description: 任务是否已经处于不可恢复的失败状态, 用于提前结束回合, 子类可选实现
+        @return:
+            True: 任务已失败, 回合可以提前结束
+            False: 任务仍可能成功
+        '''
+        return False
+
+    def should_check_failure(self, step: int) -> bool:
+        '''
+        @param:
+            step: 当前回合已记录的步数
+        @return:
+            这一步是否需要调用is_failed
+        '''
+        return self.failure_check_interval > 0 and step % self.failure_check_interval == 0
+
     def get_task(self, scene_manager: SceneManager, task_info: dict = None) -> bool:
         '''
         @param:
@@ -25,12 +49,20 @@ class AbstractTask(metaclass=abc.ABCMeta):
         '''
         retry_count = 0
         while not self._get_task(scene_manager, task_info=task_info) and retry_count < 10:
-            scene_manager.update_actor_qpos()
+            scene_manager.update_actor_qpos(layout_filter=self.get_layout_filter(scene_manager))
             retry_count += 1
         if retry_count >= 10:
             raise ValueError("Get Task Failed, please check your task config file, because task is always success")
         return True
 
+    def get_layout_filter(self, scene_manager: SceneManager):
+        '''
+        @description: 任务的布局前置条件, 随机布局在写入仿真之前用它批量筛选候选位置, 子类可选实现
+        @return:
+            None 表示不筛选, 否则为函数: 输入(N, 3)位置, 返回(N,)布尔数组, True表示物体放在该位置时任务仍然可做
+        '''
+        return None
+
     @abc.abstractmethod
     def _get_task(self, scene_manager: SceneManager, task_info: dict = None) -> bool:
         raise NotImplementedError("Subclasses must implement this method")
@@ -16,69 +16,130 @@ class PickPlaceTask(AbstractTask):
         self.target_actor_info = None
         self.goal_name = None
         self.goal_site = None
+        # 失败判定: 目标物体离开工作空间或低于最低高度
+        self.workspace_bound = None
+        self.min_height = None
+        # 目标区域几何缓存, 场景重新发布后失效
+        self._scene_manager: SceneManager = None
+        self._goal_region = None
+        self._goal_region_key = None
         
     def get_goal_site_env_name(self):
         return self.goal_name + "_" + self.goal_site
 
-    @override
-    def is_success(self):
-        target_joint_qpos = self.env.query_joint_qpos([self.target_actor_info["joint_name"]])[self.target_actor_info["joint_name"]]
-        target_pos = target_joint_qpos[:3]
-        
-        goal_site_info = self.env.query_site_pos_and_mat([self.get_goal_site_env_name()])[self.get_goal_site_env_name()]
-        goal_site_xpos = goal_site_info['xpos']
-        goal_site_xmat = goal_site_info['xmat'].reshape(3, 3)
-        goal_site_size = self.env.query_site_size([self.get_goal_site_env_name()])[self.get_goal_site_env_name()]
-        
-        site_type = self.env.gym.query_all_sites()[self.get_goal_site_env_name()]["Type"]
-        
-        if site_type == mujoco.mjtGeom.mjGEOM_BOX:
-            half_size = goal_site_size[:3]
-            half_world = np.abs(goal_site_xmat) @ half_size
-            bbox_min = goal_site_xpos - half_world
-            bbox_max = goal_site_xpos + half_world
+    def get_goal_region(self) -> tuple[str, np.ndarray, np.ndarray, np.ndarray]:
+        '''
+        @description: 获取目标区域的局部形状, 按场景版本缓存, 场景重新发布后重新查询site类型和尺寸
+            世界系下的半包围盒为 max(base, |xmat| @ half_size + offset)
+        @return:
+            goal_site_env_name, base, half_size, offset
+        '''
+        goal_site_env_name = self.get_goal_site_env_name()
+        scene_version = self._scene_manager.scene_version if self._scene_manager is not None else None
+        cache_key = (scene_version, goal_site_env_name)
+        if self._goal_region_key == cache_key:
+            return self._goal_region
+
+        goal_site_size = np.asarray(self.env.query_site_size([goal_site_env_name])[goal_site_env_name], dtype=np.float64)
+        site_type = self.env.gym.query_all_sites()[goal_site_env_name]["Type"]
+
+        base, half_size, offset = np.zeros(3), np.zeros(3), np.zeros(3)
+        if site_type == mujoco.mjtGeom.mjGEOM_BOX or site_type == mujoco.mjtGeom.mjGEOM_ELLIPSOID:
+            half_size = goal_site_size[:3].copy()
         elif site_type == mujoco.mjtGeom.mjGEOM_SPHERE:
-            radius = goal_site_size[0]
-            bbox_min = goal_site_xpos - radius
-            bbox_max = goal_site_xpos + radius
+            base = np.full(3, goal_site_size[0])
         elif site_type == mujoco.mjtGeom.mjGEOM_CYLINDER:
-            radius = goal_site_size[0]
-            half_height = goal_site_size[1]
-            z_axis = goal_site_xmat[:, 2]
-            half_world_xy = np.ones(3) * radius
-            half_world_z = np.abs(z_axis) * half_height
-            half_world = np.maximum(half_world_xy, half_world_z)
-            bbox_min = goal_site_xpos - half_world
-            bbox_max = goal_site_xpos + half_world
+            base = np.full(3, goal_site_size[0])
+            half_size = np.array([0.0, 0.0, goal_site_size[1]])
         elif site_type == mujoco.mjtGeom.mjGEOM_CAPSULE:
-            radius = goal_site_size[0]
-            half_height = goal_site_size[1]
-            z_axis = goal_site_xmat[:, 2]
-            half_world_xy = np.ones(3) * radius
-            half_world_z = np.abs(z_axis) * half_height + radius
-            half_world = np.maximum(half_world_xy, half_world_z)
-            bbox_min = goal_site_xpos - half_world
-            bbox_max = goal_site_xpos + half_world
-        elif site_type == mujoco.mjtGeom.mjGEOM_ELLIPSOID:
-            half_size = goal_site_size[:3]
-            half_world = np.abs(goal_site_xmat) @ half_size
-            bbox_min = goal_site_xpos - half_world
-            bbox_max = goal_site_xpos + half_world
+            half_size = np.array([0.0, 0.0, goal_site_size[1]])
+            offset = np.full(3, goal_site_size[0])
         else:
             orca_logger.warning(f"Unsupported site type: {site_type}, using sphere approximation")
-            radius = np.max(goal_site_size[:3])
-            bbox_min = goal_site_xpos - radius
-            bbox_max = goal_site_xpos + radius
-        
-        in_bbox = np.all(target_pos >= bbox_min) and np.all(target_pos <= bbox_max)
+            base = np.full(3, np.max(goal_site_size[:3]))
+
+        self._goal_region = (goal_site_env_name, base, half_size, offset)
+        self._goal_region_key = cache_key
+        return self._goal_region
+
+    def in_goal_region(self, positions: np.ndarray) -> np.ndarray | bool:
+        '''
+        @description: 判断一个或一组位置是否在目标区域的世界系包围盒内
+        @param:
+            positions: (3,) 或 (N, 3)
+        '''
+        goal_site_env_name, base, half_size, offset = self.get_goal_region()
+        goal_site_info = self.env.query_site_pos_and_mat([goal_site_env_name])[goal_site_env_name]
+        goal_site_xpos = goal_site_info['xpos']
+        goal_site_xmat = goal_site_info['xmat'].reshape(3, 3)
+
+        half_world = np.maximum(base, np.abs(goal_site_xmat) @ half_size + offset)
+        in_bbox = np.all(np.abs(np.asarray(positions) - goal_site_xpos) <= half_world, axis=-1)
         return in_bbox
 
+    @override
+    def is_success(self):
+        target_joint_qpos = self.env.query_joint_qpos([self.target_actor_info["joint_name"]])[self.target_actor_info["joint_name"]]
+        target_pos = target_joint_qpos[:3]
+        return bool(self.in_goal_region(target_pos))
+
+    @override
+    def get_layout_filter(self, scene_manager: SceneManager):
+        # 任意一个物体都可能被选为目标, 所以所有物体都不能一开始就在目标区域内
+        if self.goal_name is None or self.goal_site is None:
+            goal_config = scene_manager.get_task_config().get("goal", {})
+            self.goal_name = goal_config.get("name")
+            self.goal_site = goal_config.get("site")
+        if self.goal_name is None or self.goal_site is None:
+            return None
+        self._scene_manager = scene_manager
+        return lambda positions: ~self.in_goal_region(positions)
+
+    @override
+    def is_failed(self) -> bool:
+        if self.target_actor_info is None:
+            return False
+        target_joint_qpos = self.env.query_joint_qpos([self.target_actor_info["joint_name"]])[self.target_actor_info["joint_name"]]
+        target_pos = target_joint_qpos[:3]
+
+        if self.min_height is not None and target_pos[2] < self.min_height:
+            orca_logger.info(f"{self.target_actor} fell below {self.min_height}, task failed")
+            return True
+        if self.workspace_bound is not None and not (np.all(target_pos >= self.workspace_bound[:, 0])
+                                                     and np.all(target_pos <= self.workspace_bound[:, 1])):
+            orca_logger.info(f"{self.target_actor} left the workspace, task failed")
+            return True
+        return False
+
+    def set_failure_config(self, task_config: dict):
+        '''
+        @description: 读取失败判定配置, 未配置时不做提前终止
+            task:
+              failure:
+                check_interval: 10
+                min_height: 1.0
+                workspace: [[-1, 1], [-1, 1], [0, 2]]
+        '''
+        failure_config = task_config.get("failure", None)
+        if failure_config is None:
+            self.failure_check_interval = 0
+            return
+        self.failure_check_interval = failure_config.get("check_interval", 10)
+        self.min_height = failure_config.get("min_height", None)
+        workspace = failure_config.get("workspace", None)
+        self.workspace_bound = np.array(workspace, dtype=np.float64) if workspace is not None else None
+        if self.workspace_bound is not None and self.workspace_bound.shape != (3, 2):
+            orca_logger.error("task.failure.workspace must be [[x_min, x_max], [y_min, y_max], [z_min, z_max]]")
+            raise ValueError("task.failure.workspace is invalid")
+
     @override
     def get_task_description(self):
         return f"Pick {self.target_actor} and place it into {self.goal_site}"
 
     @override
     def _get_task(self, scene_manager: SceneManager, task_info: dict = None)-> bool:
+        self._scene_manager = scene_manager
+        self.set_failure_config(scene_manager.get_task_config())
         if task_info is not None:
             self.target_actor = task_info.get("target_actor")
             self.target_actor_info = task_info.get("target_actor_info")
@@ -91,7 +152,8 @@ class PickPlaceTask(AbstractTask):
 
         scene_info = scene_manager.get_scene_info()
         lens = len(scene_info)
-        target_index =  np.random.randint(0, lens - 1) if lens > 1 else 0
+        # 使用场景管理器的随机数生成器, 设置seed后目标物体的选择也可以复现
+        target_index = scene_manager.rng.integers(0, lens - 1) if lens > 1 else 0
         self.target_actor = list(scene_info.keys())[target_index]
         self.target_actor_info = scene_info[self.target_actor]
 
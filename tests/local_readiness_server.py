@@ -0,0 +1,28 @@
+import random
+import time
+
+
+class LocalReadinessServer:
+    '''
+    @description: 本地替身场景服务, 接口与OrcaGymScene的publish_scene/add_actor一致,
+                  每次发布后在随机延迟之后才就绪, 用于在没有OrcaStudio的情况下测试就绪握手
+    '''
+    def __init__(self, delay_range: tuple[float, float] = (0.0, 0.5), seed: int = None):
+        self.delay_range = delay_range
+        self.actors = []
+        self.published_actors = []
+        self.publish_count = 0
+        self._rng = random.Random(seed)
+        self._ready_at = 0.0
+
+    def add_actor(self, actor):
+        self.actors.append(actor)
+
+    def publish_scene(self):
+        self.published_actors = self.actors
+        self.actors = []
+        self.publish_count += 1
+        self._ready_at = time.perf_counter() + self._rng.uniform(*self.delay_range)
+
+    def is_ready(self) -> bool:
+        return time.perf_counter() >= self._ready_at
@@ -0,0 +1,57 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from devices.input_log import (FLAG_KEY_STATE, FLAG_TRANSFORM, INPUT_LOG_MAGIC_V1, RECORD_SAMPLE, RECORD_TICK,
+                               InputLogWriter, encode_key_state, read_input_log)
+from devices import input_log
+
+
+def make_key_state(x: float) -> dict:
+    hand = {"position": [x, 0.0, 1.0], "rotation": [0.0, 0.0, 0.0, 1.0], "triggerValue": 0.5,
+            "primaryButtonPressed": True, "secondaryButtonPressed": False, "gripButtonPressed": False,
+            "joystickPosition": [0.0, -1.0]}
+    return {"leftHand": hand, "rightHand": dict(hand, position=[-x, 0.0, 1.0])}
+
+
+def test_transform_round_trip(tmp_path):
+    path = str(tmp_path / "input.bin")
+    transform = [np.array([0.1, 0.2, 0.3]), np.eye(4), 2.5]
+    writer = InputLogWriter(path)
+    writer.write_sample(transform, make_key_state(0.25))
+    writer.write_tick()
+    writer.write_sample(None, make_key_state(0.5))
+    writer.close()
+
+    records = read_input_log(path)
+    assert [record[0] for record in records] == [RECORD_SAMPLE, RECORD_TICK, RECORD_SAMPLE]
+    _, _, read_transform, key_state = records[0]
+    assert len(read_transform) == 3
+    np.testing.assert_array_equal(read_transform[0], transform[0])
+    np.testing.assert_array_equal(read_transform[1], transform[1])
+    assert read_transform[2] == 2.5
+    assert key_state["leftHand"]["position"] == pytest.approx([0.25, 0.0, 1.0])
+    assert records[2][2] is None
+
+
+def test_truncated_transform_is_dropped(tmp_path):
+    path = str(tmp_path / "input.bin")
+    writer = InputLogWriter(path)
+    writer.write_sample([np.arange(7, dtype=np.float64)], make_key_state(0.0))
+    writer.close()
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:-8])
+    assert read_input_log(path) == []
+
+
+def test_v1_log_marks_transform_valid(tmp_path):
+    path = str(tmp_path / "input_v1.bin")
+    with open(path, "wb") as f:
+        f.write(INPUT_LOG_MAGIC_V1)
+        f.write(input_log._RECORD_HEADER.pack(RECORD_SAMPLE, 0.0))
+        f.write(input_log._SAMPLE_FLAGS.pack(FLAG_KEY_STATE | FLAG_TRANSFORM))
+        f.write(encode_key_state(make_key_state(0.0)))
+    records = read_input_log(path)
+    assert len(records) == 1 and records[0][2] == []
@@ -0,0 +1,76 @@
+import shutil
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("mujoco")
+pytest.importorskip("orca_gym")
+
+from envs.dataCollection.local_env import LocalDataCollectionEnv
+
+SCENE_A = """
+<mujoco>
+  <worldbody>
+    <geom type="plane" size="5 5 0.1"/>
+    <body name="box_a" pos="0 0 0.5"><freejoint name="box_a_joint"/><geom type="box" size="0.1 0.1 0.1"/></body>
+  </worldbody>
+</mujoco>
+"""
+
+SCENE_B = """
+<mujoco>
+  <worldbody>
+    <geom type="plane" size="5 5 0.1"/>
+    <body name="box_a" pos="0 0 0.5"><freejoint name="box_a_joint"/><geom type="box" size="0.1 0.1 0.1"/></body>
+    <body name="box_b" pos="1 0 0.5"><freejoint name="box_b_joint"/><geom type="box" size="0.1 0.1 0.1"/></body>
+  </worldbody>
+</mujoco>
+"""
+
+
+def write_scene(tmp_path, name: str, xml: str) -> str:
+    path = tmp_path / f"{name}.xml"
+    path.write_text(xml)
+    return str(path)
+
+
+def publish(source: str, model_xml_path: str):
+    shutil.copyfile(source, model_xml_path)
+
+
+def make_env(model_xml_path: str) -> LocalDataCollectionEnv:
+    return LocalDataCollectionEnv(model_xml_path, frame_skip=1, orcagym_addr="localhost:50051", agent_names=["robot"],
+                                  time_step=0.002, default_joint_values={}, obs_callback=lambda env: {})
+
+
+def test_cache_hit_after_switching_to_a_larger_model(tmp_path):
+    scene_a, scene_b = write_scene(tmp_path, "a", SCENE_A), write_scene(tmp_path, "b", SCENE_B)
+    model_xml_path = str(tmp_path / "scene.xml")
+    publish(scene_a, model_xml_path)
+    env = make_env(model_xml_path)
+    assert env.gym._mjModel.nq == 7
+
+    publish(scene_b, model_xml_path)
+    env.init_env()
+    assert env.gym._mjModel.nq == 14 and len(env.gym.data.qpos) == 14
+
+    publish(scene_a, model_xml_path)
+    env.init_env()
+    assert env.model_cache.hits == 1
+    assert env.gym._mjModel.nq == 7
+    assert env.gym._xml_path == model_xml_path
+    assert len(env.gym._qpos_cache) == 7 and len(env.gym.data.qpos) == 7
+    assert env.model.nq == 7
+    env.step(env.ctrl)
+
+
+def test_in_place_edits_do_not_leak_into_the_cache(tmp_path):
+    model_xml_path = str(tmp_path / "scene.xml")
+    publish(write_scene(tmp_path, "a", SCENE_A), model_xml_path)
+    env = make_env(model_xml_path)
+    edited_model = env.gym._mjModel
+    edited_model.body_pos[1] = [5.0, 5.0, 5.0]
+
+    env.init_env()
+    assert env.model_cache.hits == 1
+    assert env.gym._mjModel is not edited_model
+    assert list(env.gym._mjModel.body_pos[1]) == [0.0, 0.0, 0.5]
@@ -0,0 +1,50 @@
+import json
+import pytest
+
+np = pytest.importorskip("numpy")
+mujoco = pytest.importorskip("mujoco")
+pytest.importorskip("orca_gym")
+
+from scene.physics_state import capture_physics_state, is_physics_state_compatible, restore_physics_state
+
+MODEL_XML = """
+<mujoco>
+  <worldbody>
+    <body name="{0}_body"><joint name="{0}_joint" type="slide" axis="1 0 0"/><geom type="sphere" size="0.1"/></body>
+    <body name="{1}_body"><joint name="{1}_joint" type="slide" axis="0 1 0"/><geom type="sphere" size="0.1"/></body>
+  </worldbody>
+</mujoco>
+"""
+
+
+class FakeGym:
+    def __init__(self, model: mujoco.MjModel):
+        self._mjModel = model
+        self._mjData = mujoco.MjData(model)
+
+
+class FakeEnv:
+    def __init__(self, first: str, second: str):
+        self.gym = FakeGym(mujoco.MjModel.from_xml_string(MODEL_XML.format(first, second)))
+
+    def mj_forward(self):
+        mujoco.mj_forward(self.gym._mjModel, self.gym._mjData)
+
+
+def saved_state(env: FakeEnv) -> dict:
+    env.gym._mjData.qpos[:] = [0.3, -0.7]
+    # 与写入数据集时一样经过json
+    return json.loads(json.dumps(capture_physics_state(env)))
+
+
+def test_restore_on_the_same_model():
+    physics_state = saved_state(FakeEnv("a", "b"))
+    env = FakeEnv("a", "b")
+    assert is_physics_state_compatible(env, physics_state)
+    restore_physics_state(env, physics_state)
+    np.testing.assert_array_equal(env.gym._mjData.qpos, [0.3, -0.7])
+
+
+def test_same_dimensions_with_reordered_joints_are_incompatible():
+    physics_state = saved_state(FakeEnv("a", "b"))
+    assert not is_physics_state_compatible(FakeEnv("b", "a"), physics_state)
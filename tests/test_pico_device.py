@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("orca_gym")
+
+from devices.abstract_device import PicoJoystickDevice
+
+
+class FakePicoJoystick:
+    '''
+    @description: 按顺序返回预设的帧, key_state始终是同一个dict, 和原地更新状态的手柄一样
+    '''
+    def __init__(self, device: PicoJoystickDevice, frames: list[tuple[list | None, dict]]):
+        self.device = device
+        self.frames = frames
+        self.key_state = {}
+        self.transform = None
+        self.polls = 0
+
+    def get_key_state(self) -> dict:
+        if self.polls == len(self.frames):
+            self.device._stop_event.set()
+            return None
+        self.transform, key_state = self.frames[self.polls]
+        self.key_state.clear()
+        self.key_state.update(key_state)
+        self.polls += 1
+        return self.key_state
+
+    def get_transform_list(self) -> list | None:
+        return self.transform
+
+
+def hand(x: float) -> dict:
+    return {"leftHand": {"position": [x, 0.0, 0.0]}, "rightHand": {"position": [0.0, x, 0.0]}}
+
+
+def test_read_loop_detects_new_frames_by_content():
+    device = PicoJoystickDevice(pico_joystick=None, poll_interval=0.0)
+    frames = [
+        (None, hand(0.0)),
+        (None, hand(0.0)),          # 重复的帧
+        (None, hand(0.1)),          # 原地更新的新帧
+        ([[1.0, 2.0, 3.0]], hand(0.1)),  # 只有transform变化
+        ([[1.0, 2.0, 3.0]], hand(0.1)),
+    ]
+    device.pico_joystick = FakePicoJoystick(device, frames)
+    device._read_loop()
+    assert device._received_nums == 3
@@ -0,0 +1,66 @@
+import time
+import pytest
+
+pytest.importorskip("orca_gym")
+
+from scene.readiness import wait_until_ready
+from local_readiness_server import LocalReadinessServer
+
+
+class FakeClock:
+    '''
+    @description: 替换time.perf_counter和time.sleep, sleep只推进时间并记录每次等待的间隔
+    '''
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake_clock = FakeClock()
+    monkeypatch.setattr(time, "perf_counter", fake_clock.perf_counter)
+    monkeypatch.setattr(time, "sleep", fake_clock.sleep)
+    return fake_clock
+
+
+def test_ready_after_server_delay(clock):
+    server = LocalReadinessServer(delay_range=(1.0, 1.0))
+    server.publish_scene()
+    elapsed_time = wait_until_ready(server.is_ready, timeout=5.0, initial_interval=0.1, max_interval=1.0)
+    assert server.is_ready()
+    assert 1.0 <= elapsed_time < 2.0
+
+
+def test_backoff_grows_until_max_interval(clock):
+    server = LocalReadinessServer(delay_range=(3.0, 3.0))
+    server.publish_scene()
+    wait_until_ready(server.is_ready, timeout=10.0, initial_interval=0.1, max_interval=1.0, backoff=2.0)
+    assert clock.sleeps[:5] == pytest.approx([0.1, 0.2, 0.4, 0.8, 1.0])
+    assert all(interval <= 1.0 for interval in clock.sleeps)
+
+
+def test_timeout_raises_with_last_error(clock):
+    def probe() -> bool:
+        raise ConnectionError("server not ready")
+
+    with pytest.raises(TimeoutError) as error:
+        wait_until_ready(probe, timeout=2.0, initial_interval=0.1, max_interval=1.0)
+    assert isinstance(error.value.__cause__, ConnectionError)
+    # 最后一次等待不会超过剩余时间
+    assert sum(clock.sleeps) == pytest.approx(2.0)
+
+
+def test_not_ready_before_publish_delay(clock):
+    server = LocalReadinessServer(delay_range=(5.0, 5.0))
+    server.publish_scene()
+    with pytest.raises(TimeoutError):
+        wait_until_ready(server.is_ready, timeout=1.0, initial_interval=0.1)
+    assert server.publish_count == 1
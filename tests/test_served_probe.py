@@ -0,0 +1,103 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("orca_gym")
+
+from envs.dataCollection.model_cache import model_content_key
+from scene.scene_manager import SceneManager
+
+EMPTY_SCENE = """
+<mujoco>
+  <worldbody><geom type="plane" size="5 5 0.1"/></worldbody>
+</mujoco>
+"""
+
+ACTOR_SCENE = """
+<mujoco>
+  <worldbody>
+    <geom type="plane" size="5 5 0.1"/>
+    <body name="box_body"><joint name="box_box_joint" type="free"/><geom type="box" size="0.1 0.1 0.1"/></body>
+  </worldbody>
+</mujoco>
+"""
+
+CONFIG = {"actor": {"names": ["box"], "joints": ["box_joint"], "joints_dof": [6], "spawnable": ["box_asset"],
+                    "random": {"six_dof": {"center": [0, 0, 0], "bound_position": [[0, 0], [0, 0], [0, 0]]}}},
+          "light": {"names": ["light"], "spawnable": ["light_asset"], "random": {"center": [0, 0, 0], "nums": [1, 1]}}}
+
+
+class FakeServedScene:
+    '''
+    @description: 替身场景服务, 发布后立即提供对应的模型xml: 没有actor时是空场景, 有actor时是带actor关节的场景
+    '''
+    def __init__(self, tmp_path):
+        self.model_xml_path = str(tmp_path / "served.xml")
+        self.actors = []
+        self.publish_count = 0
+
+    def add_actor(self, actor):
+        self.actors.append(actor)
+
+    def publish_scene(self):
+        with open(self.model_xml_path, "w") as f:
+            f.write(ACTOR_SCENE if len(self.actors) > 0 else EMPTY_SCENE)
+        self.actors = []
+        self.publish_count += 1
+
+
+class FakeServedEnv:
+    def __init__(self, scene: FakeServedScene, model_key: str = None):
+        self.scene = scene
+        self.model_key = model_key
+
+    def fetch_model_xml(self) -> str:
+        return self.scene.model_xml_path
+
+    def init_env(self):
+        self.model_key = model_content_key(self.scene.model_xml_path)
+
+
+def make_scene_manager(tmp_path, served_xml: str = None) -> tuple[SceneManager, FakeServedEnv]:
+    scene = FakeServedScene(tmp_path)
+    env = FakeServedEnv(scene)
+    if served_xml is not None:
+        with open(scene.model_xml_path, "w") as f:
+            f.write(served_xml)
+        env.init_env()
+    scene_manager = SceneManager("", CONFIG, env=env, init_env_callback=env.init_env, scene=scene, ready_timeout=0.5)
+    return scene_manager, env
+
+
+def test_identical_republish_is_ready_after_the_empty_publish(tmp_path):
+    scene_manager, env = make_scene_manager(tmp_path, served_xml=ACTOR_SCENE)
+    loaded_model_key = env.model_key
+    scene_manager.add_actor("box", "box_asset", [0, 0, 0], [1, 0, 0, 0])
+    scene_manager.commit_scene()
+    assert env.scene.publish_count == 2
+    assert env.model_key == loaded_model_key
+    assert scene_manager._empty_model_key is None
+
+
+def test_served_model_ready(tmp_path):
+    scene_manager, env = make_scene_manager(tmp_path, served_xml=ACTOR_SCENE)
+    # 服务端还是发布前加载的模型
+    assert not scene_manager._served_model_ready(env.model_key)
+
+    env.scene.publish_scene()
+    empty_model_key = model_content_key(env.scene.model_xml_path)
+    # 服务端换成了新模型, 但缺少actor的关节
+    assert not scene_manager._served_model_ready(None)
+    assert scene_manager._served_empty_model_ready()
+    assert scene_manager._empty_model_key == empty_model_key
+
+    env.scene.add_actor("box")
+    env.scene.publish_scene()
+    assert scene_manager._served_model_ready(empty_model_key)
+    assert not scene_manager._served_empty_model_ready()
+
+
+def test_identical_republish_without_the_empty_publish_times_out(tmp_path):
+    scene_manager, env = make_scene_manager(tmp_path, served_xml=ACTOR_SCENE)
+    env.scene.add_actor("box")
+    with pytest.raises(TimeoutError):
+        scene_manager.publish_scene()
@@ -0,0 +1,103 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+mujoco = pytest.importorskip("mujoco")
+pytest.importorskip("orca_gym")
+
+from envs.dataCollection.vector_env import VectorDataCollectionEnv
+from scene.physics_state import get_mj_model_data
+
+MODEL_XML = """
+<mujoco>
+  <option timestep="0.002"/>
+  <worldbody>
+    <geom name="floor" type="plane" size="5 5 0.1"/>
+    <body name="box" pos="0 0 0.5">
+      <freejoint name="box_joint"/>
+      <geom type="box" size="0.05 0.05 0.05" mass="0.1"/>
+    </body>
+    <body name="slider">
+      <joint name="slider_joint" type="slide" axis="1 0 0"/>
+      <geom type="sphere" size="0.02" pos="0 1 0.02" mass="0.1"/>
+    </body>
+  </worldbody>
+  <actuator>
+    <motor name="slider_motor" joint="slider_joint"/>
+  </actuator>
+</mujoco>
+"""
+
+
+class FakeKinematics:
+    def invalidate(self):
+        pass
+
+
+class FakeGym:
+    '''
+    @description: 只保留VectorDataCollectionEnv用到的OrcaGymLocal属性, update_data与OrcaGymLocal一样从_mjData刷新data
+    '''
+    def __init__(self, model: mujoco.MjModel):
+        self._mjModel = model
+        self._mjData = mujoco.MjData(model)
+        self.data = None
+        self.update_data()
+
+    def update_data(self):
+        self.data = self._mjData
+
+
+class FakeEnv:
+    def __init__(self, frame_skip: int = 5):
+        self.gym = FakeGym(mujoco.MjModel.from_xml_string(MODEL_XML))
+        self.ctrl = np.zeros(self.gym._mjModel.nu, dtype=np.float32)
+        self.kinematics = FakeKinematics()
+        self.frame_skip = frame_skip
+
+
+def set_layout(env: FakeEnv, box_pos: list[float]):
+    model, data = get_mj_model_data(env)
+    address = model.jnt_qposadr[mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_JOINT, "box_joint")]
+    data.qpos[address:address + 3] = box_pos
+    mujoco.mj_forward(model, data)
+
+
+def reference_rollout(box_pos: list[float], ctrl: np.ndarray, steps: int, frame_skip: int) -> np.ndarray:
+    model = mujoco.MjModel.from_xml_string(MODEL_XML)
+    data = mujoco.MjData(model)
+    address = model.jnt_qposadr[mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_JOINT, "box_joint")]
+    data.qpos[address:address + 3] = box_pos
+    data.ctrl[:] = ctrl
+    for _ in range(steps):
+        mujoco.mj_step(model, data, nstep=frame_skip)
+    return data.qpos.copy()
+
+
+@pytest.mark.parametrize("num_threads", [0, 2])
+def test_instances_with_different_layouts_evolve_independently(num_threads):
+    env = FakeEnv()
+    env_data = env.gym._mjData
+    vector_env = VectorDataCollectionEnv(env, num_instances=2, num_threads=num_threads)
+    layouts = [[0.0, 0.0, 0.5], [1.0, -1.0, 1.5]]
+    ctrls = {0: np.array([0.5], dtype=np.float32), 1: np.array([-0.5], dtype=np.float32)}
+
+    for index, box_pos in enumerate(layouts):
+        with vector_env.activate(index):
+            assert get_mj_model_data(env)[1] is vector_env.datas[index]
+            assert env.gym.data is vector_env.datas[index]
+            set_layout(env, box_pos)
+    assert env.gym._mjData is env_data and env.gym.data is env_data
+
+    steps = 20
+    try:
+        for _ in range(steps):
+            vector_env.step(ctrls)
+    finally:
+        vector_env.close()
+
+    for index, box_pos in enumerate(layouts):
+        expected = reference_rollout(box_pos, ctrls[index], steps, env.frame_skip)
+        np.testing.assert_allclose(vector_env.datas[index].qpos, expected, atol=1e-10)
+    assert not np.allclose(vector_env.datas[0].qpos, vector_env.datas[1].qpos)
+    # 环境自己的数据没有被实例的步进改动
+    assert np.all(env_data.qvel == 0.0)